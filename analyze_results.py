@@ -0,0 +1,378 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Analyzes the counter files the LoRa receiver writes through blocks_file_sink
+# (one zero padded counter per line, see counter_formatter). Every file is
+# parsed with NumPy in a process pool, and per-file plus aggregate loss,
+# burst-loss lengths and parse errors are written as JSON or CSV. With
+# --follow it instead tails files that are still being written and reports
+# rolling packet error rates every second.
+
+DEFAULT_DIRECTORY = '/home/gabriel/GNU_Radio_ExpressLRS/results'
+DEFAULT_PACKET_COUNT = 1000
+
+_MAX_DIGITS = 9
+_NEWLINE = ord('\n')
+_CR = ord('\r')
+
+CSV_FIELDS = ['file', 'lines', 'parse_errors', 'expected', 'received', 'lost', 'loss', 'duplicates',
+              'reordered', 'out_of_range', 'max_burst', 'missed', 'bursts', 'error']
+
+def parse_counters(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parses every line of `data` as a decimal counter. Returns the values and
+    a mask of the lines that parsed, with -1 for the ones that didn't. A
+    final line without a newline still counts, an empty one doesn't.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if len(buf) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+
+    # Universal newlines like a text mode readline: \n, \r\n and a lone \r
+    lone_cr = buf == _CR
+    lone_cr[:-1] &= buf[1:] != _NEWLINE
+    ends = np.flatnonzero((buf == _NEWLINE) | lone_cr)
+    if len(ends) == 0 or ends[-1] != len(buf) - 1:
+        ends = np.append(ends, len(buf))
+    starts = np.zeros_like(ends)
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts
+    # The \r of a \r\n stays on its line, so drop it here
+    lengths -= (lengths > 0) & (buf[np.maximum(ends - 1, 0)] == _CR)
+
+    # One row per line, one column per digit position
+    cols = np.arange(_MAX_DIGITS)
+    inside = cols < lengths[:, None]
+    digits = buf[np.minimum(starts[:, None] + cols, len(buf) - 1)].astype(np.int64) - ord('0')
+    digits[~inside] = 0
+
+    valid = (lengths >= 1) & (lengths <= _MAX_DIGITS) & np.all((digits >= 0) & (digits <= 9), axis=1)
+    power = np.clip(lengths[:, None] - 1 - cols, 0, None)
+    values = np.where(inside, digits * 10 ** power, 0).sum(axis=1)
+    values[~valid] = -1
+    return values, valid
+
+def burst_histogram(bursts: np.ndarray) -> dict[str, int]:
+    lengths, counts = np.unique(bursts, return_counts=True)
+    return {str(length): int(count) for length, count in zip(lengths.tolist(), counts.tolist())}
+
+def analyze_counters(values: np.ndarray, valid: np.ndarray, packet_count: int = 0) -> dict:
+    """
+    Loss statistics of one counter stream. Counters 0 to packet_count - 1
+    are expected, or up to the highest one received if packet_count is 0.
+    `missed` is the figure validate.py used to print.
+    """
+    lines = len(values)
+    counters = values[valid]
+
+    # The counter of the last valid line at or before each line
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(lines), -1)) if lines else np.empty(0, dtype=np.int64)
+    previous = np.where(last_valid >= 0, values[np.maximum(last_valid, 0)], -1)
+
+    # validate.py stopped once the last counter reached packet_count - 1, and
+    # its per-line differences telescope to last + 1 - valid lines + bad lines
+    processed = lines
+    if packet_count > 0:
+        done = np.flatnonzero(previous >= packet_count - 1)
+        if len(done):
+            processed = int(done[0]) + 1
+    valid_processed = int(np.count_nonzero(valid[:processed]))
+    last = int(previous[processed - 1]) if processed else -1
+    missed = last + 1 - valid_processed + (processed - valid_processed)
+
+    expected = packet_count if packet_count > 0 else (int(counters.max()) + 1 if len(counters) else 0)
+    in_range = counters[(counters >= 0) & (counters < expected)]
+    unique = np.unique(in_range)
+
+    # Runs of missing counters between the ones received, including both ends
+    bounds = np.concatenate(([-1], unique, [expected]))
+    gaps = np.diff(bounds) - 1
+    bursts = gaps[gaps > 0]
+
+    lost = expected - len(unique)
+    return {
+        'lines': lines,
+        'parse_errors': lines - len(counters),
+        'expected': expected,
+        'received': len(unique),
+        'lost': lost,
+        'loss': lost / expected if expected else 0.0,
+        'duplicates': len(in_range) - len(unique),
+        'reordered': int(np.count_nonzero(np.diff(counters) < 0)),
+        'out_of_range': len(counters) - len(in_range),
+        'max_burst': int(bursts.max()) if len(bursts) else 0,
+        'missed': missed,
+        'bursts': burst_histogram(bursts),
+    }
+
+def analyze_file(path: str, packet_count: int = 0) -> dict:
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError as e:
+        return {'file': path, 'error': str(e)}
+
+    result = {'file': path}
+    result.update(analyze_counters(*parse_counters(data), packet_count))
+    return result
+
+def aggregate(results: list[dict]) -> dict:
+    total = {'files': len(results), 'failed_files': 0}
+    keys = ['lines', 'parse_errors', 'expected', 'received', 'lost', 'duplicates', 'reordered', 'out_of_range', 'missed']
+    for key in keys:
+        total[key] = 0
+    bursts: dict[int, int] = {}
+    max_burst = 0
+
+    for result in results:
+        if 'error' in result:
+            total['failed_files'] += 1
+            continue
+        for key in keys:
+            total[key] += result[key]
+        for length, count in result['bursts'].items():
+            bursts[int(length)] = bursts.get(int(length), 0) + count
+        max_burst = max(max_burst, result['max_burst'])
+
+    total['loss'] = total['lost'] / total['expected'] if total['expected'] else 0.0
+    total['max_burst'] = max_burst
+    total['bursts'] = {str(length): bursts[length] for length in sorted(bursts)}
+    return total
+
+def natural_key(path: str):
+    # elrs_2 before elrs_10
+    name = os.path.basename(path)
+    stem = name.rstrip('0123456789')
+    return (stem, int(name[len(stem):]) if len(stem) < len(name) else -1, name)
+
+def collect_files(paths: list[str], pattern: str) -> list[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(str(file) for file in Path(path).glob(pattern) if file.is_file())
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f'Analyze Results: \'{path}\' does not exist, skipping it.', file=sys.stderr)
+    return sorted(files, key=natural_key)
+
+def analyze_files(files: list[str], packet_count: int = 0, workers: int = 0) -> list[dict]:
+    if workers == 1 or len(files) < 2:
+        return [analyze_file(file, packet_count) for file in files]
+
+    workers = workers or os.cpu_count() or 1
+    # Large chunks, since most result files parse in well under a millisecond
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze_file, files, [packet_count] * len(files), chunksize=chunksize))
+
+def csv_row(name: str, result: dict) -> dict:
+    row = {key: result.get(key, '') for key in CSV_FIELDS}
+    row['file'] = name
+    if 'bursts' in result:
+        row['bursts'] = ';'.join(f'{length}:{count}' for length, count in result['bursts'].items())
+    return row
+
+def write_report(results: list[dict], total: dict, out, fmt: str):
+    if fmt == 'json':
+        json.dump({'files': results, 'total': total}, out, indent=2)
+        out.write('\n')
+    else:
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(csv_row(result['file'], result))
+        writer.writerow(csv_row('TOTAL', total))
+
+class CounterTail:
+    """
+    Follows one result file while blocks_file_sink appends to it. Each
+    poll() reads only the bytes added since the last one, keeps a partial
+    last line for the next poll, and updates a bitmap of the counters seen.
+    A file that shrinks was restarted, so its statistics start over.
+    """
+    def __init__(self, path: str, packet_count: int = 0, window: int = 100):
+        self.path = path
+        self.packet_count = packet_count
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.partial = b''
+        self.seen = np.zeros(max(self.packet_count, 1024), dtype=bool)
+        self.highest = -1
+        self.received = 0
+        self.parse_errors = 0
+        self.duplicates = 0
+
+    def done(self) -> bool:
+        return self.packet_count > 0 and self.highest >= self.packet_count - 1
+
+    def read_new(self) -> bytes:
+        try:
+            size = os.stat(self.path).st_size
+        except OSError:
+            return b''
+        if size < self.offset:
+            self.reset()
+        if size == self.offset:
+            return b''
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(size - self.offset)
+        self.offset += len(data)
+        return data
+
+    def poll(self) -> dict:
+        data = self.partial + self.read_new()
+        # Hold back an unfinished line, and a trailing \r that may start a \r\n
+        cut = max(data.rfind(b'\n'), data.rfind(b'\r', 0, len(data) - 1)) + 1
+        complete, self.partial = data[:cut], data[cut:]
+        values, valid = parse_counters(complete)
+
+        previous = self.highest
+        self.parse_errors += int(np.count_nonzero(~valid))
+        counters = values[valid]
+        if self.packet_count > 0:
+            counters = counters[counters < self.packet_count]
+        if len(counters):
+            if counters.max() >= len(self.seen):
+                self.seen = np.resize(self.seen, 2 * int(counters.max()) + 1)
+                self.seen[self.highest + 1:] = False
+            unique = np.unique(counters)
+            new = unique[~self.seen[unique]]
+            self.duplicates += len(counters) - len(new)
+            self.seen[new] = True
+            self.received += len(new)
+            self.highest = max(self.highest, int(unique[-1]))
+
+        # Counters covered since the last poll, and the newest `window` ones
+        span = self.highest - previous
+        interval_received = int(np.count_nonzero(self.seen[previous + 1:self.highest + 1])) if span > 0 else 0
+        window_start = max(self.highest + 1 - self.window, 0)
+        window_span = self.highest + 1 - window_start
+        window_received = int(np.count_nonzero(self.seen[window_start:self.highest + 1]))
+        # Length of the most recent run of missing counters
+        missing = np.flatnonzero(~self.seen[:self.highest + 1])
+        last_burst = 0
+        if len(missing):
+            end = int(missing[-1])
+            before = np.flatnonzero(self.seen[:end])
+            last_burst = end - (int(before[-1]) + 1 if len(before) else 0) + 1
+
+        lost = self.highest + 1 - self.received
+        window_per = 1.0 - window_received / window_span if window_span > 0 else 0.0
+        return {
+            'file': self.path,
+            'time': time.time(),
+            'highest': self.highest,
+            'received': self.received,
+            'lost': lost,
+            'per': lost / (self.highest + 1) if self.highest >= 0 else 0.0,
+            'interval_per': 1.0 - interval_received / span if span > 0 else None,
+            'window_per': window_per,
+            'link_quality': 100.0 * (1.0 - window_per),
+            'last_burst': last_burst,
+            'duplicates': self.duplicates,
+            'parse_errors': self.parse_errors,
+            'done': self.done(),
+        }
+
+def follow(paths: list[str], pattern: str, packet_count: int, window: int, interval: float,
+           abort_per: float, min_packets: int, fmt: str, out) -> int:
+    """
+    Polls the result files every `interval` seconds until all of them reach
+    packet_count, printing one update per file. Returns 2 as soon as a file's
+    rolling PER exceeds abort_per after min_packets counters, so a clearly
+    failed run can be stopped early, else 0.
+    """
+    tails: dict[str, CounterTail] = {}
+    try:
+        while True:
+            # Directories are rescanned, so files the flowgraph creates later are picked up
+            for path in paths:
+                files = [str(file) for file in Path(path).glob(pattern) if file.is_file()] if os.path.isdir(path) else [path]
+                for file in files:
+                    if file not in tails:
+                        tails[file] = CounterTail(file, packet_count, window)
+
+            for file in sorted(tails, key=natural_key):
+                tail = tails[file]
+                if tail.done():
+                    continue
+                update = tail.poll()
+                if fmt == 'json':
+                    out.write(json.dumps(update) + '\n')
+                else:
+                    interval_per = '-' if update['interval_per'] is None else f'{100 * update["interval_per"]:5.1f} %'
+                    out.write(f'{file}: {update["highest"] + 1} counters, {update["lost"]} lost ({100 * update["per"]:.2f} %), '
+                              f'since last poll {interval_per}, last {window} {100 * update["window_per"]:5.1f} %, '
+                              f'last burst {update["last_burst"]}, {update["parse_errors"]} parse errors\n')
+                out.flush()
+
+                if abort_per >= 0 and update['highest'] + 1 >= min_packets and update['window_per'] > abort_per:
+                    print(f'Analyze Results: \'{file}\' rolling PER {100 * update["window_per"]:.1f} % '
+                          f'is above {100 * abort_per:.1f} %, aborting.', file=sys.stderr)
+                    return 2
+
+            if tails and all(tail.done() for tail in tails.values()):
+                return 0
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Loss statistics of ELRS result counter files.')
+    parser.add_argument('paths', nargs='*', default=[DEFAULT_DIRECTORY], help='result files or directories')
+    parser.add_argument('-n', '--packet-count', type=int, default=DEFAULT_PACKET_COUNT,
+                        help='counters expected per file, 0 to use the highest one received')
+    parser.add_argument('-p', '--pattern', default='*', help='file name pattern inside directories')
+    parser.add_argument('-j', '--workers', type=int, default=0, help='worker processes, 0 for one per CPU')
+    parser.add_argument('-f', '--format', choices=['json', 'csv'], default=None,
+                        help='report format, json by default, or JSON lines instead of text when following')
+    parser.add_argument('-o', '--output', default='-', help='report file, - for stdout')
+    parser.add_argument('-F', '--follow', action='store_true',
+                        help='tail files still being written and print rolling statistics')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between updates when following')
+    parser.add_argument('--window', type=int, default=100, help='counters in the rolling PER window when following')
+    parser.add_argument('--abort-per', type=float, default=-1.0,
+                        help='exit with status 2 once the rolling PER exceeds this fraction, when following')
+    parser.add_argument('--min-packets', type=int, default=200, help='counters needed before --abort-per applies')
+    args = parser.parse_args(argv)
+
+    if args.follow:
+        # Following prints text updates unless JSON lines were asked for explicitly
+        fmt = 'json' if args.format == 'json' else 'text'
+        if args.output == '-':
+            return follow(args.paths, args.pattern, args.packet_count, args.window, args.interval,
+                          args.abort_per, args.min_packets, fmt, sys.stdout)
+        with open(args.output, 'w', encoding='utf-8') as out:
+            return follow(args.paths, args.pattern, args.packet_count, args.window, args.interval,
+                          args.abort_per, args.min_packets, fmt, out)
+
+    fmt = args.format or 'json'
+    files = collect_files(args.paths, args.pattern)
+    results = analyze_files(files, args.packet_count, args.workers)
+    total = aggregate(results)
+
+    if args.output == '-':
+        write_report(results, total, sys.stdout, fmt)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            write_report(results, total, out, fmt)
+
+    print(f'Analyze Results: {total["files"]} files, {total["lost"]} of {total["expected"]} packets lost '
+          f'({100 * total["loss"]:.2f} %), {total["parse_errors"]} parse errors.', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
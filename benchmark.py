@@ -0,0 +1,240 @@
+import gc
+import io
+import os
+import sys
+import json
+import time
+import ctypes
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import numpy as np
+from pathlib import Path
+from typing import Callable
+from gr_shim import load_backend
+
+# Micro-benchmarks of the Python hot paths behind the packet rate: FHSS
+# sequence generation, CRC, OTA_Packet4_s framing and the message handlers
+# of the data gen, fhss_controller and counter_formatter blocks. Runs on
+# real GNU Radio when it is installed, else on the pmt/gr stand-in in
+# gr_shim.py, so any Linux box can run it. Behaviour is checked by the
+# tests in tests/, this only measures.
+
+FLOWGRAPH_DIR = Path(__file__).resolve().parent / 'elrs_flowgraphs'
+DEFAULT_OUTPUT = 'bench_output.json'
+
+def measure(fn: Callable[[], object], min_time: float, repeats: int) -> dict:
+    # Calibrate the loop count to roughly min_time, then keep the best repeat
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10:
+            break
+        loops *= 2
+    loops = max(1, int(loops * min_time / elapsed))
+
+    best = float('inf')
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            best = min(best, (time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Peak bytes allocated during one call, and memory blocks still held
+    # afterwards averaged over many calls, where a leak would show up
+    tracemalloc.start()
+    fn()
+    before_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    retained_calls = min(loops, 10000)
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(retained_calls):
+        fn()
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / retained_calls
+
+    return {
+        'ops_per_sec': 1.0 / best if best > 0 else float('inf'),
+        'ns_per_op': best * 1e9,
+        'loops': loops,
+        'repeats': repeats,
+        'peak_alloc_bytes_per_call': max(peak - before_current, 0),
+        'retained_blocks_per_call': retained,
+    }
+
+def make_payload_file(directory: str, count: int) -> str:
+    path = os.path.join(directory, 'bench_payloads.txt')
+    payloads = np.random.default_rng(0).integers(0, 256, (count, 6), dtype=np.uint8)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(row.tobytes().hex() for row in payloads) + '\n')
+    return path
+
+def build_cases(payload_path: str, cleanups: list) -> list[tuple[str, Callable[[], Callable[[], object]]]]:
+    import elrs_fhss
+    from elrs_crc import Crc2Byte
+    from elrs_transmitter_epy_block_0 import fhss_controller
+    from elrs_transmitter_epy_block_1 import counter_formatter
+    from elrs_transmitter_flowgraph_epy_block_2 import OTA_Packet4_s, elrs_transmitter_data_gen
+    from elrs_receiver_epy_block_2 import elrs_receiver_data_gen
+
+    binding_phrase = 'DefaultBindingPhrase'
+    seed = elrs_fhss.fhss_seed(binding_phrase)
+    payload = bytes(range(1, 7))
+
+    def fhss_sequence():
+        return lambda: elrs_fhss.build_random_fhss_sequence(seed, 40)
+
+    def fhss_handle_msg():
+        block = fhss_controller(binding_phrase=binding_phrase, freq_start=903.5e6, freq_stop=926.9e6, freq_count=40, freq_center=915e6)
+        return lambda: block.handle_msg(None)
+
+    def hop_lookup():
+        index = elrs_fhss.get_hop_index(binding_phrase, 903.5e6, 926.9e6, 40)
+        observed = index.channels[10:10 + index.order].tolist()
+        return lambda: index.lookup(observed)
+
+    def crc_calc():
+        crc = Crc2Byte(16, 0x3D65)
+        return lambda: crc.calc(payload, 0x1234)
+
+    def crc_seeded():
+        crc_fn = Crc2Byte(16, 0x3D65).seeded(0x1234)
+        return lambda: crc_fn(payload)
+
+    def crc_batch():
+        crc = Crc2Byte(16, 0x3D65)
+        batch = np.random.default_rng(1).integers(0, 256, (4096, 6), dtype=np.uint8)
+        return lambda: crc.calc_batch(batch, 0x1234)
+
+    def ota_pack():
+        def pack():
+            backing_buffer = bytearray(ctypes.sizeof(OTA_Packet4_s))
+            ota_packet = OTA_Packet4_s.from_buffer(backing_buffer)
+            ota_packet.crcHigh = 0x2A
+            ota_packet.crcLow = 0x55
+            ota_packet.payload[:] = payload
+            return backing_buffer
+        return pack
+
+    def ota_unpack():
+        frame = bytes(8)
+        def unpack():
+            ota = OTA_Packet4_s.from_buffer(bytearray(frame))
+            return bytes(ota.payload), (ota.crcHigh << 8) | ota.crcLow
+        return unpack
+
+    def tx_handle_msg(loop: bool):
+        def setup():
+            block = elrs_transmitter_data_gen(bindingPhrase=binding_phrase, filepath=payload_path, loopFile=loop)
+            block.start()
+            cleanups.append(block.stop)
+            if loop:
+                return lambda: block.handle_msg(None)
+            # Restart the stream whenever it runs dry, the restart is part of the timed cost
+            def handle():
+                if block.done:
+                    block.stop()
+                    block.start()
+                block.handle_msg(None)
+            return handle
+        return setup
+
+    def rx_handle_msg():
+        tx = elrs_transmitter_data_gen(bindingPhrase=binding_phrase, filepath=payload_path, loopFile=True)
+        tx.start()
+        frames = tx.render_frames(tx.packet_datas)
+        rx = elrs_receiver_data_gen(bindingPhrase=binding_phrase, filepath=payload_path, statsPeriod=0)
+        rx.start()
+        cleanups.append(rx.stop)
+        position = [0]
+        def handle():
+            rx.handle_msg(frames[position[0]])
+            position[0] = (position[0] + 1) % len(frames)
+        return handle
+
+    def counter_handle_msg():
+        block = counter_formatter(packet_count=1 << 62)
+        return lambda: block.handle_msg(None)
+
+    return [
+        ('elrs_fhss.build_random_fhss_sequence', fhss_sequence),
+        ('fhss_controller.handle_msg', fhss_handle_msg),
+        ('HopIndex.lookup', hop_lookup),
+        ('Crc2Byte.calc', crc_calc),
+        ('Crc2Byte.seeded', crc_seeded),
+        ('Crc2Byte.calc_batch[4096]', crc_batch),
+        ('OTA_Packet4_s.pack', ota_pack),
+        ('OTA_Packet4_s.unpack', ota_unpack),
+        ('elrs_transmitter_data_gen.handle_msg[loop]', tx_handle_msg(True)),
+        ('elrs_transmitter_data_gen.handle_msg[stream]', tx_handle_msg(False)),
+        ('elrs_receiver_data_gen.handle_msg', rx_handle_msg),
+        ('counter_formatter.handle_msg', counter_handle_msg),
+    ]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the ELRS flowgraph hot paths.')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help='JSON results file')
+    parser.add_argument('-k', '--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timed repeat')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--payloads', type=int, default=5000, help='records in the generated payload file')
+    parser.add_argument('--shim', action='store_true', help='use the pmt/gr stand-in even if GNU Radio is installed')
+    args = parser.parse_args(argv)
+
+    backend = load_backend(args.shim)
+    sys.path.insert(0, str(FLOWGRAPH_DIR))
+
+    results = {}
+    cleanups = []
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep the snapshot cache of a benchmark run away from the real one.
+        # elrs_snapshot reads this once on import, so set it before any
+        # flowgraph module is loaded.
+        os.environ['ELRS_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshots')
+
+        payload_path = make_payload_file(directory, args.payloads)
+
+        for name, setup in build_cases(payload_path, cleanups):
+            if args.filter not in name:
+                continue
+            # The receiver's log writer prints summaries, keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn = setup()
+                result = measure(fn, args.min_time, args.repeats)
+                while cleanups:
+                    cleanups.pop()()
+            results[name] = result
+            print(f'{name:48s} {result["ops_per_sec"]:14,.0f} ops/s {result["ns_per_op"]:12,.0f} ns/op '
+                  f'{result["peak_alloc_bytes_per_call"]:8d} B peak {result["retained_blocks_per_call"]:8.2f} blocks kept')
+
+    report = {
+        'backend': backend,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'time': time.time(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f'Benchmark: Wrote {len(results)} results to \'{args.output}\'.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: COTS ELRS Capture (headless)
+# GNU Radio version: 3.10.1.1
+
+# Same Pluto source as cot_elrs_capture.py, without PyQt, qtgui or the
+# waterfall sink. The samples go to a raw complex file instead, or are
+# discarded when no output path is given. With a binding phrase, only the
+# predicted channel around each predicted packet is kept, downconverted and
+# decimated, as per-packet records (see elrs_capture.read_capture). A raw
+# complex file can stand in for the Pluto with --input-path. With --sigmf,
+# the whole band is recorded as a SigMF dataset instead, optionally only
+# the bursts that rise --trigger dB above the noise floor.
+
+import time
+import pmt
+from gnuradio import blocks
+from gnuradio import gr
+import sys
+import signal
+from argparse import ArgumentParser
+from gnuradio.eng_arg import eng_float, intx
+from gnuradio import eng_notation
+from gnuradio import iio
+from elrs_capture import predictive_capture
+from elrs_nco import xlating_decimator
+from elrs_resampler import multistage_resampler, plan_resampler
+from elrs_sigmf import sigmf_sink
+
+
+
+
+class cot_elrs_capture_headless(gr.top_block):
+
+    def __init__(self, uri='ip:192.168.2.1', freq=915000000, samp_rate=61440000, gain=64, gain_mode='slow_attack',
+                 buffer_size=32768, output_path='', input_path='', binding_phrase='', freq_start=903500000,
+                 freq_stop=926900000, freq_count=40, bandwidth=125e3, packet_period=0.02, packet_len=0.005, sigmf=False,
+                 trigger=0.0, pre_roll=0.001, post_roll=0.002):
+        gr.top_block.__init__(self, "COTS ELRS Capture (headless)", catch_exceptions=True)
+
+        ##################################################
+        # Parameters
+        ##################################################
+        self.uri = uri
+        self.freq = freq
+        self.samp_rate = samp_rate
+        self.gain = gain
+        self.gain_mode = gain_mode
+        self.buffer_size = buffer_size
+        self.output_path = output_path
+        self.input_path = input_path
+        self.binding_phrase = binding_phrase
+        self.freq_start = freq_start
+        self.freq_stop = freq_stop
+        self.freq_count = freq_count
+        self.bandwidth = bandwidth
+        self.packet_period = packet_period
+        self.packet_len = packet_len
+        self.sigmf = sigmf
+        self.trigger = trigger
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.narrow_decim = narrow_decim = max(int(samp_rate // (bandwidth * 2)), 1)
+        self.resampler_plan = resampler_plan = plan_resampler(1, narrow_decim, samp_rate, 0.4) if narrow_decim > 1 else None
+
+        ##################################################
+        # Blocks
+        ##################################################
+        if input_path:
+            self.iio_pluto_source_0 = None
+            self.blocks_file_source_0 = blocks.file_source(gr.sizeof_gr_complex*1, input_path, False, 0, 0)
+            self.blocks_file_source_0.set_begin_tag(pmt.PMT_NIL)
+            source = self.blocks_file_source_0
+        else:
+            self.iio_pluto_source_0 = iio.fmcomms2_source_fc32(uri if uri else iio.get_pluto_uri(), [True, True], buffer_size)
+            self.iio_pluto_source_0.set_len_tag_key('packet_len')
+            self.iio_pluto_source_0.set_frequency(int(freq))
+            self.iio_pluto_source_0.set_samplerate(int(samp_rate))
+            self.iio_pluto_source_0.set_gain_mode(0, gain_mode)
+            self.iio_pluto_source_0.set_gain(0, gain)
+            self.iio_pluto_source_0.set_quadrature(True)
+            self.iio_pluto_source_0.set_rfdc(False)
+            self.iio_pluto_source_0.set_bbdc(True)
+            self.iio_pluto_source_0.set_filter_params('Auto', '', 0, 0)
+            source = self.iio_pluto_source_0
+
+        if binding_phrase and resampler_plan is not None:
+            self.xlating_decimator_0 = xlating_decimator(decim=resampler_plan.stages[0].decim, taps=resampler_plan.stages[0].taps, samp_rate=samp_rate, freq=0.0)
+            self.multistage_resampler_0 = multistage_resampler(
+                    plan=resampler_plan,
+                    first_stage=1)
+            self.predictive_capture_0 = predictive_capture(binding_phrase=binding_phrase, freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq,
+                                                           samp_rate=samp_rate / narrow_decim, decim=narrow_decim, packet_period=packet_period, packet_len=packet_len, output_path=output_path)
+        elif output_path and sigmf:
+            self.blocks_sink_0 = sigmf_sink(path=output_path, samp_rate=samp_rate, center_freq=freq, description='COTS ELRS capture',
+                                            hw='PlutoSDR' if not input_path else '', trigger=trigger, pre_roll=pre_roll, post_roll=post_roll)
+        elif output_path:
+            self.blocks_sink_0 = blocks.file_sink(gr.sizeof_gr_complex*1, output_path, False)
+            self.blocks_sink_0.set_unbuffered(False)
+        else:
+            self.blocks_sink_0 = blocks.null_sink(gr.sizeof_gr_complex*1)
+
+
+        ##################################################
+        # Connections
+        ##################################################
+        if binding_phrase and resampler_plan is not None:
+            self.msg_connect((self.predictive_capture_0, 'hop'), (self.xlating_decimator_0, 'hop'))
+            self.connect((source, 0), (self.xlating_decimator_0, 0))
+            self.connect((self.xlating_decimator_0, 0), (self.multistage_resampler_0, 0))
+            self.connect((self.multistage_resampler_0, 0), (self.predictive_capture_0, 0))
+        else:
+            self.connect((source, 0), (self.blocks_sink_0, 0))
+
+
+    def get_freq(self):
+        return self.freq
+
+    def set_freq(self, freq):
+        self.freq = freq
+        if self.iio_pluto_source_0 is not None:
+            self.iio_pluto_source_0.set_frequency(int(self.freq))
+
+    def get_samp_rate(self):
+        return self.samp_rate
+
+    def set_samp_rate(self, samp_rate):
+        self.samp_rate = samp_rate
+        if self.iio_pluto_source_0 is not None:
+            self.iio_pluto_source_0.set_samplerate(int(self.samp_rate))
+
+    def get_gain(self):
+        return self.gain
+
+    def set_gain(self, gain):
+        self.gain = gain
+        if self.iio_pluto_source_0 is not None:
+            self.iio_pluto_source_0.set_gain(0, self.gain)
+
+
+
+def argument_parser():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--uri", dest="uri", type=str, default='ip:192.168.2.1',
+        help="Set Pluto URI, empty picks the first one found [default=%(default)r]")
+    parser.add_argument(
+        "--freq", dest="freq", type=eng_float, default=eng_notation.num_to_str(float(915000000)),
+        help="Set center frequency [default=%(default)r]")
+    parser.add_argument(
+        "--samp-rate", dest="samp_rate", type=eng_float, default=eng_notation.num_to_str(float(61440000)),
+        help="Set sample rate [default=%(default)r]")
+    parser.add_argument(
+        "--gain", dest="gain", type=eng_float, default=eng_notation.num_to_str(float(64)),
+        help="Set gain in dB, only used with the manual gain mode [default=%(default)r]")
+    parser.add_argument(
+        "--gain-mode", dest="gain_mode", type=str, default='slow_attack',
+        choices=['manual', 'slow_attack', 'fast_attack', 'hybrid'],
+        help="Set gain mode [default=%(default)r]")
+    parser.add_argument(
+        "--buffer-size", dest="buffer_size", type=intx, default=32768,
+        help="Set samples per IIO buffer [default=%(default)r]")
+    parser.add_argument(
+        "-o", "--output-path", dest="output_path", type=str, default='',
+        help="Set output file, raw complex64 or per-packet records with a binding phrase, empty discards the samples [default=%(default)r]")
+    parser.add_argument(
+        "--input-path", dest="input_path", type=str, default='',
+        help="Set raw complex64 file to read instead of the Pluto, empty uses the Pluto [default=%(default)r]")
+    parser.add_argument(
+        "--binding-phrase", dest="binding_phrase", type=str, default='',
+        help="Set binding phrase of the link to follow, empty keeps the whole band [default=%(default)r]")
+    parser.add_argument(
+        "--freq-start", dest="freq_start", type=eng_float, default=eng_notation.num_to_str(float(903500000)),
+        help="Set lowest FHSS channel frequency [default=%(default)r]")
+    parser.add_argument(
+        "--freq-stop", dest="freq_stop", type=eng_float, default=eng_notation.num_to_str(float(926900000)),
+        help="Set highest FHSS channel frequency [default=%(default)r]")
+    parser.add_argument(
+        "--freq-count", dest="freq_count", type=intx, default=40,
+        help="Set FHSS channel count [default=%(default)r]")
+    parser.add_argument(
+        "--bandwidth", dest="bandwidth", type=eng_float, default=eng_notation.num_to_str(float(125e3)),
+        help="Set LoRa bandwidth, the kept channel is sampled at about twice this [default=%(default)r]")
+    parser.add_argument(
+        "--packet-period", dest="packet_period", type=eng_float, default=0.02,
+        help="Set seconds between packets [default=%(default)r]")
+    parser.add_argument(
+        "--packet-len", dest="packet_len", type=eng_float, default=0.005,
+        help="Set seconds kept per packet, plus a millisecond either side [default=%(default)r]")
+    parser.add_argument(
+        "--sigmf", dest="sigmf", action='store_true',
+        help="Record the whole band as a SigMF dataset instead of raw complex64")
+    parser.add_argument(
+        "--trigger", dest="trigger", type=eng_float, default=0.0,
+        help="Set dB above the noise floor that starts a SigMF burst, 0 records everything [default=%(default)r]")
+    parser.add_argument(
+        "--pre-roll", dest="pre_roll", type=eng_float, default=0.001,
+        help="Set seconds kept before each SigMF burst [default=%(default)r]")
+    parser.add_argument(
+        "--post-roll", dest="post_roll", type=eng_float, default=0.002,
+        help="Set seconds of quiet that end a SigMF burst [default=%(default)r]")
+    parser.add_argument(
+        "--duration", dest="duration", type=eng_float, default=0.0,
+        help="Set seconds to capture, 0 runs until interrupted [default=%(default)r]")
+    return parser
+
+
+def main(top_block_cls=cot_elrs_capture_headless, options=None):
+    if options is None:
+        options = argument_parser().parse_args()
+    tb = top_block_cls(uri=options.uri, freq=options.freq, samp_rate=options.samp_rate, gain=options.gain,
+                       gain_mode=options.gain_mode, buffer_size=options.buffer_size, output_path=options.output_path,
+                       input_path=options.input_path, binding_phrase=options.binding_phrase, freq_start=options.freq_start,
+                       freq_stop=options.freq_stop, freq_count=options.freq_count, bandwidth=options.bandwidth,
+                       packet_period=options.packet_period, packet_len=options.packet_len, sigmf=options.sigmf,
+                       trigger=options.trigger, pre_roll=options.pre_roll, post_roll=options.post_roll)
+
+    def sig_handler(sig=None, frame=None):
+        tb.stop()
+        tb.wait()
+
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, sig_handler)
+    signal.signal(signal.SIGTERM, sig_handler)
+
+    tb.start()
+
+    if options.duration > 0:
+        time.sleep(options.duration)
+        tb.stop()
+    tb.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+import pmt
+import struct
+import numpy as np
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple, Optional
+from gnuradio import gr
+from elrs_fhss import get_fhss_sequence
+
+# Per-packet IQ capture file. File layout:
+#   header | N x (record header | count x complex64)
+CAPTURE_MAGIC = b'ELRSCAPT'
+CAPTURE_VERSION = 1
+CAPTURE_HEADER = struct.Struct('<8sIdd')    # magic, version, sample rate, capture center frequency
+CAPTURE_RECORD = struct.Struct('<QdHHII')   # first sample index, channel frequency, hop position, channel, flags, sample count
+FLAG_BURST = 0x01
+
+class CaptureRecord(NamedTuple):
+    start: int           # index of the first sample in the narrowband stream
+    freq: float          # absolute channel frequency
+    position: int        # position in the hop sequence
+    channel: int
+    flags: int
+    samples: np.ndarray  # complex64, read-only view into the file
+
+def read_capture(path: Path) -> tuple[float, float, list[CaptureRecord]]:
+    """
+    Returns the sample rate, the capture center frequency and every whole
+    record of a capture file, with the samples mapped rather than read.
+    """
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    magic, version, samp_rate, freq_center = CAPTURE_HEADER.unpack_from(data, 0)
+    if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+        raise ValueError(f'\'{path}\' is not a version {CAPTURE_VERSION} capture file.')
+
+    records = []
+    offset = CAPTURE_HEADER.size
+    while offset + CAPTURE_RECORD.size <= len(data):
+        start, freq, position, channel, flags, count = CAPTURE_RECORD.unpack_from(data, offset)
+        offset += CAPTURE_RECORD.size
+        # Whole records only, in case the writer was stopped mid-write
+        if offset + count * 8 > len(data):
+            break
+        samples = data[offset:offset + count * 8].view(np.complex64)
+        records.append(CaptureRecord(start, freq, position, channel, flags, samples))
+        offset += count * 8
+    return samp_rate, freq_center, records
+
+class predictive_capture(gr.sync_block):
+    """
+    Follows an ELRS link with a known binding phrase through its hop
+    sequence and keeps only the samples around each predicted packet. The
+    input is the narrowband output of an xlating_decimator, `decim` input
+    samples per output sample, whose "hop" port is driven from this block's
+    "hop" port with hops scheduled by sample index, `lookahead` packets
+    ahead so the buffers between the two never make a hop late.
+
+    To acquire, the decimator is parked on the sync channel that starts every
+    block of freq_count hops and waits for a burst. The burst is taken to be
+    the start of one of those blocks, and every predicted packet after it
+    gets a window of `packet_len` plus `guard` on either side. After
+    `max_misses` windows in a row without a burst, the block is taken to be
+    the wrong one and the next is tried at the following burst on the sync
+    channel. Bursts are blocks of a quarter millisecond `threshold` dB above
+    the noise floor, and each one found nudges the predicted timing.
+
+    Every window is appended to `output_path` as one record, see
+    read_capture().
+    """
+    def __init__(self, binding_phrase='', freq_start=0.0, freq_stop=0.0, freq_count=1, freq_center=0.0,
+                 samp_rate=1.0, decim=1.0, packet_period=0.02, packet_len=0.005, guard=0.001,
+                 threshold=10.0, lookahead=16, max_misses=4, output_path=''):
+        gr.sync_block.__init__(self,
+            name='Predictive Capture',
+            in_sig=[np.complex64],
+            out_sig=None)
+
+        sequence = get_fhss_sequence(binding_phrase, freq_start, freq_stop, freq_count)
+        self.channels = sequence.channels
+        self.frequencies = sequence.frequencies
+        self.freq_count = max(freq_count, 1)
+        self.blocks = max(len(self.channels) // self.freq_count, 1)
+        self.freq_center = freq_center
+        self.samp_rate = samp_rate
+        self.decim = decim
+
+        self.packet_samples = packet_period * samp_rate
+        self.guard_len = int(guard * samp_rate)
+        self.window_len = int(packet_len * samp_rate) + 2 * self.guard_len
+        self.block_len = max(int(samp_rate * 2.5e-4), 1)
+        # A burst must last a millisecond, so the splatter of a packet
+        # starting or ending on another channel is not taken for one
+        self.burst_blocks = 4
+        self.threshold = 10 ** (threshold / 10)
+        self.lookahead = lookahead
+        self.max_misses = max_misses
+        self.output_path = output_path
+        self.file = None
+
+        self.noise_floor: Optional[float] = None
+        self.tracking = False
+        self.candidate_block = 0      # block guessed for the burst at `reference`
+        self.reference: Optional[float] = None
+        self.anchor = 0.0             # sample index of the packet at anchor_position
+        self.anchor_position = 0
+        self.scheduled = 0            # packets after the anchor with a hop scheduled
+        self.misses = 0
+        self.holdoff = 0              # acquisition ignores samples before this one
+        self.run = 0                  # blocks above the threshold so far, and where they started
+        self.run_start = 0
+        self.windows: deque = deque() # (start, packet) of every scheduled window
+        self.window = np.zeros(self.window_len, dtype=np.complex64)
+
+        self.window_count = 0
+        self.burst_count = 0
+
+        self.hop_port = pmt.intern("hop")
+        self.message_port_register_out(self.hop_port)
+
+    def channel_offset(self, position) -> float:
+        return float(self.frequencies[position % len(self.channels)]) - self.freq_center
+
+    def start(self) -> bool:
+        if self.output_path:
+            try:
+                self.file = open(self.output_path, 'wb')
+                self.file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, self.samp_rate, self.freq_center))
+            except OSError as e:
+                print(f'Predictive Capture: Failed to open \'{self.output_path}\'.\n', e)
+                return False
+        self.unlock()
+        return True
+
+    def stop(self) -> bool:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        print(f'Predictive Capture: {self.burst_count} of {self.window_count} windows held a burst.')
+        return True
+
+    def lock(self, index):
+        # The sync channel comes round once a block, so the guess for the
+        # first burst seen carries over to every later one
+        if self.reference is None:
+            self.reference = float(index)
+        visits = int(round((index - self.reference) / (self.freq_count * self.packet_samples)))
+        self.tracking = True
+        self.anchor = float(index)
+        self.anchor_position = ((self.candidate_block + visits) % self.blocks) * self.freq_count
+        self.scheduled = 0
+        self.misses = 0
+        for _ in range(self.lookahead):
+            self.schedule()
+
+    def unlock(self, index=0):
+        # Park on the sync channel, dropping whatever is still scheduled. The
+        # samples already on their way were taken on the old channel, so
+        # give them a packet period to drain before looking for bursts.
+        self.tracking = False
+        self.holdoff = index + int(self.packet_samples)
+        self.run = 0
+        self.windows.clear()
+        msg = pmt.make_dict()
+        msg = pmt.dict_add(msg, pmt.intern("cancel"), pmt.PMT_T)
+        msg = pmt.dict_add(msg, pmt.intern("freq"), pmt.from_double(self.channel_offset(0)))
+        self.message_port_pub(self.hop_port, msg)
+
+    def schedule(self):
+        self.scheduled += 1
+        packet = self.scheduled
+        start = int(round(self.anchor + packet * self.packet_samples)) - self.guard_len
+        self.windows.append((start, packet))
+
+        msg = pmt.make_dict()
+        msg = pmt.dict_add(msg, pmt.intern("freq"), pmt.from_double(self.channel_offset(self.anchor_position + packet)))
+        msg = pmt.dict_add(msg, pmt.intern("time"), pmt.from_uint64(max(int(start * self.decim), 0)))
+        self.message_port_pub(self.hop_port, msg)
+
+    def block_powers(self, samples) -> np.ndarray:
+        blocks = len(samples) // self.block_len
+        power = (samples[:blocks * self.block_len].real ** 2 + samples[:blocks * self.block_len].imag ** 2)
+        return power.reshape(blocks, self.block_len).mean(axis=1)
+
+    def acquire(self, samples, first) -> int:
+        # Index just past the first burst, or len(samples) without one
+        if first < self.holdoff:
+            return min(self.holdoff - first, len(samples))
+        powers = self.block_powers(samples)
+        for i, power in enumerate(powers):
+            if self.noise_floor is None:
+                self.noise_floor = power
+            elif power > self.noise_floor * self.threshold:
+                if self.run == 0:
+                    self.run_start = first + i * self.block_len
+                self.run += 1
+                if self.run >= self.burst_blocks:
+                    self.run = 0
+                    self.lock(self.run_start)
+                    return (i + 1) * self.block_len
+            else:
+                self.run = 0
+                self.noise_floor = 0.99 * self.noise_floor + 0.01 * power
+        return len(samples)
+
+    def burst_start(self, powers) -> int:
+        # First block of the first long enough run above the threshold, or -1
+        if self.noise_floor is None or len(powers) < self.burst_blocks:
+            return -1
+        above = (powers > self.noise_floor * self.threshold).astype(np.int32)
+        runs = np.convolve(above, np.ones(self.burst_blocks, dtype=np.int32), 'valid')
+        full = np.flatnonzero(runs == self.burst_blocks)
+        return int(full[0]) if len(full) else -1
+
+    def finish_window(self, start, packet):
+        powers = self.block_powers(self.window)
+        position = (self.anchor_position + packet) % len(self.channels)
+        found = self.burst_start(powers)
+        burst = found >= 0
+
+        self.window_count += 1
+        if burst:
+            self.burst_count += 1
+            self.misses = 0
+            # Move the prediction part of the way towards the burst seen
+            found = start + found * self.block_len
+            self.anchor += 0.25 * (found - (self.anchor + packet * self.packet_samples))
+        else:
+            self.misses += 1
+            if len(powers):
+                self.noise_floor = 0.99 * self.noise_floor + 0.01 * float(powers.mean())
+
+        if self.file is not None:
+            self.file.write(CAPTURE_RECORD.pack(start, float(self.frequencies[position]), position,
+                                                int(self.channels[position]), FLAG_BURST if burst else 0, self.window_len))
+            self.file.write(self.window.tobytes())
+        self.window[:] = 0
+
+        if self.misses >= self.max_misses:
+            self.candidate_block = (self.candidate_block + 1) % self.blocks
+            self.unlock(start + self.window_len)
+        else:
+            self.schedule()
+
+    def work(self, input_items, output_items):
+        in0 = input_items[0]
+        n = len(in0)
+        first = self.nitems_read(0)
+
+        offset = 0
+        while offset < n:
+            if not self.tracking:
+                offset += self.acquire(in0[offset:], first + offset)
+                continue
+            start, packet = self.windows[0]
+            end = start + self.window_len
+            if end <= first + offset:
+                # Already past it, e.g. right after locking late in a long call
+                self.windows.popleft()
+                self.schedule()
+                continue
+            # Copy the part of the window in this call
+            lo, hi = max(start, first + offset), min(end, first + n)
+            if lo < hi:
+                self.window[lo - start:hi - start] = in0[lo - first:hi - first]
+            if end > first + n:
+                break
+            self.windows.popleft()
+            self.finish_window(start, packet)
+            offset = end - first
+
+        return n
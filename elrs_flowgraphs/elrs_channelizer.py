@@ -0,0 +1,199 @@
+import pmt
+import time
+import numpy as np
+from gnuradio import gr
+from elrs_synthesizer import prototype_taps
+
+class pfb_channelizer(gr.decim_block):
+    """
+    Splits one wideband stream into a narrowband stream per channel with a
+    2x oversampled polyphase analysis filterbank, the receive side of
+    pfb_synthesizer. Output i runs at 2 * samp_rate / fft_len and carries the
+    channel at freqs[i] + freq_offset, brought down to DC: the nearest of the
+    `fft_len` bins does the coarse translation and the rest of the offset,
+    at most half a bin, is mixed out at the output rate. Each output sample
+    costs one shared FFT and one prototype filter, whatever the number of
+    channels, where a mixer and decimating filter per channel would all run
+    at the wideband rate.
+    """
+    def __init__(self, samp_rate=1.0, freqs=[0.0], freq_offset=0.0, fft_len=128, taps_per_branch=18):
+        self.channels = len(freqs)
+        self.fft_len = fft_len
+        self.decim = fft_len // 2
+        gr.decim_block.__init__(self,
+            name='PFB Channelizer',
+            in_sig=[np.complex64],
+            out_sig=[np.complex64] * self.channels,
+            decim=self.decim)
+
+        self.samp_rate = samp_rate
+        self.freq_offset = freq_offset
+
+        # Unity gain at DC, reversed to line up with the input window
+        self.taps = (prototype_taps(fft_len, taps_per_branch) / (fft_len / 2))[::-1].astype(np.float32)
+        self.branches = self.taps.reshape(taps_per_branch, fft_len)
+        self.set_history(len(self.taps))
+        # exp(-j * 2pi * t / fft_len), indexed by (bin * sample index) % fft_len
+        self.twiddles = np.exp(-2j * np.pi * np.arange(fft_len) / fft_len).astype(np.complex64)
+
+        self.freqs = list(freqs)
+        self.bins = np.zeros(self.channels, dtype=np.intp)
+        self.residuals = np.zeros(self.channels)
+        self.phases = np.zeros(self.channels)
+        self.retune()
+
+    def retune(self):
+        # Nearest bin, and the remainder in cycles per output sample
+        position = (np.asarray(self.freqs, dtype=float) + self.freq_offset) / self.samp_rate * self.fft_len
+        bin_indices = np.round(position)
+        self.bins = bin_indices.astype(np.intp) % self.fft_len
+        self.residuals = (position - bin_indices) / 2
+
+    def set_frequencies(self, freqs):
+        self.freqs = list(freqs[:self.channels])
+        self.retune()
+
+    def set_sampling_freq(self, samp_rate):
+        self.samp_rate = samp_rate
+        self.retune()
+
+    def work(self, input_items, output_items):
+        n = len(output_items[0])
+        if n == 0:
+            return 0
+
+        # Row m of `rows` starts at input m * decim, and since fft_len is two
+        # decimations, branch q of output m is row m + 2q
+        rows = np.lib.stride_tricks.sliding_window_view(input_items[0], self.fft_len)[::self.decim]
+        folded = rows[:n] * self.branches[0]
+        for q in range(1, len(self.branches)):
+            folded += rows[2 * q:2 * q + n] * self.branches[q]
+        spectrum = np.fft.fft(folded, axis=1)[:, self.bins]
+
+        # The fold starts at absolute sample nitems_read - history + 1 + m * decim,
+        # which is the same as nitems_read + 1 + m * decim modulo fft_len
+        starts = self.nitems_read(0) + 1 + self.decim * np.arange(n, dtype=np.int64)
+        spectrum *= self.twiddles[np.outer(starts % self.fft_len, self.bins) % self.fft_len]
+
+        for i in range(self.channels):
+            # Fine tune by the residual, keeping the phase across calls
+            residual = 2 * np.pi * self.residuals[i]
+            phase = self.phases[i] + residual * np.arange(n)
+            output_items[i][:n] = spectrum[:, i] * np.exp(-1j * phase).astype(np.complex64)
+            self.phases[i] = (self.phases[i] + residual * n) % (2 * np.pi)
+
+        return n
+
+class channel_merger(gr.sync_block):
+    """
+    Merges the frames decoded on every channel of a channelized receiver
+    into one stream of PDUs, in arrival order. Frames come in on "ch0",
+    "ch1", ... and go out on "out" as (metadata, u8vector) pairs, with the
+    metadata holding the channel index, its frequency, the host time the
+    frame arrived and a running frame count.
+    """
+    def __init__(self, freqs=[0.0]):
+        gr.sync_block.__init__(self,
+            name='Channel Merger',
+            in_sig=None,
+            out_sig=None)
+
+        self.freqs = list(freqs)
+        self.frame_count = 0
+        self.out_port = pmt.intern("out")
+
+        self.message_port_register_out(self.out_port)
+        for channel in range(len(self.freqs)):
+            port = pmt.intern(f"ch{channel}")
+            self.message_port_register_in(port)
+            self.set_msg_handler(port, lambda msg, channel=channel: self.handle_msg(channel, msg))
+
+    def handle_msg(self, channel, msg):
+        # Handlers of one block never run concurrently, so the count needs no lock
+        if pmt.is_pair(msg):
+            msg = pmt.cdr(msg)
+        meta = pmt.make_dict()
+        meta = pmt.dict_add(meta, pmt.intern("channel"), pmt.from_long(channel))
+        meta = pmt.dict_add(meta, pmt.intern("freq"), pmt.from_double(self.freqs[channel]))
+        meta = pmt.dict_add(meta, pmt.intern("time"), pmt.from_double(time.time()))
+        meta = pmt.dict_add(meta, pmt.intern("count"), pmt.from_uint64(self.frame_count))
+        self.frame_count += 1
+        self.message_port_pub(self.out_port, pmt.cons(meta, msg))
+
+    def work(self, input_items, output_items):
+        return 0
+
+class channel_activity(gr.sync_block):
+    """
+    Watches the outputs of a pfb_channelizer for the start of bursts, and
+    publishes the index of every channel a burst starts on, in the order
+    the bursts start, on "out". Fed to the "sync" port of fhss_controller,
+    this lets a hopping receiver find its place in the hop sequence again
+    from the channels the transmitter is seen on.
+
+    Each channel is split into blocks of `block_time` seconds, and a burst
+    starts with a block `threshold` dB above that channel's noise floor
+    after at least `gap` seconds without one, so a packet counts once.
+    """
+    def __init__(self, samp_rate=1.0, channels=1, threshold=10.0, block_time=6.4e-5, gap=0.0005):
+        gr.sync_block.__init__(self,
+            name='Channel Activity',
+            in_sig=[np.complex64] * channels,
+            out_sig=None)
+
+        self.channels = channels
+        self.block_len = max(int(samp_rate * block_time), 1)
+        self.gap_blocks = max(-(-int(gap * samp_rate) // self.block_len), 1)
+        self.threshold = 10 ** (threshold / 10)
+        self.out_port = pmt.intern("out")
+        self.message_port_register_out(self.out_port)
+        self.set_output_multiple(self.block_len)
+        self.reset()
+
+    def reset(self):
+        self.noise_floors = np.full(self.channels, np.nan)
+        # Last loud block of every channel, relative to the first block of the next call
+        self.last_loud = np.full(self.channels, -self.gap_blocks - 1, dtype=np.int64)
+        self.onset_count = 0
+
+    def start(self) -> bool:
+        self.reset()
+        return True
+
+    def work(self, input_items, output_items):
+        blocks = len(input_items[0]) // self.block_len
+        if blocks == 0:
+            return 0
+        n = blocks * self.block_len
+
+        powers = np.empty((self.channels, blocks))
+        for i in range(self.channels):
+            samples = input_items[i][:n].reshape(blocks, self.block_len)
+            powers[i] = (samples.real ** 2 + samples.imag ** 2).mean(axis=1)
+        unset = np.isnan(self.noise_floors)
+        if unset.any():
+            self.noise_floors[unset] = np.median(powers[unset], axis=1)
+        loud = powers > self.noise_floors[:, None] * self.threshold
+
+        # Noise floors follow the quiet blocks, as in burst_gate
+        quiet_count = (~loud).sum(axis=1)
+        has_quiet = quiet_count > 0
+        quiet_mean = np.where(loud, 0.0, powers).sum(axis=1)[has_quiet] / quiet_count[has_quiet]
+        self.noise_floors[has_quiet] = 0.9 * self.noise_floors[has_quiet] + 0.1 * quiet_mean
+
+        onsets = []
+        for i in range(self.channels):
+            loud_blocks = np.flatnonzero(loud[i])
+            if len(loud_blocks) == 0:
+                self.last_loud[i] = max(self.last_loud[i] - blocks, -self.gap_blocks - 1)
+                continue
+            previous = np.concatenate([[self.last_loud[i]], loud_blocks[:-1]])
+            for block in loud_blocks[loud_blocks - previous > self.gap_blocks]:
+                onsets.append((int(block), i))
+            self.last_loud[i] = loud_blocks[-1] - blocks
+
+        # Channels in the order their bursts started, ties by channel index
+        for _, channel in sorted(onsets):
+            self.message_port_pub(self.out_port, pmt.from_long(channel))
+        self.onset_count += len(onsets)
+        return n
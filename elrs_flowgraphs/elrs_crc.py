@@ -0,0 +1,247 @@
+import time
+import struct
+import numpy as np
+from typing import Callable
+from elrs_snapshot import cached_array
+
+class Crc2Byte:
+    """
+    MSB-first CRC of 8 to 16 bits with several interchangeable strategies:
+      - table:          the classic 256-entry table, one byte per step
+      - table16:        a 65536-entry table, two bytes per step
+      - slicing:        slicing-by-N, N bytes per step through N tables
+      - folded_table16: table16 with the seed folded into the first lookup
+      - folded_slicing: slicing with the seed folded into the first tables
+    The wider strategies run on a 16-bit register with the CRC left-aligned,
+    so they cover every width. seeded() benchmarks them on the host and
+    returns the fastest one for a fixed seed such as ota_crc.
+    """
+    _CRCTAB_LEN = 256
+    _SLICES = 8
+    # Part of every snapshot key, bump it when a table generator changes
+    _SNAPSHOT_VERSION = 1
+    STRATEGIES = ('table', 'table16', 'slicing', 'folded_table16', 'folded_slicing')
+
+    def __init__(self, bits: int, poly: int):
+        if not (8 <= bits <= 16):
+            raise ValueError("CRC bit-width must be between 8 and 16.")
+
+        self.bits = bits
+        self.poly = poly
+        self.bitmask = (1 << self.bits) - 1
+
+        # Pre-compute the CRC lookup table, or reuse the one from the last launch
+        self.snapshot_group = f'{self.bits}/{self.poly:#x}'
+        self.crctab_array = cached_array('crc_table', (self._SNAPSHOT_VERSION, self.bits, self.poly),
+                                         lambda: np.array(self._generate_table(), dtype=np.uint16), self.snapshot_group)
+        self.crctab = self.crctab_array.tolist()
+        self.strategy = 'table'
+
+        # Left-aligned tables for the 16-bit register strategies, built lazily
+        self.align = 16 - self.bits
+        self.slice_tables: list[list[int]] = []
+        self.crctab16: list[int] = []
+        self.word_structs: dict[int, struct.Struct] = {}
+
+    def _generate_table(self) -> list[int]:
+        crctab = [0] * self._CRCTAB_LEN
+        highbit = 1 << (self.bits - 1)
+
+        for i in range(self._CRCTAB_LEN):
+            crc = i << (self.bits - 8)
+            for _ in range(8):
+                if crc & highbit:
+                    crc = (crc << 1) ^ self.poly
+                else:
+                    crc = crc << 1
+            crctab[i] = crc & self.bitmask
+        return crctab
+
+    def _generate_slice_tables(self) -> np.ndarray:
+        # Row k holds the register after a byte followed by k zero bytes
+        tables = np.empty((self._SLICES, self._CRCTAB_LEN), dtype=np.uint32)
+        tables[0] = self.crctab_array.astype(np.uint32) << np.uint32(self.align)
+        for k in range(1, self._SLICES):
+            prev = tables[k - 1]
+            tables[k] = ((prev << np.uint32(8)) & np.uint32(0xFFFF)) ^ tables[0][prev >> np.uint32(8)]
+        return tables.astype(np.uint16)
+
+    def _generate_table16(self) -> np.ndarray:
+        # Two steps of the byte table only depend on register ^ next word
+        aligned = self._load_slice_tables()[0].astype(np.uint32)
+        word = np.arange(1 << 16, dtype=np.uint32)
+        first = aligned[word >> np.uint32(8)]
+        table = ((first & np.uint32(0xFF)) << np.uint32(8)) ^ aligned[(word & np.uint32(0xFF)) ^ (first >> np.uint32(8))]
+        return table.astype(np.uint16)
+
+    def _load_slice_tables(self) -> np.ndarray:
+        return cached_array('crc_slice_tables', (self._SNAPSHOT_VERSION, self.bits, self.poly, self._SLICES),
+                            self._generate_slice_tables, self.snapshot_group)
+
+    def _prepare(self) -> None:
+        if not self.slice_tables:
+            self.slice_tables = self._load_slice_tables().tolist()
+            self.crctab16 = cached_array('crc_table16', (self._SNAPSHOT_VERSION, self.bits, self.poly),
+                                         self._generate_table16, self.snapshot_group).tolist()
+
+    def _words(self, length: int) -> struct.Struct:
+        word_struct = self.word_structs.get(length)
+        if word_struct is None:
+            word_struct = self.word_structs[length] = struct.Struct(f'>{length // 2}H')
+        return word_struct
+
+    def calc(self, data: bytes, initial_crc: int = 0) -> int:
+        crc = initial_crc
+
+        for byte in data:
+            lookup_index = ((crc >> (self.bits - 8)) ^ byte) & 0xFF
+            crc = (crc << 8) ^ self.crctab[lookup_index]
+
+        return crc & self.bitmask
+
+    def calc_table16(self, data: bytes, initial_crc: int = 0) -> int:
+        self._prepare()
+        table16 = self.crctab16
+        crc = (initial_crc & self.bitmask) << self.align
+
+        even = len(data) & ~1
+        for word in self._words(even).unpack_from(data):
+            crc = table16[crc ^ word]
+        if even != len(data):
+            crc = ((crc << 8) & 0xFFFF) ^ self.slice_tables[0][(crc >> 8) ^ data[-1]]
+
+        return crc >> self.align
+
+    def calc_slicing(self, data: bytes, initial_crc: int = 0) -> int:
+        self._prepare()
+        tables = self.slice_tables
+        crc = (initial_crc & self.bitmask) << self.align
+
+        pos = 0
+        while pos < len(data):
+            chunk = data[pos:pos + self._SLICES]
+            n = len(chunk)
+            if n == 1:
+                crc = ((crc << 8) & 0xFFFF) ^ tables[0][(crc >> 8) ^ chunk[0]]
+                break
+            # The register only overlaps the first two bytes of the chunk
+            crc = tables[n - 1][(crc >> 8) ^ chunk[0]] ^ tables[n - 2][(crc & 0xFF) ^ chunk[1]]
+            for k in range(2, n):
+                crc ^= tables[n - 1 - k][chunk[k]]
+            pos += n
+
+        return crc >> self.align
+
+    def folded_table16(self, initial_crc: int, length: int) -> Callable[[bytes], int]:
+        self._prepare()
+        seed = (initial_crc & self.bitmask) << self.align
+        table16 = self.crctab16
+        first = np.asarray(table16, dtype=np.uint16)[np.arange(1 << 16) ^ seed].tolist()
+        words = self._words(length)
+        aligned = self.slice_tables[0]
+        align = self.align
+
+        def calc(data: bytes) -> int:
+            if len(data) != length or length < 2:
+                return self.calc_table16(data, initial_crc)
+            first_word, *rest = words.unpack_from(data)
+            crc = first[first_word]
+            for word in rest:
+                crc = table16[crc ^ word]
+            if length & 1:
+                crc = ((crc << 8) & 0xFFFF) ^ aligned[(crc >> 8) ^ data[-1]]
+            return crc >> align
+
+        return calc
+
+    def folded_slicing(self, initial_crc: int, length: int) -> Callable[[bytes], int]:
+        self._prepare()
+        seed = (initial_crc & self.bitmask) << self.align
+        n = min(length, self._SLICES)
+        tables = self.slice_tables
+        if n < 2:
+            return lambda data: self.calc_slicing(data, initial_crc)
+
+        # The seed only touches the first two lookups, so fold it into them
+        first = [tables[n - 1][(seed >> 8) ^ byte] for byte in range(self._CRCTAB_LEN)]
+        second = [tables[n - 2][(seed & 0xFF) ^ byte] for byte in range(self._CRCTAB_LEN)]
+        rest = [tables[n - 1 - k] for k in range(2, n)]
+        align = self.align
+
+        def calc(data: bytes) -> int:
+            if len(data) != n:
+                return self.calc_slicing(data, initial_crc)
+            crc = first[data[0]] ^ second[data[1]]
+            for table, byte in zip(rest, data[2:]):
+                crc ^= table[byte]
+            return crc >> align
+
+        return calc
+
+    def seeded(self, initial_crc: int = 0, strategy: str = 'auto', length: int = 6) -> Callable[[bytes], int]:
+        """
+        Returns a calc(data) function for a fixed seed. With 'auto' every
+        strategy is checked against calc() and timed on random payloads of
+        `length` bytes, and the fastest one is kept in self.strategy.
+        """
+        candidates = {
+            'table': lambda data: self.calc(data, initial_crc),
+            'table16': lambda data: self.calc_table16(data, initial_crc),
+            'slicing': lambda data: self.calc_slicing(data, initial_crc),
+        }
+        if strategy in ('auto', 'folded_table16'):
+            candidates['folded_table16'] = self.folded_table16(initial_crc, length)
+        if strategy in ('auto', 'folded_slicing'):
+            candidates['folded_slicing'] = self.folded_slicing(initial_crc, length)
+
+        if strategy != 'auto':
+            if strategy not in candidates:
+                raise ValueError(f"Unknown CRC strategy '{strategy}', expected one of {self.STRATEGIES}.")
+            self.strategy = strategy
+            return candidates[strategy]
+
+        samples = [bytes(row) for row in np.random.default_rng(0).integers(0, 256, (64, length), dtype=np.uint8)]
+        expected = [self.calc(sample, initial_crc) for sample in samples]
+
+        best_time = None
+        for name, calc in candidates.items():
+            if [calc(sample) for sample in samples] != expected:
+                print(f'Crc2Byte: Strategy \'{name}\' disagrees with the table CRC, skipping it.')
+                continue
+            # Best of a few short runs, to keep startup cheap and noise low
+            elapsed = min(self._time(calc, samples) for _ in range(3))
+            if best_time is None or elapsed < best_time:
+                best_time = elapsed
+                self.strategy = name
+
+        return candidates[self.strategy]
+
+    @staticmethod
+    def _time(calc: Callable[[bytes], int], samples: list[bytes]) -> float:
+        start = time.perf_counter()
+        for _ in range(8):
+            for sample in samples:
+                calc(sample)
+        return time.perf_counter() - start
+
+    def calc_batch(self, data: np.ndarray, initial_crc=0) -> np.ndarray:
+        """
+        CRC of every row of an (N, L) uint8 array, bit-identical to calling
+        calc() on each row. `initial_crc` is a scalar or one seed per row.
+        The rows are processed together, one byte column at a time.
+        """
+        data = np.asarray(data, dtype=np.uint8)
+        if data.ndim != 2:
+            raise ValueError("Batched CRC input must be an (N, L) array.")
+
+        shift = np.uint32(self.bits - 8)
+        crc = np.empty(data.shape[0], dtype=np.uint32)
+        crc[:] = np.asarray(initial_crc, dtype=np.uint32) & np.uint32(self.bitmask)
+
+        for column in data.T:
+            lookup_index = ((crc >> shift) ^ column) & np.uint32(0xFF)
+            # Bits above the CRC width never reach the lookup index, so
+            # masking every step gives the same result as masking once
+            crc = ((crc << np.uint32(8)) ^ self.crctab_array[lookup_index]) & np.uint32(self.bitmask)
+
+        return crc.astype(np.uint16)
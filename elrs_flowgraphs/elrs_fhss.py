@@ -0,0 +1,188 @@
+import numpy as np
+from hashlib import md5
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from elrs_snapshot import cached_array
+
+FHSS_SEQUENCE_LEN = 256
+OTA_VERSION_ID = 6
+# Part of every snapshot key, bump it when build_random_fhss_sequence changes
+FHSS_SNAPSHOT_VERSION = 1
+
+# ELRS uses the MSVC rand() LCG: seed = (0x343FD * seed + 0x269EC3) % 2^31
+_RNG_MUL = 0x343FD
+_RNG_INC = 0x269EC3
+_RNG_MOD = 0x80000000
+
+class FHSSSequence(NamedTuple):
+    channels: np.ndarray     # channel index for every hop, read-only
+    frequencies: np.ndarray  # absolute channel frequency for every hop, read-only
+    freq_spread: float
+
+def fhss_seed(binding_phrase: str, ota_version: int = OTA_VERSION_ID) -> int:
+    uid_bytes = md5(binding_phrase.encode()).digest()[0:6]
+    return (uid_bytes[2] << 24) | (uid_bytes[3] << 16) | (uid_bytes[4] << 8) | (uid_bytes[5] ^ ota_version)
+
+@lru_cache(maxsize=None)
+def _rng_jump_table(count: int) -> tuple[np.ndarray, np.ndarray]:
+    # Step k of the LCG from any seed is (mul[k] * seed + inc[k]) % 2^31
+    mul = np.empty(count, dtype=np.uint64)
+    inc = np.empty(count, dtype=np.uint64)
+    m, c = 1, 0
+    for k in range(count):
+        m = (m * _RNG_MUL) % _RNG_MOD
+        c = (c * _RNG_MUL + _RNG_INC) % _RNG_MOD
+        mul[k] = m
+        inc[k] = c
+    return mul, inc
+
+def elrs_rng_stream(seed: int, count: int) -> np.ndarray:
+    """
+    Returns the next `count` outputs of elrs_rng() starting from `seed`,
+    computed in one vectorized jump-ahead step per output.
+    """
+    mul, inc = _rng_jump_table(count)
+    # Both factors stay below 2^31, so the product fits in 64 bits
+    states = (mul * np.uint64(seed % _RNG_MOD) + inc) % np.uint64(_RNG_MOD)
+    return states >> np.uint64(16)
+
+def num_primary_bands(freq_count: int, sequence_len: int = FHSS_SEQUENCE_LEN) -> int:
+    if freq_count > 0:
+        return (sequence_len // freq_count) * freq_count
+    return 0
+
+def build_random_fhss_sequence(seed: int, freq_count: int, sequence_len: int = FHSS_SEQUENCE_LEN) -> np.ndarray:
+    primary_bands = num_primary_bands(freq_count, sequence_len)
+    if freq_count < 2:
+        return np.zeros(primary_bands, dtype=np.int64)
+
+    # Every block of freq_count hops starts as 0..freq_count-1, then each
+    # position after the first is swapped with a random one in the same block.
+    block_count = primary_bands // freq_count
+    rand = elrs_rng_stream(seed, block_count * (freq_count - 1)) % np.uint64(freq_count - 1)
+    rand = rand.astype(np.intp).reshape(block_count, freq_count - 1) + 1
+
+    if block_count >= freq_count:
+        # Blocks never touch each other, so shuffle them all together one
+        # column at a time when there are more blocks than columns.
+        base = np.arange(0, primary_bands, freq_count)
+        swap = base[:, None] + rand
+        sequence = np.tile(np.arange(freq_count, dtype=np.int64), block_count)
+        for i in range(1, freq_count):
+            current, other = base + i, swap[:, i - 1]
+            sequence[current], sequence[other] = sequence[other], sequence[current]
+        return sequence
+
+    sequence = list(range(freq_count)) * block_count
+    swap = rand.tolist()
+    for block, offset in enumerate(range(0, primary_bands, freq_count)):
+        for i in range(1, freq_count):
+            other = offset + swap[block][i - 1]
+            sequence[offset + i], sequence[other] = sequence[other], sequence[offset + i]
+    return np.array(sequence, dtype=np.int64)
+
+@lru_cache(maxsize=None)
+def fhss_channels(seed: int, freq_count: int) -> np.ndarray:
+    # Backed by the on-disk snapshot cache, so restarts skip the build entirely
+    return cached_array('fhss_channels', (FHSS_SNAPSHOT_VERSION, seed, freq_count, FHSS_SEQUENCE_LEN),
+                        lambda: build_random_fhss_sequence(seed, freq_count), group=f'{seed}/{freq_count}')
+
+def fhss_freq_spread(freq_start: float, freq_stop: float, freq_count: int) -> float:
+    if freq_count > 1:
+        return abs(freq_stop - freq_start) // (freq_count - 1)
+    return 0
+
+def channel_frequencies(freq_start: float, freq_stop: float, freq_count: int) -> np.ndarray:
+    # Every channel the hop sequences can land on, in channel index order
+    return freq_start + np.arange(freq_count) * fhss_freq_spread(freq_start, freq_stop, freq_count)
+
+@lru_cache(maxsize=None)
+def get_fhss_sequence(binding_phrase: str, freq_start: float, freq_stop: float, freq_count: int,
+                      ota_version: int = OTA_VERSION_ID) -> FHSSSequence:
+    """
+    Memoized hop sequence shared by every fhss_controller with the same
+    parameters. The returned arrays are read-only, so never modify them.
+    """
+    freq_spread = fhss_freq_spread(freq_start, freq_stop, freq_count)
+    channels = fhss_channels(fhss_seed(binding_phrase, ota_version), freq_count)
+    frequencies = freq_start + channels * freq_spread
+    frequencies.setflags(write=False)
+
+    return FHSSSequence(channels, frequencies, freq_spread)
+
+class HopIndex:
+    """
+    Finds the position in a cyclic hop sequence from the channels of a few
+    consecutive hops, in O(1). For every run length k up to `order` there is
+    a dense table indexed by the run's channels read as a base freq_count
+    number, holding the sequence position of the run's last hop, or
+    _ABSENT / _AMBIGUOUS. A lookup tries the shortest runs first, so one
+    hop is enough wherever its channel is unique in the sequence.
+    """
+    _ABSENT = -1
+    _AMBIGUOUS = -2
+    # Tables above this many entries are not built, which caps `order`
+    _MAX_TABLE_LEN = 1 << 22
+
+    def __init__(self, channels: np.ndarray, freq_count: int, order: int = 4):
+        self.channels = np.asarray(channels, dtype=np.int64)
+        self.freq_count = max(freq_count, 1)
+        self.period = len(self.channels)
+
+        self.tables: list[np.ndarray] = []
+        self.resync_hops: Optional[int] = None  # shortest run that always identifies the position
+        keys = np.zeros(self.period, dtype=np.int64)
+        for k in range(1, order + 1):
+            if self.freq_count ** k > self._MAX_TABLE_LEN or k > self.period:
+                break
+            # Key of the run of k hops ending at every position, wrapping around the sequence
+            keys = keys + np.roll(self.channels, k - 1) * self.freq_count ** (k - 1)
+            table = np.full(self.freq_count ** k, self._ABSENT, dtype=np.int32)
+            table[keys] = np.arange(self.period, dtype=np.int32)
+            counts = np.bincount(keys, minlength=len(table))
+            table[counts > 1] = self._AMBIGUOUS
+            self.tables.append(table)
+            if self.resync_hops is None and counts.max(initial=0) <= 1:
+                self.resync_hops = k
+        self.order = len(self.tables)
+
+    def lookup(self, observed) -> Optional[int]:
+        """
+        Sequence position of the last of the `observed` channels, oldest
+        first, or None while they match no position or several.
+        """
+        key = 0
+        for k in range(1, min(len(observed), self.order) + 1):
+            channel = int(observed[-k])
+            if not 0 <= channel < self.freq_count:
+                return None
+            key += channel * self.freq_count ** (k - 1)
+            position = int(self.tables[k - 1][key])
+            if position == self._ABSENT:
+                return None
+            if position != self._AMBIGUOUS:
+                return position
+        return None
+
+    def matched_hops(self, observed) -> int:
+        """
+        Length of the longest run ending at the last of the `observed`
+        channels that occurs anywhere in the sequence. Anything older is
+        not from the same stretch of hops, e.g. because a hop was missed.
+        """
+        key = 0
+        for k in range(1, min(len(observed), self.order) + 1):
+            channel = int(observed[-k])
+            if not 0 <= channel < self.freq_count:
+                return k - 1
+            key += channel * self.freq_count ** (k - 1)
+            if self.tables[k - 1][key] == self._ABSENT:
+                return k - 1
+        return min(len(observed), self.order)
+
+@lru_cache(maxsize=None)
+def get_hop_index(binding_phrase: str, freq_start: float, freq_stop: float, freq_count: int, order: int = 4,
+                  ota_version: int = OTA_VERSION_ID) -> HopIndex:
+    # Positions are indices into get_fhss_sequence(...).channels
+    sequence = get_fhss_sequence(binding_phrase, freq_start, freq_stop, freq_count, ota_version)
+    return HopIndex(sequence.channels, freq_count, order)
@@ -0,0 +1,157 @@
+import pmt
+import numpy as np
+from gnuradio import gr
+
+class burst_gate(gr.basic_block):
+    """
+    Passes only the bursts in a narrowband stream, so the LoRa demodulator
+    after it works per packet rather than per sample: the gaps between ELRS
+    packets, and the zero padding the transmitter puts after every frame,
+    are dropped before they reach it.
+
+    The input is split into blocks of `block_time` seconds, and a block
+    `threshold` dB above the noise floor is loud. Every block from
+    `pre_roll` seconds before a loud block to `post_roll` seconds after it
+    is passed on, whole and in order, and the first block of each burst is
+    tagged "burst" with the index of its first input sample. Bursts closer
+    than the two margins come out as one.
+
+    Input that does not fill a block is held until the rest of the block
+    arrives. Whatever is still held when the flowgraph stops is less than
+    one block; it is dropped, but still counted as input in the figures
+    stop() prints.
+
+    Packets that never rise `threshold` dB above the noise are dropped too,
+    which LoRa would otherwise decode, so weak links want a low threshold.
+    With `threshold` at 0 every sample is passed.
+    """
+    def __init__(self, samp_rate=1.0, threshold=6.0, pre_roll=0.001, post_roll=0.002, block_time=6.4e-5):
+        gr.basic_block.__init__(self,
+            name='Burst Gate',
+            in_sig=[np.complex64],
+            out_sig=[np.complex64])
+
+        self.block_len = max(int(samp_rate * block_time), 1)
+        self.pre_blocks = -(-int(pre_roll * samp_rate) // self.block_len)
+        self.post_blocks = -(-int(post_roll * samp_rate) // self.block_len)
+        self.threshold = 10 ** (threshold / 10) if threshold > 0 else 0.0
+        # Blocks whose fate still depends on what comes next
+        self.history_len = max(self.pre_blocks, self.post_blocks)
+        # Keep window of a loud block, as a convolution over block indices
+        self.window = np.ones(self.pre_blocks + self.post_blocks + 1, dtype=np.int32)
+
+        # Room for the pre-roll of the previous call on top of a block of this one
+        self.set_output_multiple((self.pre_blocks + 1) * self.block_len)
+        # Offsets change with every dropped span, so upstream tags would land on the wrong samples
+        self.set_tag_propagation_policy(gr.TPP_DONT)
+        self.burst_key = pmt.intern("burst")
+        self.reset()
+
+    def reset(self):
+        h = self.history_len
+        self.noise_floor = None
+        self.loud_history = np.zeros(h, dtype=bool)
+        # Blocks before the first one count as passed, so nothing is made up
+        self.passed_history = np.ones(h, dtype=bool)
+        self.kept_history = np.zeros(h, dtype=bool)
+        self.before_kept = False
+        self.history = np.zeros((self.pre_blocks, self.block_len), dtype=np.complex64)
+        self.partial = np.zeros(0, dtype=np.complex64)
+        self.samples_in = 0
+        self.samples_out = 0
+        self.burst_count = 0
+
+    def start(self) -> bool:
+        self.reset()
+        return True
+
+    def stop(self) -> bool:
+        if self.threshold and self.samples_in:
+            # The held tail counts as input, so the figure covers every sample read
+            tail = f', dropped the last {len(self.partial)} samples as they fill no block' if len(self.partial) else ''
+            print(f'Burst Gate: passed {100 * self.samples_out / self.samples_in:.1f}% of the samples in {self.burst_count} bursts{tail}.')
+        return True
+
+    def forecast(self, noutput_items, ninputs):
+        # Any input will do, a partial block is held back until the rest arrives
+        return [1] * ninputs
+
+    def general_work(self, input_items, output_items):
+        in0 = input_items[0]
+        out = output_items[0]
+        if not self.threshold:
+            n = min(len(in0), len(out))
+            out[:n] = in0[:n]
+            self.consume(0, n)
+            return n
+
+        held = len(self.partial)
+        available = (held + len(in0)) // self.block_len
+        blocks = min(available, len(out) // self.block_len - self.pre_blocks)
+        if available == 0:
+            self.partial = np.concatenate([self.partial, in0])
+            self.samples_in += len(in0)
+            self.consume(0, len(in0))
+            return 0
+        if blocks <= 0:
+            return 0
+        n = blocks * self.block_len
+        if held:
+            current = np.concatenate([self.partial, in0[:n - held]]).reshape(blocks, self.block_len)
+        else:
+            current = in0[:n].reshape(blocks, self.block_len)
+
+        powers = (current.real ** 2 + current.imag ** 2).mean(axis=1)
+        if self.noise_floor is None:
+            self.noise_floor = float(np.median(powers))
+        loud = powers > self.noise_floor * self.threshold
+        if not loud.all():
+            self.noise_floor = 0.9 * self.noise_floor + 0.1 * float(powers[~loud].mean())
+
+        # Block i of the history plus this call is kept if a block in
+        # [i - post_blocks, i + pre_blocks] is loud. A history block that was
+        # not passed yet can only be kept now by the pre-roll of a new one.
+        h = self.history_len
+        loud = np.concatenate([self.loud_history, loud])
+        keep = np.convolve(loud, self.window)[self.pre_blocks:self.pre_blocks + len(loud)] > 0
+        passed = np.concatenate([self.passed_history, np.zeros(blocks, dtype=bool)])
+        emit = keep & ~passed
+        kept = keep | np.concatenate([self.kept_history, np.zeros(blocks, dtype=bool)])
+
+        from_history = np.flatnonzero(emit[h - self.pre_blocks:h])
+        from_current = np.flatnonzero(emit[h:])
+        produced = (len(from_history) + len(from_current)) * self.block_len
+        out_blocks = out[:produced].reshape(-1, self.block_len)
+        out_blocks[:len(from_history)] = self.history[from_history]
+        out_blocks[len(from_history):] = current[from_current]
+
+        # Tag the first block of every burst
+        starts = emit & ~np.concatenate([[self.before_kept], kept[:-1]])
+        positions = np.cumsum(emit) - 1
+        first_read = self.nitems_read(0) - held - h * self.block_len
+        for i in np.flatnonzero(starts):
+            self.add_item_tag(0, self.nitems_written(0) + int(positions[i]) * self.block_len,
+                              self.burst_key, pmt.from_uint64(first_read + int(i) * self.block_len))
+        self.burst_count += int(starts.sum())
+
+        total = len(loud)
+        self.loud_history = loud[total - h:]
+        self.passed_history = (keep | passed)[total - h:]
+        self.kept_history = kept[total - h:]
+        self.before_kept = bool(kept[total - h - 1])
+        if blocks >= self.pre_blocks:
+            self.history = current[blocks - self.pre_blocks:].copy()
+        else:
+            self.history = np.concatenate([self.history, current])[blocks:]
+
+        # Input short of a block after the last whole one is held for the next call
+        used = n - held
+        if blocks == available:
+            self.partial = in0[used:].copy()
+            used = len(in0)
+        else:
+            self.partial = self.partial[:0]
+        self.samples_in += used
+        self.samples_out += produced
+        self.consume(0, used)
+        return produced
@@ -0,0 +1,116 @@
+import pmt
+import threading
+import numpy as np
+from typing import Optional
+
+# Sequence numbers remembered for duplicate and reorder detection
+TRACKER_WINDOW = 1024
+
+class LinkTracker:
+    """
+    Running link statistics for a receiver that knows the transmitted payload
+    sequence. Every received payload arrives as its index in the payload
+    file, is unwrapped across file loops and is then checked against a ring
+    holding the last `window` sequence numbers:
+      - newer than anything seen: received, any gap before it counts as lost
+      - inside the window but not seen yet: late, moved from lost to reordered,
+        or when older than the first packet, counted as reordered with the
+        start of the run moved back to it
+      - inside the window and seen already: duplicate
+      - older than the window: stale, too old to tell which it is
+    Packets failing the CRC and payloads missing from the file are counted
+    on their own. All state is fixed size, however long the run.
+    """
+    def __init__(self, sequence_len: int, window: int = TRACKER_WINDOW):
+        self.sequence_len = sequence_len
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.seen = np.full(self.window, -1, dtype=np.int64)
+            self.first = -1
+            self.highest = -1
+            self.received = 0
+            self.lost = 0
+            self.duplicate = 0
+            self.reordered = 0
+            self.stale = 0
+            self.crc_failed = 0
+            self.unknown = 0
+
+    def unwrap(self, index: int) -> int:
+        if self.highest < 0 or self.sequence_len <= 0:
+            return index
+        # Pick the pass over the file that lands closest to the newest packet
+        n = self.sequence_len
+        return index + n * ((self.highest - index + n // 2) // n)
+
+    def update(self, index: Optional[int], crc_ok: bool = True):
+        with self.lock:
+            if not crc_ok:
+                self.crc_failed += 1
+                return
+            if index is None:
+                self.unknown += 1
+                return
+
+            seq = self.unwrap(index)
+            slot = seq % self.window
+            if seq > self.highest:
+                if self.highest >= 0:
+                    self.lost += seq - self.highest - 1
+                else:
+                    self.first = seq
+                self.highest = seq
+                self.received += 1
+                self.seen[slot] = seq
+            elif seq <= self.highest - self.window:
+                self.stale += 1
+            elif seq < self.first:
+                # Late, but from before the first packet, so no loss was
+                # counted for it: move the start back and count the new gap
+                self.lost += self.first - seq - 1
+                self.first = seq
+                self.seen[slot] = seq
+                self.received += 1
+                self.reordered += 1
+            elif self.seen[slot] == seq:
+                self.duplicate += 1
+            else:
+                self.seen[slot] = seq
+                self.received += 1
+                self.reordered += 1
+                self.lost -= 1
+
+    def summary(self) -> dict:
+        with self.lock:
+            if self.highest >= 0:
+                # Loss over the newest `window` sequence numbers only
+                span = min(self.window, self.highest - self.first + 1)
+                recent = int(np.count_nonzero(self.seen > self.highest - span))
+                window_loss = 1.0 - recent / span
+            else:
+                window_loss = 0.0
+
+            expected = self.received + self.lost
+            return {
+                'received': self.received,
+                'lost': self.lost,
+                'duplicate': self.duplicate,
+                'reordered': self.reordered,
+                'stale': self.stale,
+                'crc_failed': self.crc_failed,
+                'unknown': self.unknown,
+                'highest': self.highest,
+                'loss': self.lost / expected if expected else 0.0,
+                'window_loss': window_loss,
+            }
+
+    def summary_pmt(self):
+        msg = pmt.make_dict()
+        for key, value in self.summary().items():
+            value = pmt.from_double(value) if isinstance(value, float) else pmt.from_long(value)
+            msg = pmt.dict_add(msg, pmt.intern(key), value)
+        return msg
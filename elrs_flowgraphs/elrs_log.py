@@ -0,0 +1,121 @@
+import time
+import struct
+import threading
+import numpy as np
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+
+# One received packet: arrival time, received CRC, computed CRC, flags, payload
+PACKET_RECORD = struct.Struct('<dHHB6s')
+PACKET_RECORD_DTYPE = np.dtype([('time', '<f8'), ('recv_crc', '<u2'), ('data_crc', '<u2'),
+                                ('flags', 'u1'), ('payload', 'u1', (6,))])
+FLAG_CRC_OK = 0x01
+
+# Records held before the oldest are dropped, if the writer falls behind
+LOG_QUEUE_LEN = 1 << 16
+
+class AsyncLogWriter:
+    """
+    Keeps logging off the GNU Radio message thread. The hot path only packs
+    a fixed-size binary record and appends it to a deque, which is safe
+    without a lock for one producer and one consumer. A background thread
+    drains it every `flush_interval` seconds into the binary log at `path`,
+    if one is given, and prints a console summary at most once every
+    `console_period` seconds, along with any queued text messages.
+    """
+    def __init__(self, name: str, path: str = '', flush_interval: float = 0.1, console_period: float = 1.0):
+        self.name = name
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self.console_period = console_period
+
+        self.records: deque = deque(maxlen=LOG_QUEUE_LEN)
+        self.messages: deque = deque(maxlen=LOG_QUEUE_LEN)
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.window_packets = 0
+        self.window_crc_failed = 0
+        self.window_messages: list[str] = []
+        self.last_payload = b''
+        self.last_console = 0.0
+
+    def record(self, recv_crc: int, data_crc: int, crc_ok: bool, payload: bytes):
+        self.records.append(PACKET_RECORD.pack(time.time(), recv_crc, data_crc, FLAG_CRC_OK if crc_ok else 0, payload))
+
+    def message(self, text: str):
+        self.messages.append(text)
+
+    def start(self):
+        self.stop_event.clear()
+        self.last_console = time.monotonic()
+        self.thread = threading.Thread(target=self.run, name=f'{self.name} log writer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        file = None
+        if self.path is not None:
+            try:
+                file = open(self.path, 'ab')
+            except OSError as e:
+                print(f'{self.name}: Failed to open log file \'{self.path}\'.\n', e)
+
+        try:
+            while not self.stop_event.wait(self.flush_interval):
+                self.flush(file)
+            # Write out whatever arrived before stop()
+            self.flush(file)
+            self.print_summary()
+        finally:
+            if file is not None:
+                file.close()
+
+    def flush(self, file):
+        records = []
+        while self.records:
+            records.append(self.records.popleft())
+        while self.messages:
+            self.window_messages.append(self.messages.popleft())
+
+        if records:
+            data = b''.join(records)
+            if file is not None:
+                file.write(data)
+                file.flush()
+
+            flags = np.frombuffer(data, dtype=PACKET_RECORD_DTYPE)['flags']
+            self.window_packets += len(records)
+            self.window_crc_failed += int(np.count_nonzero((flags & FLAG_CRC_OK) == 0))
+            self.last_payload = records[-1][-6:]
+
+        if time.monotonic() - self.last_console >= self.console_period:
+            self.print_summary()
+
+    def print_summary(self):
+        now = time.monotonic()
+        elapsed = now - self.last_console
+        self.last_console = now
+
+        if self.window_packets:
+            print(f'{self.name}: {self.window_packets} packets ({self.window_crc_failed} failed CRC) '
+                  f'in the last {elapsed:.1f} s, last payload {self.last_payload.hex()}')
+        # Repeated messages are folded, so a flood of errors costs one line
+        for text, count in Counter(self.window_messages).items():
+            print(f'{self.name}: {text}' + (f' (x{count})' if count > 1 else ''))
+
+        self.window_packets = 0
+        self.window_crc_failed = 0
+        self.window_messages.clear()
+
+def read_packet_log(path: Path) -> np.ndarray:
+    # Whole records only, in case the writer was stopped mid-write
+    data = np.fromfile(path, dtype=np.uint8)
+    usable = len(data) - len(data) % PACKET_RECORD.size
+    return data[:usable].view(PACKET_RECORD_DTYPE)
@@ -0,0 +1,253 @@
+import pmt
+import heapq
+import threading
+import numpy as np
+from collections import deque
+from gnuradio import gr
+
+class hop_queue:
+    """
+    Hop bookkeeping shared by the blocks retuned through a "hop" message
+    port. The block calls init_hops() from its constructor and collect_hops()
+    from work(), which returns (input offset, freq) pairs in sample order.
+    """
+    def init_hops(self, freq_offset=0.0, emitter=0, trigger_tag='', freq_tag='freq'):
+        self.freq_offset = freq_offset
+        self.emitter = emitter
+        self.trigger_tag = trigger_tag
+        self.freq_tag = freq_tag
+        self.hop_keys = [pmt.intern("freq"), pmt.intern("time"), pmt.intern("cancel")]
+
+        # Written from the message thread, read from work()
+        self.immediate: deque = deque()
+        self.triggered: deque = deque()
+        self.scheduled: list = []
+        self.schedule_count = 0
+        self.schedule_lock = threading.Lock()
+
+        self.message_port_register_in(pmt.intern("hop"))
+        self.set_msg_handler(pmt.intern("hop"), self.handle_msg)
+
+    def set_frequency(self, freq):
+        self.immediate.append(freq + self.freq_offset)
+
+    def to_freq(self, value) -> float:
+        freq = pmt.to_python(value)
+        if np.ndim(freq):
+            freq = freq[self.emitter]
+        return float(freq) + self.freq_offset
+
+    def is_hop_dict(self, msg) -> bool:
+        # libpmt dicts are association lists, so is_dict() holds for any pair
+        return pmt.is_dict(msg) and any(pmt.dict_has_key(msg, key) for key in self.hop_keys)
+
+    def handle_msg(self, msg):
+        if pmt.is_pair(msg) and pmt.is_symbol(pmt.car(msg)):
+            # A (key . freq) pair as sent by fhss_controller, checked first
+            # because it is a dict to libpmt too
+            freq = self.to_freq(pmt.cdr(msg))
+        elif self.is_hop_dict(msg):
+            if pmt.is_true(pmt.dict_ref(msg, pmt.intern("cancel"), pmt.PMT_F)):
+                # Drops every scheduled hop, e.g. when a predicted sequence is lost
+                with self.schedule_lock:
+                    self.scheduled.clear()
+                if not pmt.dict_has_key(msg, pmt.intern("freq")):
+                    return
+            freq = self.to_freq(pmt.dict_ref(msg, pmt.intern("freq"), pmt.PMT_NIL))
+            time = pmt.dict_ref(msg, pmt.intern("time"), pmt.PMT_NIL)
+            if not pmt.is_null(time):
+                with self.schedule_lock:
+                    # The counter keeps hops for the same sample in arrival order
+                    heapq.heappush(self.scheduled, (int(pmt.to_python(time)), self.schedule_count, freq))
+                    self.schedule_count += 1
+                return
+        elif pmt.is_pair(msg):
+            freq = self.to_freq(pmt.cdr(msg))
+        else:
+            freq = self.to_freq(msg)
+
+        if self.trigger_tag:
+            self.triggered.append(freq)
+        else:
+            self.immediate.append(freq)
+
+    def collect_hops(self, n) -> list:
+        # Hops landing in the next n input samples, offsets relative to nitems_read
+        first = self.nitems_read(0)
+
+        hops = [(0, freq) for freq in self.pop_all(self.immediate)]
+        for tag in self.get_tags_in_window(0, 0, n):
+            key = pmt.symbol_to_string(tag.key)
+            if key == self.freq_tag:
+                hops.append((tag.offset - first, self.to_freq(tag.value)))
+            elif key == self.trigger_tag and self.triggered:
+                hops.append((tag.offset - first, self.triggered.popleft()))
+
+        with self.schedule_lock:
+            while self.scheduled and self.scheduled[0][0] < first + n:
+                time, _, freq = heapq.heappop(self.scheduled)
+                # Hops scheduled in the past are applied right away
+                hops.append((max(time - first, 0), freq))
+
+        # Stable sort, so later hops on the same sample win
+        hops.sort(key=lambda hop: hop[0])
+        return hops
+
+    @staticmethod
+    def pop_all(queue: deque) -> list:
+        items = []
+        while queue:
+            items.append(queue.popleft())
+        return items
+
+class hopping_nco(gr.sync_block, hop_queue):
+    """
+    Mixes the input with a phase-continuous NCO whose frequency hops at exact
+    sample indices, replacing sig_source_c + multiply/divide retuned through
+    msg_pair_to_var callbacks. Hops can come from:
+      - stream tags with key `freq_tag`, applied at the tagged sample,
+      - "hop" messages holding a dict with "freq" and an absolute sample
+        index "time", applied at that sample. A true "cancel" entry drops
+        all hops scheduled so far first,
+      - untimed "hop" messages, either a (key, freq) pair as sent by
+        fhss_controller or a bare number. These are applied at the next
+        `trigger_tag` tag (e.g. the frame_len tag at the start of each LoRa
+        frame) or, without a trigger tag, at the start of the next work call.
+    Vector values pick element `emitter`, so one multi_fhss_controller can
+    feed an NCO per emitter. Every frequency gets `freq_offset` added.
+    """
+    _TABLE_LEN = 8192
+    _MAX_TABLES = 256
+
+    def __init__(self, samp_rate=1.0, freq=0.0, freq_offset=0.0, downconvert=False, emitter=0, trigger_tag='', freq_tag='freq'):
+        gr.sync_block.__init__(self,
+            name='Hopping NCO',
+            in_sig=[np.complex64],
+            out_sig=[np.complex64])
+
+        self.samp_rate = samp_rate
+        self.downconvert = downconvert
+        self.init_hops(freq_offset, emitter, trigger_tag, freq_tag)
+
+        self.freq = freq + freq_offset
+        self.phase = 0.0
+        self.phasor_tables: dict[float, np.ndarray] = {}
+
+    def set_sampling_freq(self, samp_rate):
+        self.samp_rate = samp_rate
+        self.phasor_tables.clear()
+
+    def phasor_table(self, freq) -> np.ndarray:
+        # exp(j * inc * k) for k < _TABLE_LEN, so mixing a segment costs two
+        # complex multiplies per sample and no transcendental functions
+        table = self.phasor_tables.get(freq)
+        if table is None:
+            phase_inc = 2 * np.pi * freq / self.samp_rate
+            if self.downconvert:
+                phase_inc = -phase_inc
+            table = np.exp(1j * phase_inc * np.arange(self._TABLE_LEN)).astype(np.complex64)
+            if len(self.phasor_tables) >= self._MAX_TABLES:
+                self.phasor_tables.clear()
+            self.phasor_tables[freq] = table
+        return table
+
+    def mix(self, in0, out, start, end):
+        table = self.phasor_table(self.freq)
+        phase_inc = 2 * np.pi * self.freq / self.samp_rate
+        if self.downconvert:
+            phase_inc = -phase_inc
+
+        while start < end:
+            n = min(end - start, self._TABLE_LEN)
+            np.multiply(in0[start:start + n], table[:n], out=out[start:start + n])
+            out[start:start + n] *= np.complex64(np.exp(1j * self.phase))
+            # Carry the phase over so retunes never introduce a discontinuity
+            self.phase = (self.phase + phase_inc * n) % (2 * np.pi)
+            start += n
+
+    def work(self, input_items, output_items):
+        in0 = input_items[0]
+        out = output_items[0]
+        n = len(out)
+
+        start = 0
+        for index, freq in self.collect_hops(n):
+            self.mix(in0, out, start, index)
+            start = index
+            self.freq = freq
+        self.mix(in0, out, start, n)
+
+        return n
+
+class xlating_decimator(gr.decim_block, hop_queue):
+    """
+    Frequency-translating decimating FIR filter, the hopping counterpart of
+    freq_xlating_fir_filter. The downconversion is folded into the filter:
+    for a channel at `freq` the taps are rotated to a band pass around it,
+    only every `decim`th output is computed, and the remaining rotation is
+    applied at the output rate, so no wideband mixer or complex division
+    runs at all. Rotated taps are kept per frequency, so hopping between
+    the FHSS channels switches tap banks instead of redesigning them.
+
+    Takes hops like hopping_nco, applied from the first output whose
+    newest input sample is at or after the hop. Every frequency gets
+    `freq_offset` added, and the output phase stays continuous across hops.
+    """
+    _MAX_BANKS = 256
+
+    def __init__(self, decim=1, taps=[1.0], samp_rate=1.0, freq=0.0, freq_offset=0.0, emitter=0, trigger_tag='', freq_tag='freq'):
+        gr.decim_block.__init__(self,
+            name='Xlating Decimator',
+            in_sig=[np.complex64],
+            out_sig=[np.complex64],
+            decim=decim)
+
+        self.decim = decim
+        self.taps = np.asarray(taps, dtype=np.float32)
+        self.samp_rate = samp_rate
+        self.init_hops(freq_offset, emitter, trigger_tag, freq_tag)
+        self.set_history(len(self.taps))
+
+        self.freq = freq + freq_offset
+        self.phase = 0.0
+        self.tap_banks: dict[float, np.ndarray] = {}
+
+    def set_sampling_freq(self, samp_rate):
+        self.samp_rate = samp_rate
+        self.tap_banks.clear()
+
+    def tap_bank(self, freq) -> np.ndarray:
+        # taps[k] * exp(j * inc * k), reversed to line up with the input window
+        bank = self.tap_banks.get(freq)
+        if bank is None:
+            phase_inc = 2 * np.pi * freq / self.samp_rate
+            bank = (self.taps * np.exp(1j * phase_inc * np.arange(len(self.taps))))[::-1].astype(np.complex64)
+            if len(self.tap_banks) >= self._MAX_BANKS:
+                self.tap_banks.clear()
+            self.tap_banks[freq] = bank
+        return bank
+
+    def decimate(self, windows, out, start, end):
+        if start >= end:
+            return
+        phase_inc = 2 * np.pi * self.freq / self.samp_rate * self.decim
+        np.matmul(windows[start:end], self.tap_bank(self.freq), out=out[start:end])
+        # The band pass output still sits at freq, bring it down to DC
+        out[start:end] *= np.exp(-1j * (self.phase + phase_inc * np.arange(end - start))).astype(np.complex64)
+        self.phase = (self.phase + phase_inc * (end - start)) % (2 * np.pi)
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        n = len(out)
+        # Output m is computed from the len(taps) input samples ending at m * decim
+        windows = np.lib.stride_tricks.sliding_window_view(input_items[0], len(self.taps))[::self.decim][:n]
+
+        start = 0
+        for offset, freq in self.collect_hops(n * self.decim):
+            index = min(-(-offset // self.decim), n)
+            self.decimate(windows, out, start, index)
+            start = index
+            self.freq = freq
+        self.decimate(windows, out, start, n)
+
+        return n
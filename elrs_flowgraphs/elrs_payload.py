@@ -0,0 +1,299 @@
+import sys
+import queue
+import struct
+import threading
+import numpy as np
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+from elrs_snapshot import cached_array, file_key
+
+# Bytes of payload carried by an OTA_Packet4_s
+PAYLOAD_LEN = 6
+
+# Packed binary payload file, memory-mapped instead of parsed. File layout:
+#   magic (8 bytes) | format version (u32) | record length (u32)
+#   | record count (u64) | padding to 64 bytes | N x record length bytes
+PAYLOAD_MAGIC = b'ELRSPAYL'
+PAYLOAD_VERSION = 1
+PAYLOAD_SUFFIX = '.elrsp'
+
+# Part of every snapshot key, bump it when the hex parser or the PayloadIndex
+# table layout changes
+PAYLOAD_SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQ')
+_HEADER_LEN = 64
+
+# Records per chunk read by PayloadStream
+STREAM_CHUNK_RECORDS = 4096
+
+def parse_hex_lines(lines: list[str], first_line: int = 1) -> bytes:
+    if all(len(line) == 2 * PAYLOAD_LEN for line in lines):
+        # fromhex skips whitespace, so all lines decode in one call
+        return bytes.fromhex(''.join(lines))
+
+    records = [bytes.fromhex(line)[:PAYLOAD_LEN] for line in lines]
+    for i, record in enumerate(records):
+        if len(record) != PAYLOAD_LEN:
+            raise ValueError(f'Line {first_line + i} holds {len(record)} bytes, expected {PAYLOAD_LEN}.')
+    return b''.join(records)
+
+def read_hex_payloads(path: Path) -> np.ndarray:
+    """
+    Parses a payload text file with one hex encoded payload per line into an
+    (N, PAYLOAD_LEN) uint8 array. Longer lines are cut to PAYLOAD_LEN bytes.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = file.read().split()
+
+    return np.frombuffer(parse_hex_lines(lines), dtype=np.uint8).reshape(-1, PAYLOAD_LEN)
+
+def is_payload_file(path: Path) -> bool:
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(PAYLOAD_MAGIC)) == PAYLOAD_MAGIC
+    except OSError:
+        return False
+
+def write_payload_file(path: Path, payloads: np.ndarray) -> None:
+    payloads = np.ascontiguousarray(payloads, dtype=np.uint8).reshape(-1, PAYLOAD_LEN)
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(PAYLOAD_MAGIC, PAYLOAD_VERSION, PAYLOAD_LEN, len(payloads)).ljust(_HEADER_LEN, b'\0'))
+        file.write(payloads.tobytes())
+
+def _read_header(file, path: Path) -> int:
+    magic, version, record_len, count = _HEADER.unpack(file.read(_HEADER.size))
+    if magic != PAYLOAD_MAGIC:
+        raise ValueError(f'\'{path}\' is not a packed payload file.')
+    if version != PAYLOAD_VERSION or record_len != PAYLOAD_LEN:
+        raise ValueError(f'\'{path}\' has version {version} and {record_len} byte records, '
+                         f'expected version {PAYLOAD_VERSION} and {PAYLOAD_LEN} byte records.')
+
+    size = Path(path).stat().st_size
+    if size < _HEADER_LEN + count * record_len:
+        raise ValueError(f'\'{path}\' is truncated, it should hold {count} records.')
+    return count
+
+def read_payload_file(path: Path) -> np.ndarray:
+    """
+    Maps a packed payload file as a read-only (N, PAYLOAD_LEN) uint8 view,
+    so opening it costs the same no matter how many records it holds.
+    """
+    with open(path, 'rb') as file:
+        count = _read_header(file, path)
+    if count == 0:
+        return np.empty((0, PAYLOAD_LEN), dtype=np.uint8)
+
+    return np.memmap(path, dtype=np.uint8, mode='r', offset=_HEADER_LEN, shape=(count, PAYLOAD_LEN))
+
+def convert_hex_payloads(src: Path, dst: Path) -> int:
+    payloads = read_hex_payloads(src)
+    write_payload_file(dst, payloads)
+    return len(payloads)
+
+def load_payloads(path: Path) -> np.ndarray:
+    if is_payload_file(path):
+        return read_payload_file(path)
+    # Parsed once, then memory-mapped from the snapshot cache until the file changes
+    key = file_key(path)
+    return cached_array('payloads', (PAYLOAD_SNAPSHOT_VERSION,) + key + (PAYLOAD_LEN,), lambda: read_hex_payloads(path), group=key[0])
+
+def payload_keys(payloads: np.ndarray) -> np.ndarray:
+    # Big-endian integer of each record, so a record compares as one uint64
+    keys = np.zeros(len(payloads), dtype=np.uint64)
+    for column in np.asarray(payloads, dtype=np.uint8).T:
+        keys = (keys << np.uint64(8)) | column
+    return keys
+
+class PayloadIndex:
+    """
+    Maps a payload to its record index in O(1), like a dict built by
+    assigning every record in file order, but stored as an open addressing
+    hash table in one (2, 2^bits) uint64 array of keys and indices rather
+    than millions of bytes objects. The table can live in the snapshot cache.
+    """
+    _EMPTY = 0xFFFF_FFFF_FFFF_FFFF # Never a key, keys only use 48 bits
+    _HASH_MUL = 0x9E37_79B9_7F4A_7C15
+
+    def __init__(self, table: np.ndarray):
+        self.table_keys = table[0]
+        self.table_indices = table[1]
+        self.bits = len(self.table_keys).bit_length() - 1
+        self.mask = (1 << self.bits) - 1
+        self.count = int(np.count_nonzero(self.table_keys != np.uint64(self._EMPTY)))
+
+    @classmethod
+    def slots(cls, keys: np.ndarray, bits: int) -> np.ndarray:
+        # Fibonacci hashing, the top bits of key * 2^64 / golden ratio
+        with np.errstate(over='ignore'):
+            hashed = keys * np.uint64(cls._HASH_MUL)
+        return (hashed >> np.uint64(64 - bits)).astype(np.int64)
+
+    @classmethod
+    def build_table(cls, payloads: np.ndarray) -> np.ndarray:
+        keys = payload_keys(payloads)
+
+        # Last record wins for repeated payloads, as with dict assignment
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+        keys, indices = sorted_keys[last], order[last].astype(np.uint64)
+
+        # At most half full, so probe runs stay short
+        bits = max(int(2 * len(keys)).bit_length(), 4)
+        mask = (1 << bits) - 1
+        table = np.zeros((2, 1 << bits), dtype=np.uint64)
+        table[0] = cls._EMPTY
+
+        # Insert everything at once, one linear probing step per round
+        slots = cls.slots(keys, bits)
+        pending = np.arange(len(keys))
+        claims = np.zeros(1 << bits, dtype=np.int64)
+        while len(pending):
+            pending_slots = slots[pending]
+            free = table[0][pending_slots] == np.uint64(cls._EMPTY)
+            # Of several keys racing for one free slot, one claim sticks and the rest probe on
+            claims[pending_slots[free]] = pending[free]
+            won = free & (claims[pending_slots] == pending)
+            placed = pending[won]
+            table[0][slots[placed]] = keys[placed]
+            table[1][slots[placed]] = indices[placed]
+
+            pending = pending[~won]
+            slots[pending] = (slots[pending] + 1) & mask
+
+        return table
+
+    @classmethod
+    def from_payloads(cls, payloads: np.ndarray) -> 'PayloadIndex':
+        return cls(cls.build_table(payloads))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, data: bytes, default=None):
+        if len(data) != PAYLOAD_LEN:
+            return default
+        key = int.from_bytes(data, 'big')
+        slot = ((key * self._HASH_MUL) & 0xFFFF_FFFF_FFFF_FFFF) >> (64 - self.bits)
+        while True:
+            table_key = self.table_keys.item(slot)
+            if table_key == key:
+                return self.table_indices.item(slot)
+            if table_key == self._EMPTY:
+                return default
+            slot = (slot + 1) & self.mask
+
+def load_payload_index(path: Path) -> PayloadIndex:
+    # Hashing tens of millions of records takes seconds, so keep the table until the file changes
+    key = file_key(path)
+    return PayloadIndex(cached_array('payload_index', (PAYLOAD_SNAPSHOT_VERSION,) + key + (PAYLOAD_LEN,),
+                                     lambda: PayloadIndex.build_table(load_payloads(path)), group=key[0]))
+
+class PayloadStream:
+    """
+    Reads a payload file of either format front to back in chunks on a
+    background thread. At most `buffers` chunks wait in memory, so memory
+    use stays constant however long the file is, and the first payload is
+    ready as soon as the first chunk is read. next() returns None at the
+    end of the file, or once close() was called.
+    """
+    def __init__(self, path: Path, chunk_records: int = STREAM_CHUNK_RECORDS, buffers: int = 2):
+        self.path = Path(path)
+        self.chunk_records = chunk_records
+        self.chunks: queue.Queue = queue.Queue(maxsize=buffers)
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+        self.chunk = b''
+        self.chunk_pos = 0
+        self.finished = False
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.prefetch, name='ELRS payload prefetch', daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def next(self) -> Optional[bytes]:
+        while self.chunk_pos >= len(self.chunk):
+            if self.finished:
+                return None
+            try:
+                chunk = self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                # close() from another thread stops the prefetch before it can send the marker
+                if self.stop_event.is_set():
+                    self.finished = True
+                    return None
+                continue
+            if chunk is None:
+                self.finished = True
+                if self.error is not None:
+                    print(f'ELRS Payload Stream: Stopped reading \'{self.path}\' early.\n', self.error)
+                return None
+            self.chunk = chunk
+            self.chunk_pos = 0
+
+        data = self.chunk[self.chunk_pos:self.chunk_pos + PAYLOAD_LEN]
+        self.chunk_pos += PAYLOAD_LEN
+        return data
+
+    def prefetch(self) -> None:
+        try:
+            for chunk in self.read_chunks():
+                if not self.put(chunk):
+                    return
+        except Exception as e:
+            self.error = e
+        # End of file marker, also sent after an error so next() stops waiting
+        self.put(None)
+
+    def put(self, chunk: Optional[bytes]) -> bool:
+        # Wait for a free buffer, but give up once close() was called
+        while not self.stop_event.is_set():
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read_chunks(self) -> Iterator[bytes]:
+        if is_payload_file(self.path):
+            with open(self.path, 'rb') as file:
+                remaining = _read_header(file, self.path) * PAYLOAD_LEN
+                file.seek(_HEADER_LEN)
+                while remaining > 0 and not self.stop_event.is_set():
+                    data = file.read(min(remaining, self.chunk_records * PAYLOAD_LEN))
+                    if not data:
+                        raise ValueError(f'\'{self.path}\' ended {remaining // PAYLOAD_LEN} records early.')
+                    remaining -= len(data)
+                    yield data
+        else:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                line_num = 1
+                while not self.stop_event.is_set():
+                    lines = list(islice(file, self.chunk_records))
+                    if not lines:
+                        return
+                    records = [line.strip() for line in lines if line.strip()]
+                    yield parse_hex_lines(records, line_num)
+                    line_num += len(lines)
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print(f'Usage: {sys.argv[0]} <hex payload file> [packed payload file]')
+        sys.exit(1)
+
+    src = Path(sys.argv[1])
+    dst = Path(sys.argv[2]) if len(sys.argv) == 3 else src.with_suffix(PAYLOAD_SUFFIX)
+    print(f'Wrote {convert_hex_payloads(src, dst)} payloads to \'{dst}\'.')
@@ -25,8 +25,6 @@ from PyQt5 import Qt
 from gnuradio import qtgui
 from gnuradio.filter import firdes
 import sip
-from gnuradio import analog
-from gnuradio import blocks
 from gnuradio import filter
 from gnuradio import gr
 from gnuradio.fft import window
@@ -39,6 +37,8 @@ from gnuradio import network
 from gnuradio.elrs_module.lora_sdr_lora_rx_mod import lora_sdr_lora_rx_mod
 import elrs_receiver_epy_block_0 as epy_block_0  # embedded python block
 import elrs_receiver_epy_block_2 as epy_block_2  # embedded python block
+import elrs_receiver_epy_block_3 as epy_block_3  # embedded python block
+import elrs_resampler
 
 
 
@@ -85,6 +85,7 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
         self.bandwidth = bandwidth = 125e3
         self.sf = sf = 7
         self.samp_rate = samp_rate = bandwidth*2
+        self.rx_resampler = rx_resampler = elrs_resampler.plan_resampler(5, 448, samp_rate * 448 / 5, 0.4, stages=3)
         self.freq_temp = freq_temp = freq_center
         self.freq_stop = freq_stop = freq_center + (wide_samp_rate // 2)
         self.freq_start = freq_start = freq_center - (wide_samp_rate // 2)
@@ -98,10 +99,10 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
         ##################################################
         # Blocks
         ##################################################
-        self.rational_resampler_xxx_0_0 = filter.rational_resampler_ccc(
-                interpolation=5,
-                decimation=448,
-                taps=[],
+        self.rational_resampler_xxx_0_0 = filter.rational_resampler_ccf(
+                interpolation=rx_resampler.stages[2].interp,
+                decimation=rx_resampler.stages[2].decim,
+                taps=rx_resampler.stages[2].taps.tolist(),
                 fractional_bw=0)
         self.qtgui_waterfall_sink_x_0_0 = qtgui.waterfall_sink_c(
             512, #size
@@ -173,6 +174,8 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
         self._qtgui_waterfall_sink_x_0_win = sip.wrapinstance(self.qtgui_waterfall_sink_x_0.qwidget(), Qt.QWidget)
 
         self.top_layout.addWidget(self._qtgui_waterfall_sink_x_0_win)
+        self.fir_filter_xxx_1 = filter.fir_filter_ccf(rx_resampler.stages[1].decim, rx_resampler.stages[1].taps.tolist())
+        self.fir_filter_xxx_1.declare_sample_delay(0)
         self.network_udp_source_0 = network.udp_source(gr.sizeof_gr_complex, 1, 1234, 0, 1472, True, True, False)
         self.lora_sdr_lora_rx_mod_0 = lora_sdr_lora_rx_mod(
             center_freq=868100000,
@@ -189,20 +192,18 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
         )
         self.epy_block_2 = epy_block_2.elrs_receiver_data_gen(bindingPhrase=binding_phrase, filepath='/home/gabriel/GNU_Radio_ExpressLRS/test.txt', loopFile=True)
         self.epy_block_0 = epy_block_0.fhss_controller(binding_phrase=binding_phrase, freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.blocks_msgpair_to_var_0 = blocks.msg_pair_to_var(self.set_freq_temp)
-        self.blocks_divide_xx_0 = blocks.divide_cc(1)
-        self.analog_sig_source_x_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp, 1, 0, 0)
+        self.epy_block_3 = epy_block_3.xlating_decimator(decim=rx_resampler.stages[0].decim, taps=rx_resampler.stages[0].taps, samp_rate=wide_samp_rate, center_freq=freq_temp)
 
 
         ##################################################
         # Connections
         ##################################################
-        self.msg_connect((self.epy_block_0, 'msg_out'), (self.blocks_msgpair_to_var_0, 'inpair'))
+        self.msg_connect((self.epy_block_0, 'msg_out'), (self.epy_block_3, 'hop'))
         self.msg_connect((self.lora_sdr_lora_rx_mod_0, 'out'), (self.epy_block_0, 'msg_in'))
         self.msg_connect((self.lora_sdr_lora_rx_mod_0, 'out'), (self.epy_block_2, 'msg_in'))
-        self.connect((self.analog_sig_source_x_0, 0), (self.blocks_divide_xx_0, 1))
-        self.connect((self.blocks_divide_xx_0, 0), (self.rational_resampler_xxx_0_0, 0))
-        self.connect((self.network_udp_source_0, 0), (self.blocks_divide_xx_0, 0))
+        self.connect((self.epy_block_3, 0), (self.fir_filter_xxx_1, 0))
+        self.connect((self.fir_filter_xxx_1, 0), (self.rational_resampler_xxx_0_0, 0))
+        self.connect((self.network_udp_source_0, 0), (self.epy_block_3, 0))
         self.connect((self.network_udp_source_0, 0), (self.qtgui_waterfall_sink_x_0_0, 0))
         self.connect((self.rational_resampler_xxx_0_0, 0), (self.lora_sdr_lora_rx_mod_0, 0))
         self.connect((self.rational_resampler_xxx_0_0, 0), (self.qtgui_waterfall_sink_x_0, 0))
@@ -223,7 +224,7 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
         self.wide_samp_rate = wide_samp_rate
         self.set_freq_start(self.freq_center - (self.wide_samp_rate // 2))
         self.set_freq_stop(self.freq_center + (self.wide_samp_rate // 2))
-        self.analog_sig_source_x_0.set_sampling_freq(self.wide_samp_rate)
+        self.epy_block_3.samp_rate = self.wide_samp_rate
 
     def get_freq_center(self):
         return self.freq_center
@@ -254,13 +255,24 @@ class elrs_receiver(gr.top_block, Qt.QWidget):
 
     def set_samp_rate(self, samp_rate):
         self.samp_rate = samp_rate
+        self.set_rx_resampler(elrs_resampler.plan_resampler(5, 448, self.samp_rate * 448 / 5, 0.4, stages=3))
+
+    def get_rx_resampler(self):
+        return self.rx_resampler
+
+    def set_rx_resampler(self, rx_resampler):
+        self.rx_resampler = rx_resampler
+        self.epy_block_3.decim = self.rx_resampler.stages[0].decim
+        self.epy_block_3.taps = self.rx_resampler.stages[0].taps
+        self.fir_filter_xxx_1.set_taps(self.rx_resampler.stages[1].taps.tolist())
+        self.rational_resampler_xxx_0_0.set_taps(self.rx_resampler.stages[2].taps.tolist())
 
     def get_freq_temp(self):
         return self.freq_temp
 
     def set_freq_temp(self, freq_temp):
         self.freq_temp = freq_temp
-        self.analog_sig_source_x_0.set_frequency(self.freq_temp)
+        self.epy_block_3.center_freq = self.freq_temp
 
     def get_freq_stop(self):
         return self.freq_stop
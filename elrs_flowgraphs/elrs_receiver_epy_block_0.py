@@ -1,7 +1,8 @@
 import pmt
 import numpy as np
+from collections import deque
 from gnuradio import gr
-from hashlib import md5
+from elrs_fhss import FHSS_SEQUENCE_LEN, OTA_VERSION_ID, fhss_seed, get_fhss_sequence, get_hop_index
 
 class fhss_controller(gr.sync_block):
     # This is the corrected line with default values
@@ -23,10 +24,14 @@ class fhss_controller(gr.sync_block):
         self.message_port_register_in(pmt.intern("msg_in"))
         self.message_port_register_out(pmt.intern("msg_out"))
         self.set_msg_handler(pmt.intern("msg_in"), self.handle_msg)
+        # Channels seen by a channelizer or scan, one message per hop, to find
+        # the place in the sequence again after losing it
+        self.message_port_register_in(pmt.intern("sync"))
+        self.set_msg_handler(pmt.intern("sync"), self.handle_sync)
 
         # --- Setup logic from your script ---
-        self.FHSS_SEQUENCE_LEN = 256
-        self.OTA_VERSION_ID = 6
+        self.FHSS_SEQUENCE_LEN = FHSS_SEQUENCE_LEN
+        self.OTA_VERSION_ID = OTA_VERSION_ID
         
         if self.freq_count > 1:
             self.freq_spread = abs(self.freq_stop - self.freq_start) // (self.freq_count - 1)
@@ -39,49 +44,70 @@ class fhss_controller(gr.sync_block):
         else:
             self.num_primary_bands = 0 # Provide a safe default
 
-        uid_bytes = md5(self.binding_phrase.encode()).digest()[0:6]
-        self.seed = (uid_bytes[2] << 24) | (uid_bytes[3] << 16) | (uid_bytes[4] << 8) | (uid_bytes[5] ^ self.OTA_VERSION_ID)
+        self.seed = fhss_seed(self.binding_phrase, self.OTA_VERSION_ID)
         self.freq_sequence = [0] * self.FHSS_SEQUENCE_LEN
         self.fhss_index = 0
+        self.msg_out = pmt.intern("msg_out")
         
         self.build_random_fhss_sequence()
+        self.build_hop_messages()
 
-    def elrs_rng(self):
-        self.seed = (0x343FD * self.seed + 0x269EC3) % 0x80000000
-        return self.seed >> 16
-    
     def build_random_fhss_sequence(self):
-        # Only build if freq_count is valid
-        if self.freq_count < 2: return
+        # The sequence is generated once per parameter set and shared by every
+        # controller through elrs_fhss, so it must be treated as read-only.
+        self.freq_sequence = get_fhss_sequence(self.binding_phrase, self.freq_start, self.freq_stop,
+                                               self.freq_count, self.OTA_VERSION_ID).channels
+        self.hop_index = get_hop_index(self.binding_phrase, self.freq_start, self.freq_stop,
+                                       self.freq_count, ota_version=self.OTA_VERSION_ID)
+        self.observed = deque(maxlen=max(self.hop_index.order, 1))
+        self.fhss_index %= max(self.num_primary_bands, 1)
 
-        for i in range(self.num_primary_bands):
-            self.freq_sequence[i] = i % self.freq_count
-        
-        for i in range(1, self.num_primary_bands):
-             if (i % self.freq_count) != 0:
-                offset = (i // self.freq_count) * self.freq_count
-                rand = (self.elrs_rng() % (self.freq_count - 1)) + 1
-                self.freq_sequence[i], self.freq_sequence[offset + rand] = self.freq_sequence[offset + rand], self.freq_sequence[i]
+    def build_hop_messages(self):
+        # Final mixer offset and a ready-made PMT pair for every hop, so
+        # handle_msg only has to index and publish.
+        self.hop_offsets = self.freq_start + (np.asarray(self.freq_sequence) * self.freq_spread) - self.freq_center + 3.7e6 # Temp fix
+        key = pmt.intern("freq_temp")
+        self.hop_msgs = [pmt.cons(key, pmt.from_double(offset)) for offset in self.hop_offsets.tolist()]
+        self.disabled_msg = pmt.cons(key, pmt.from_double(self.freq_center + 3.7e6)) # Temp fix
+
+    def start(self):
+        # Pick up any parameter changes made through the top block setters
+        self.build_random_fhss_sequence()
+        self.build_hop_messages()
+        return True
 
     def handle_msg(self, msg):
         if not self.disable:
-            current_freq_index = self.freq_sequence[self.fhss_index]
-            absolute_freq = self.freq_start + (current_freq_index * self.freq_spread)
-            freq_offset = absolute_freq - self.freq_center
-
-            key = pmt.intern("freq_temp")
-            value = pmt.from_double(freq_offset + 3.7e6) # Temp fix
-            output_msg = pmt.cons(key, value)
-
-            self.message_port_pub(pmt.intern("msg_out"), output_msg)
+            self.message_port_pub(self.msg_out, self.hop_msgs[self.fhss_index])
             
-            self.fhss_index = (self.fhss_index + 1) % self.freq_count
+            self.fhss_index = (self.fhss_index + 1) % self.num_primary_bands
         else:
-            key = pmt.intern("freq_temp")
-            value = pmt.from_double(self.freq_center + 3.7e6) # Temp fix
-            output_msg = pmt.cons(key, value)
+            self.message_port_pub(self.msg_out, self.disabled_msg)
+
+    def handle_sync(self, msg):
+        # Either a channel index or a PDU from channel_merger
+        if pmt.is_pair(msg):
+            msg = pmt.dict_ref(pmt.car(msg), pmt.intern("channel"), pmt.PMT_NIL)
+        if self.disable or not pmt.is_number(msg):
+            return
+
+        self.observed.append(int(pmt.to_python(msg)))
+        position = self.hop_index.lookup(self.observed)
+        if position is None:
+            # A missed hop breaks the run, keep only what still fits the sequence
+            matched = self.hop_index.matched_hops(self.observed)
+            while len(self.observed) > matched:
+                self.observed.popleft()
+            return
 
-            self.message_port_pub(pmt.intern("msg_out"), output_msg)
+        # In sync if that hop was published last, or the one before when the
+        # decode reached msg_in first
+        lag = (self.fhss_index - position) % self.num_primary_bands
+        if lag in (1, 2):
+            return
+        self.fhss_index = (position + 1) % self.num_primary_bands
+        self.message_port_pub(self.msg_out, self.hop_msgs[self.fhss_index])
+        self.fhss_index = (self.fhss_index + 1) % self.num_primary_bands
 
 
     def work(self, input_items, output_items):
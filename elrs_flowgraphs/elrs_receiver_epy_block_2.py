@@ -1,48 +1,16 @@
 import pmt
 import time
 import ctypes
+import threading
 import numpy as np
 from hashlib import md5
 from gnuradio import gr
 from pathlib import Path
 from typing import Optional, TextIO
-
-class Crc2Byte:
-    _CRCTAB_LEN = 256
-
-    def __init__(self, bits: int, poly: int):
-        if not (8 <= bits <= 16):
-            raise ValueError("CRC bit-width must be between 8 and 16.")
-
-        self.bits = bits
-        self.poly = poly
-        self.bitmask = (1 << self.bits) - 1
-        
-        # Pre-compute the CRC lookup table
-        self.crctab = self._generate_table()
-
-    def _generate_table(self) -> list[int]:
-        crctab = [0] * self._CRCTAB_LEN
-        highbit = 1 << (self.bits - 1)
-
-        for i in range(self._CRCTAB_LEN):
-            crc = i << (self.bits - 8)
-            for _ in range(8):
-                if crc & highbit:
-                    crc = (crc << 1) ^ self.poly
-                else:
-                    crc = crc << 1
-            crctab[i] = crc & self.bitmask
-        return crctab
-
-    def calc(self, data: bytes, initial_crc: int = 0) -> int:
-        crc = initial_crc
-
-        for byte in data:
-            lookup_index = ((crc >> (self.bits - 8)) ^ byte) & 0xFF
-            crc = (crc << 8) ^ self.crctab[lookup_index]
-
-        return crc & self.bitmask
+from elrs_crc import Crc2Byte
+from elrs_link import LinkTracker
+from elrs_log import AsyncLogWriter
+from elrs_payload import PAYLOAD_LEN, PayloadIndex, load_payload_index, load_payloads
 
 # The final, top-level packet structure
 class OTA_Packet4_s(ctypes.Structure):
@@ -60,13 +28,16 @@ class OTA_Packet4_s(ctypes.Structure):
         ("crcLow", ctypes.c_uint8),
     ]
 
+# crcHigh only keeps 6 bits, so an OTA_Packet4_s carries 14 bits of the CRC
+OTA4_CRC_MASK = 0x3FFF
+
 class elrs_receiver_data_gen(gr.sync_block):
     """
     Receives a trigger message. On each trigger, it formats a string
     with the value of a 'counter' variable from the top_block,
     sends it as a new message, and increments the counter.
     """
-    def __init__(self, bindingPhrase: str='DefaultBindingPhrase', filepath: str='', loopFile:bool =False):
+    def __init__(self, bindingPhrase: str='DefaultBindingPhrase', filepath: str='', loopFile:bool =False, statsPeriod: float=1.0, logPath: str=''):
         gr.sync_block.__init__(self,
             name='ELRS Receiver Data Gen',
             in_sig=None,
@@ -79,32 +50,49 @@ class elrs_receiver_data_gen(gr.sync_block):
         self.loop_file: bool = loopFile
         self.done: bool = False
 
-        self.packet_datas: list[bytes] = []
-        self.packet_data_dict: dict[bytes, int] = {}
+        self.packet_datas = np.empty((0, PAYLOAD_LEN), dtype=np.uint8)
+        self.packet_data_dict = PayloadIndex.from_payloads(self.packet_datas)
+
+        # Link statistics, published as a dict on "stats" every statsPeriod seconds
+        self.tracker = LinkTracker(0)
+        self.stats_period = statsPeriod
+        self.stats_stop = threading.Event()
+        self.stats_thread: Optional[threading.Thread] = None
+
+        # Per-packet logging goes through a background writer, never stdout on the message thread
+        self.log = AsyncLogWriter('ELRS Receiver Data Gen', logPath)
 
         uid = md5(str(f'-DMY_BINDING_PHRASE="{bindingPhrase}"').encode('utf-8')).digest()[:6]
         self.ota_crc = ((uid[4] << 8) | uid[5]) ^ 4
+        # The seed is fixed per binding phrase, so let the host pick the fastest CRC strategy for it
+        self.crc_fn = self.crc_calc.seeded(self.ota_crc, length=PAYLOAD_LEN)
         
         self.message_port_register_in(pmt.intern("msg_in"))
+        self.message_port_register_out(pmt.intern("stats"))
         self.set_msg_handler(pmt.intern("msg_in"), self.handle_msg)
 
     def handle_msg(self, msg) -> None:
+        if pmt.is_pair(msg):
+            # A PDU from the channelized receiver, the metadata is not needed here
+            msg = pmt.cdr(msg)
         if not pmt.is_u8vector(msg):
-            print('PMT was not of type u8vector!')
+            self.log.message('PMT was not of type u8vector!')
             return
         
         ota = OTA_Packet4_s.from_buffer(bytearray(pmt.u8vector_elements(msg)))
         data = bytes(ota.payload)
         
         recv_crc: int = (ota.crcHigh << 8) | ota.crcLow
-        data_crc: int = self.crc_calc.calc(data, self.ota_crc)
+        data_crc: int = self.crc_fn(data)
 
-        print(recv_crc, data_crc)
+        crc_ok = recv_crc == data_crc & OTA4_CRC_MASK
+        self.log.record(recv_crc, data_crc, crc_ok, data)
 
-        print(data.hex())
+        self.tracker.update(self.packet_data_dict.get(data) if crc_ok else None, crc_ok)
 
-        if recv_crc != data_crc:
-            print('CRC calculated from packet data does not match included CRC!')
+    def publish_stats(self):
+        while not self.stats_stop.wait(self.stats_period):
+            self.message_port_pub(pmt.intern("stats"), self.tracker.summary_pmt())
 
     def start(self) -> bool:
         if not self.filepath.is_file():
@@ -112,21 +100,28 @@ class elrs_receiver_data_gen(gr.sync_block):
             return False
         
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as file:
-                curr_line = file.readline()
-                while len(curr_line) != 0:
-                    self.packet_datas.append(bytes.fromhex(curr_line))
-                    curr_line = file.readline()
+            # Packed payload files and parsed hex files are both memory-mapped views
+            self.packet_datas = load_payloads(self.filepath)
+            self.packet_data_dict = load_payload_index(self.filepath)
         except Exception as e:
             print('ELRS Transmitter Data Gen: Exception occured while trying to open file.\n', e)
             return False
-        
-        for i in range(len(self.packet_datas)):
-            self.packet_data_dict[self.packet_datas[i]] = i
+
+        self.tracker = LinkTracker(len(self.packet_datas))
+        self.log.start()
+        if self.stats_period > 0:
+            self.stats_stop.clear()
+            self.stats_thread = threading.Thread(target=self.publish_stats, name='ELRS receiver stats', daemon=True)
+            self.stats_thread.start()
 
         return True
 
     def stop(self) -> bool:
+        self.stats_stop.set()
+        if self.stats_thread is not None:
+            self.stats_thread.join()
+            self.stats_thread = None
+        self.log.stop()
         return True
 
     def work(self, input_items, output_items):
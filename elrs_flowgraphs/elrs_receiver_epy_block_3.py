@@ -0,0 +1,46 @@
+"""
+Embedded Python Block: Xlating Decimator
+
+elrs_nco.xlating_decimator with its settings as attributes, so the
+flowgraph variables can retune it the way they would a
+freq_xlating_fir_filter.
+"""
+import numpy as np
+import elrs_nco
+
+class xlating_decimator(elrs_nco.xlating_decimator):
+    """
+    Frequency-translating decimating FIR filter taking hops on "hop". The
+    first stage of the receive resampler, with the tuning folded in.
+    """
+    def __init__(self, decim=1, taps=[1.0], samp_rate=1.0, center_freq=0.0):
+        elrs_nco.xlating_decimator.__init__(self, decim=decim, taps=taps, samp_rate=samp_rate, freq=center_freq)
+
+    @property
+    def center_freq(self):
+        return self.freq - self.freq_offset
+
+    @center_freq.setter
+    def center_freq(self, center_freq):
+        self.set_frequency(center_freq)
+
+    @property
+    def samp_rate(self):
+        return self._samp_rate
+
+    @samp_rate.setter
+    def samp_rate(self, samp_rate):
+        # Tap banks were rotated for the old rate
+        self._samp_rate = samp_rate
+        self.tap_banks = {}
+
+    @property
+    def taps(self):
+        return self._taps
+
+    @taps.setter
+    def taps(self, taps):
+        # A plan for another rate keeps the tap count, only the ratio of the
+        # rates sets it, so the history set on construction still fits
+        self._taps = np.asarray(taps, dtype=np.float32)
+        self.tap_banks = {}
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: ELRS Receiver (headless)
+# GNU Radio version: 3.10.1.1
+
+# Same signal chain as elrs_receiver.py, without PyQt, qtgui or the
+# waterfall sinks, and with the binding phrase, paths and rates taken from
+# the command line for unattended runs. With --channelize, the whole band
+# is split into its FHSS channels and every channel is decoded at once,
+# trading hop tracking for never losing the hop sequence. With an input
+# path, a recording is read through a memory map instead of UDP, see
+# elrs_receiver_replay.py. With --gate, only the bursts reach the LoRa
+# demodulators and the idle spans between packets are dropped. With
+# --resync, a channelizer watches the whole band while hopping and tells
+# the FHSS controller which channels the transmitter is seen on, so it can
+# find its place in the hop sequence again after losing it.
+
+import time
+from gnuradio import filter
+from gnuradio import gr
+import sys
+import signal
+from argparse import ArgumentParser
+from gnuradio.eng_arg import eng_float, intx
+from gnuradio import eng_notation
+from gnuradio import network
+from gnuradio.elrs_module.lora_sdr_lora_rx_mod import lora_sdr_lora_rx_mod
+import elrs_receiver_epy_block_0 as epy_block_0  # embedded python block
+import elrs_receiver_epy_block_2 as epy_block_2  # embedded python block
+from elrs_channelizer import channel_activity, channel_merger, pfb_channelizer
+from elrs_fhss import channel_frequencies
+from elrs_gate import burst_gate
+from elrs_nco import xlating_decimator
+from elrs_resampler import multistage_resampler, plan_resampler
+from elrs_sigmf import mmap_source
+
+
+
+
+class elrs_receiver_headless(gr.top_block):
+
+    def __init__(self, binding_phrase="TestBindingPhrase", payload_path='test.txt', log_path='', udp_port=1234,
+                 freq_center=914700000, wide_samp_rate=926900000 - 903500000, freq_count=20, bandwidth=125e3,
+                 stats_period=1.0, disable=True, channelize=False, input_path='', gate=0.0, resync=False):
+        gr.top_block.__init__(self, "ELRS Receiver (headless)", catch_exceptions=True)
+
+        ##################################################
+        # Parameters
+        ##################################################
+        self.binding_phrase = binding_phrase
+        self.payload_path = payload_path
+        self.log_path = log_path
+        self.udp_port = udp_port
+        self.freq_center = freq_center
+        self.wide_samp_rate = wide_samp_rate
+        self.freq_count = freq_count
+        self.bandwidth = bandwidth
+        self.stats_period = stats_period
+        self.disable = disable
+        self.channelize = channelize
+        self.input_path = input_path
+        self.gate = gate
+        self.resync = resync
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.samp_rate = samp_rate = bandwidth*2
+        self.resampler_plan = resampler_plan = plan_resampler(5, 448, samp_rate * 448 / 5, 0.4)
+        self.freq_temp = freq_temp = freq_center
+        self.freq_stop = freq_stop = freq_center + (wide_samp_rate // 2)
+        self.freq_start = freq_start = freq_center - (wide_samp_rate // 2)
+        self.channel_freqs = channel_freqs = channel_frequencies(freq_start, freq_stop, freq_count).tolist()
+        self.channel_offsets = channel_offsets = [freq - freq_center + 3.7e6 for freq in channel_freqs] # Temp fix
+
+        ##################################################
+        # Blocks
+        ##################################################
+        if input_path:
+            self.mmap_source_0 = mmap_source(path=input_path)
+            source = self.mmap_source_0
+        else:
+            self.network_udp_source_0 = network.udp_source(gr.sizeof_gr_complex, 1, udp_port, 0, 1472, True, True, False)
+            source = self.network_udp_source_0
+        self.epy_block_2 = epy_block_2.elrs_receiver_data_gen(bindingPhrase=binding_phrase, filepath=payload_path, loopFile=True, statsPeriod=stats_period, logPath=log_path)
+
+        if channelize:
+            # One LoRa receiver per channel, each runs in its own scheduler thread
+            self.pfb_channelizer_0 = pfb_channelizer(samp_rate=wide_samp_rate, freqs=channel_offsets, fft_len=128, taps_per_branch=18)
+            self.channel_merger_0 = channel_merger(freqs=channel_freqs)
+            self.rational_resamplers = []
+            self.burst_gates = []
+            self.lora_rx_mods = []
+            for i in range(freq_count):
+                self.rational_resamplers.append(filter.rational_resampler_ccc(
+                        interpolation=5,
+                        decimation=7,
+                        taps=[],
+                        fractional_bw=0.4))
+                if gate > 0:
+                    self.burst_gates.append(burst_gate(samp_rate=samp_rate, threshold=gate))
+                self.lora_rx_mods.append(self.lora_rx_mod(bandwidth, samp_rate))
+        else:
+            self.multistage_resampler_0 = multistage_resampler(
+                    plan=resampler_plan,
+                    first_stage=1)
+            if gate > 0:
+                self.burst_gate_0 = burst_gate(samp_rate=samp_rate, threshold=gate)
+            self.lora_sdr_lora_rx_mod_0 = self.lora_rx_mod(bandwidth, samp_rate)
+            self.epy_block_0 = epy_block_0.fhss_controller(binding_phrase=binding_phrase, freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
+            self.xlating_decimator_0 = xlating_decimator(decim=resampler_plan.stages[0].decim, taps=resampler_plan.stages[0].taps, samp_rate=wide_samp_rate, freq=freq_temp)
+            if resync:
+                self.pfb_channelizer_0 = pfb_channelizer(samp_rate=wide_samp_rate, freqs=channel_offsets, fft_len=128, taps_per_branch=18)
+                self.channel_activity_0 = channel_activity(samp_rate=wide_samp_rate * 2 / 128, channels=freq_count)
+
+
+        ##################################################
+        # Connections
+        ##################################################
+        if channelize:
+            self.msg_connect((self.channel_merger_0, 'out'), (self.epy_block_2, 'msg_in'))
+            for i in range(freq_count):
+                self.connect((self.pfb_channelizer_0, i), (self.rational_resamplers[i], 0))
+                if gate > 0:
+                    self.connect((self.rational_resamplers[i], 0), (self.burst_gates[i], 0))
+                    self.connect((self.burst_gates[i], 0), (self.lora_rx_mods[i], 0))
+                else:
+                    self.connect((self.rational_resamplers[i], 0), (self.lora_rx_mods[i], 0))
+                self.msg_connect((self.lora_rx_mods[i], 'out'), (self.channel_merger_0, f'ch{i}'))
+            self.connect((source, 0), (self.pfb_channelizer_0, 0))
+        else:
+            self.msg_connect((self.epy_block_0, 'msg_out'), (self.xlating_decimator_0, 'hop'))
+            self.msg_connect((self.lora_sdr_lora_rx_mod_0, 'out'), (self.epy_block_0, 'msg_in'))
+            self.msg_connect((self.lora_sdr_lora_rx_mod_0, 'out'), (self.epy_block_2, 'msg_in'))
+            self.connect((self.xlating_decimator_0, 0), (self.multistage_resampler_0, 0))
+            self.connect((source, 0), (self.xlating_decimator_0, 0))
+            if gate > 0:
+                self.connect((self.multistage_resampler_0, 0), (self.burst_gate_0, 0))
+                self.connect((self.burst_gate_0, 0), (self.lora_sdr_lora_rx_mod_0, 0))
+            else:
+                self.connect((self.multistage_resampler_0, 0), (self.lora_sdr_lora_rx_mod_0, 0))
+            if resync:
+                self.connect((source, 0), (self.pfb_channelizer_0, 0))
+                for i in range(freq_count):
+                    self.connect((self.pfb_channelizer_0, i), (self.channel_activity_0, i))
+                self.msg_connect((self.channel_activity_0, 'out'), (self.epy_block_0, 'sync'))
+
+    @staticmethod
+    def lora_rx_mod(bandwidth, samp_rate):
+        return lora_sdr_lora_rx_mod(
+            center_freq=868100000,
+            bw=int(bandwidth),
+            cr=1,
+            has_crc=False,
+            impl_head=True,
+            pay_len=8,
+            samp_rate=int(samp_rate),
+            sf=7,
+            sync_word=[0x12],
+            soft_decoding=False,
+            ldro_mode=2
+        )
+
+
+    def get_binding_phrase(self):
+        return self.binding_phrase
+
+    def set_binding_phrase(self, binding_phrase):
+        self.binding_phrase = binding_phrase
+        if not self.channelize:
+            self.epy_block_0.binding_phrase = self.binding_phrase
+
+    def get_freq_temp(self):
+        return self.freq_temp
+
+    def set_freq_temp(self, freq_temp):
+        self.freq_temp = freq_temp
+        if not self.channelize:
+            self.xlating_decimator_0.set_frequency(self.freq_temp)
+
+    def get_disable(self):
+        return self.disable
+
+    def set_disable(self, disable):
+        self.disable = disable
+        if not self.channelize:
+            self.epy_block_0.disable = self.disable
+
+
+
+def argument_parser():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--binding-phrase", dest="binding_phrase", type=str, default="TestBindingPhrase",
+        help="Set binding phrase [default=%(default)r]")
+    parser.add_argument(
+        "--payload-path", dest="payload_path", type=str, default='test.txt',
+        help="Set transmitted payload file, hex lines or .elrsp [default=%(default)r]")
+    parser.add_argument(
+        "--log-path", dest="log_path", type=str, default='',
+        help="Set binary packet log file, empty disables it [default=%(default)r]")
+    parser.add_argument(
+        "--udp-port", dest="udp_port", type=intx, default=1234,
+        help="Set UDP port the IQ samples arrive on [default=%(default)r]")
+    parser.add_argument(
+        "--freq-center", dest="freq_center", type=eng_float, default=eng_notation.num_to_str(float(914700000)),
+        help="Set center frequency [default=%(default)r]")
+    parser.add_argument(
+        "--wide-samp-rate", dest="wide_samp_rate", type=eng_float, default=eng_notation.num_to_str(float(926900000 - 903500000)),
+        help="Set wideband sample rate [default=%(default)r]")
+    parser.add_argument(
+        "--freq-count", dest="freq_count", type=intx, default=20,
+        help="Set FHSS channel count [default=%(default)r]")
+    parser.add_argument(
+        "--bandwidth", dest="bandwidth", type=eng_float, default=eng_notation.num_to_str(float(125e3)),
+        help="Set LoRa bandwidth [default=%(default)r]")
+    parser.add_argument(
+        "--stats-period", dest="stats_period", type=eng_float, default=1.0,
+        help="Set seconds between link statistics messages [default=%(default)r]")
+    parser.add_argument(
+        "--hop", dest="disable", action='store_false',
+        help="Enable frequency hopping")
+    parser.add_argument(
+        "--channelize", dest="channelize", action='store_true',
+        help="Decode every FHSS channel in parallel instead of following the hops")
+    parser.add_argument(
+        "--input-path", dest="input_path", type=str, default='',
+        help="Set complex64 or SigMF recording to read instead of UDP [default=%(default)r]")
+    parser.add_argument(
+        "--gate", dest="gate", type=eng_float, default=0.0,
+        help="Set burst gate threshold in dB above the noise floor, 0 disables it [default=%(default)r]")
+    parser.add_argument(
+        "--resync", dest="resync", action='store_true',
+        help="Watch every FHSS channel while hopping, to find the hop sequence again after losing it")
+    parser.add_argument(
+        "--duration", dest="duration", type=eng_float, default=0.0,
+        help="Set seconds to run, 0 runs until interrupted [default=%(default)r]")
+    return parser
+
+
+def main(top_block_cls=elrs_receiver_headless, options=None):
+    if options is None:
+        options = argument_parser().parse_args()
+    tb = top_block_cls(binding_phrase=options.binding_phrase, payload_path=options.payload_path, log_path=options.log_path,
+                       udp_port=options.udp_port, freq_center=options.freq_center, wide_samp_rate=options.wide_samp_rate,
+                       freq_count=options.freq_count, bandwidth=options.bandwidth, stats_period=options.stats_period,
+                       disable=options.disable, channelize=options.channelize, input_path=options.input_path,
+                       gate=options.gate, resync=options.resync)
+
+    def sig_handler(sig=None, frame=None):
+        tb.stop()
+        tb.wait()
+
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, sig_handler)
+    signal.signal(signal.SIGTERM, sig_handler)
+
+    tb.start()
+
+    if options.duration > 0:
+        time.sleep(options.duration)
+        tb.stop()
+    tb.wait()
+
+
+if __name__ == '__main__':
+    main()
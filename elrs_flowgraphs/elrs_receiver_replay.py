@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+
+# Replays recorded IQ through the elrs_receiver_headless chain as fast as
+# the CPU allows: each file is read through a memory map, with no throttle
+# or UDP in between, and many files are spread over worker processes.
+# Prints the sample rate reached and the packets received for every file,
+# so receiver changes can be regression tested against a capture library.
+
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from gnuradio.eng_arg import eng_float, intx
+from gnuradio import eng_notation
+from elrs_sigmf import read_sigmf_meta
+
+# LinkTracker counters added up over all files. Only `received` counts
+# frames that passed the CRC and matched a new payload, the rest are
+# reported next to it.
+TOTAL_KEYS = ('received', 'lost', 'crc_failed', 'unknown', 'duplicate', 'stale')
+
+def replay_file(path: str, receiver_args: dict) -> dict:
+    # Imported here so a worker only pays for it once it has a file to replay
+    from elrs_receiver_headless import elrs_receiver_headless
+
+    result = {'file': path}
+    expected_rate = receiver_args['bandwidth'] * 2 * 448 / 5
+    recorded_rate = read_sigmf_meta(path).get('global', {}).get('core:sample_rate')
+    if recorded_rate and abs(recorded_rate - expected_rate) > 1:
+        result['warning'] = f'recorded at {recorded_rate:,.0f} samples/s, the receiver expects {expected_rate:,.0f}'
+
+    tb = elrs_receiver_headless(input_path=path, stats_period=0, **receiver_args)
+    started = time.perf_counter()
+    tb.run()
+    elapsed = time.perf_counter() - started
+
+    samples = tb.mmap_source_0.offset
+    summary = tb.epy_block_2.tracker.summary()
+    result.update(summary)
+    result['samples'] = samples
+    result['seconds'] = elapsed
+    result['samples_per_second'] = samples / elapsed if elapsed > 0 else 0.0
+    result['realtime'] = samples / expected_rate / elapsed if elapsed > 0 else 0.0
+    return result
+
+def replay_files(files: list[str], receiver_args: dict, workers: int = 0):
+    # Results in the order of `files`, one process per file at a time
+    if workers == 1 or len(files) < 2:
+        for file in files:
+            yield replay_file(file, receiver_args)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        yield from pool.map(replay_file, files, [receiver_args] * len(files))
+
+def format_failures(counts: dict) -> str:
+    return (f'{counts["crc_failed"]} failed CRC, {counts["unknown"]} unknown payloads, '
+            f'{counts["duplicate"]} duplicates, {counts["stale"]} stale')
+
+def print_result(result: dict):
+    print(f'{result["file"]}: {result["samples"]:,} samples in {result["seconds"]:.2f} s, '
+          f'{result["samples_per_second"] / 1e6:.2f} Msamples/s ({result["realtime"]:.1f}x real time), '
+          f'{result["received"]} packets received ({result["loss"]:.1%} lost); {format_failures(result)}')
+    if 'warning' in result:
+        print(f'Receiver Replay: {result["file"]}: {result["warning"]}', file=sys.stderr)
+
+def argument_parser():
+    parser = ArgumentParser(description='Replays recorded IQ through the ELRS receiver chain.')
+    parser.add_argument(
+        "inputs", nargs='+',
+        help="Complex64 or SigMF recordings to replay")
+    parser.add_argument(
+        "-j", "--workers", dest="workers", type=intx, default=0,
+        help="Set worker processes, 0 for one per CPU [default=%(default)r]")
+    parser.add_argument(
+        "--binding-phrase", dest="binding_phrase", type=str, default="TestBindingPhrase",
+        help="Set binding phrase [default=%(default)r]")
+    parser.add_argument(
+        "--payload-path", dest="payload_path", type=str, default='test.txt',
+        help="Set transmitted payload file, hex lines or .elrsp [default=%(default)r]")
+    parser.add_argument(
+        "--freq-center", dest="freq_center", type=eng_float, default=eng_notation.num_to_str(float(914700000)),
+        help="Set center frequency [default=%(default)r]")
+    parser.add_argument(
+        "--wide-samp-rate", dest="wide_samp_rate", type=eng_float, default=eng_notation.num_to_str(float(926900000 - 903500000)),
+        help="Set wideband sample rate [default=%(default)r]")
+    parser.add_argument(
+        "--freq-count", dest="freq_count", type=intx, default=20,
+        help="Set FHSS channel count [default=%(default)r]")
+    parser.add_argument(
+        "--bandwidth", dest="bandwidth", type=eng_float, default=eng_notation.num_to_str(float(125e3)),
+        help="Set LoRa bandwidth [default=%(default)r]")
+    parser.add_argument(
+        "--hop", dest="disable", action='store_false',
+        help="Enable frequency hopping")
+    parser.add_argument(
+        "--channelize", dest="channelize", action='store_true',
+        help="Decode every FHSS channel in parallel instead of following the hops")
+    parser.add_argument(
+        "--gate", dest="gate", type=eng_float, default=0.0,
+        help="Set burst gate threshold in dB above the noise floor, 0 disables it [default=%(default)r]")
+    parser.add_argument(
+        "--resync", dest="resync", action='store_true',
+        help="Watch every FHSS channel while hopping, to find the hop sequence again after losing it")
+    return parser
+
+def main(options=None):
+    if options is None:
+        options = argument_parser().parse_args()
+
+    receiver_args = {
+        'binding_phrase': options.binding_phrase,
+        'payload_path': options.payload_path,
+        'freq_center': options.freq_center,
+        'wide_samp_rate': options.wide_samp_rate,
+        'freq_count': options.freq_count,
+        'bandwidth': options.bandwidth,
+        'disable': options.disable,
+        'channelize': options.channelize,
+        'gate': options.gate,
+        'resync': options.resync,
+    }
+
+    files = [path for path in options.inputs if os.path.exists(path) or os.path.exists(path + '.sigmf-data')]
+    for path in sorted(set(options.inputs) - set(files)):
+        print(f'Receiver Replay: \'{path}\' does not exist, skipping it.', file=sys.stderr)
+
+    started = time.perf_counter()
+    samples = 0
+    totals = dict.fromkeys(TOTAL_KEYS, 0)
+    for result in replay_files(files, receiver_args, options.workers):
+        print_result(result)
+        samples += result['samples']
+        for key in TOTAL_KEYS:
+            totals[key] += result[key]
+    elapsed = time.perf_counter() - started
+
+    expected = totals['received'] + totals['lost']
+    loss = totals['lost'] / expected if expected else 0.0
+    print(f'Receiver Replay: {len(files)} files, {samples:,} samples in {elapsed:.2f} s '
+          f'({samples / elapsed / 1e6 if elapsed > 0 else 0.0:.2f} Msamples/s), '
+          f'{totals["received"]} packets received ({loss:.1%} lost); {format_failures(totals)}.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
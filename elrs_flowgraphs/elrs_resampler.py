@@ -0,0 +1,216 @@
+import sys
+import numpy as np
+from math import gcd
+from typing import NamedTuple, Optional
+from gnuradio import gr, filter
+
+# Window settings rational_resampler uses when it designs its own taps
+_DEFAULT_BETA = 7.0
+_DEFAULT_ATTEN = _DEFAULT_BETA / 0.1102 + 8.7
+
+class ResamplerStage(NamedTuple):
+    interp: int
+    decim: int
+    taps: np.ndarray
+    in_rate: float
+    out_rate: float
+
+    @property
+    def macs_per_output(self) -> int:
+        # Polyphase, one branch of the filter per output sample
+        return -(-len(self.taps) // self.interp)
+
+class ResamplerPlan(NamedTuple):
+    interp: int
+    decim: int
+    stages: tuple
+    macs_per_output: float         # per output sample of the last stage
+    single_stage_macs: float       # what one rational_resampler with designed taps costs
+
+    def report(self) -> str:
+        lines = [f'{self.interp}/{self.decim} from {self.stages[0].in_rate:,.0f} to {self.stages[-1].out_rate:,.0f} samples/s']
+        for i, stage in enumerate(self.stages):
+            share = stage.macs_per_output * stage.out_rate / self.stages[-1].out_rate
+            lines.append(f'  stage {i}: {stage.interp}/{stage.decim}, {len(stage.taps)} taps, '
+                         f'{stage.macs_per_output} MACs at {stage.out_rate:,.0f} samples/s, {share:.1f} per output')
+        lines.append(f'  {self.macs_per_output:.1f} MACs per output sample, '
+                     f'single stage {self.single_stage_macs:.1f} ({self.single_stage_macs / self.macs_per_output:.1f}x)')
+        return '\n'.join(lines)
+
+def estimate_taps(samp_rate: float, transition: float, atten: float) -> int:
+    # Same estimate as firdes, always odd
+    ntaps = int(atten * samp_rate / (22.0 * transition))
+    return ntaps | 1
+
+def kaiser_taps(samp_rate: float, transition: float, atten: float) -> int:
+    # Kaiser's length formula, firdes' estimate above falls short of `atten`
+    ntaps = int(np.ceil((atten - 7.95) / (14.36 * transition / samp_rate))) + 1
+    return ntaps | 1
+
+def design_lowpass(gain: float, samp_rate: float, cutoff: float, transition: float, atten: float = _DEFAULT_ATTEN) -> np.ndarray:
+    """
+    Kaiser-windowed sinc low pass with the DC gain `gain`, long enough to
+    really reach `atten` in the stopband.
+    """
+    ntaps = kaiser_taps(samp_rate, transition, atten)
+    beta = 0.1102 * (atten - 8.7) if atten > 50 else 0.5842 * (atten - 21) ** 0.4 + 0.07886 * (atten - 21)
+    n = np.arange(ntaps) - (ntaps - 1) / 2
+    taps = np.sinc(2 * cutoff / samp_rate * n) * np.kaiser(ntaps, max(beta, 0.0))
+    return (taps * gain / taps.sum()).astype(np.float32)
+
+def single_stage_macs(interp: int, decim: int, fractional_bw: float = 0.4) -> float:
+    """
+    MACs per output sample of rational_resampler_ccc with `taps=[]`, using
+    the filter it designs for itself.
+    """
+    divisor = gcd(interp, decim)
+    interp, decim = interp // divisor, decim // divisor
+    if fractional_bw <= 0:
+        fractional_bw = 0.4
+    rate = interp / decim
+    transition = (0.5 - fractional_bw) * min(rate, 1.0)
+    return -(-estimate_taps(interp, transition, _DEFAULT_ATTEN) // interp)
+
+def _factorizations(n: int, count: int):
+    # Ordered ways to write n as a product of `count` factors of at least 2
+    if count == 1:
+        if n >= 2:
+            yield (n,)
+        return
+    for factor in range(2, n + 1):
+        if n % factor == 0:
+            for rest in _factorizations(n // factor, count - 1):
+                yield (factor,) + rest
+
+def _divisors(n: int) -> list:
+    return [d for d in range(1, n + 1) if n % d == 0]
+
+def _decimation_stages(factors, interp, decim, in_rate, passband, stopband, atten) -> Optional[list]:
+    stages = []
+    rate = in_rate
+    for factor in factors:
+        out_rate = rate / factor
+        # Anything that aliases onto the wanted band must be gone, aliases
+        # landing above `stopband` are taken out by a later stage
+        stop = out_rate - stopband
+        if stop <= passband:
+            return None
+        taps = design_lowpass(1.0, rate, (passband + stop) / 2, stop - passband, atten)
+        stages.append(ResamplerStage(1, factor, taps, rate, out_rate))
+        rate = out_rate
+    if interp != decim:
+        upsampled = rate * interp
+        taps = design_lowpass(interp, upsampled, (passband + stopband) / 2, stopband - passband, atten)
+        stages.append(ResamplerStage(interp, decim, taps, rate, rate * interp / decim))
+    return stages
+
+def _mirror(stages: list) -> list:
+    # Same filters run backwards: the rational stage first, then the integer
+    # stages from narrowest to widest, each interpolating
+    mirrored = []
+    for stage in reversed(stages):
+        taps = stage.taps * (stage.decim / stage.interp)
+        mirrored.append(ResamplerStage(stage.decim, stage.interp, taps.astype(np.float32), stage.out_rate, stage.in_rate))
+    return mirrored
+
+def plan_resampler(interp: int, decim: int, samp_rate: float, fractional_bw: float = 0.4,
+                   atten: float = _DEFAULT_ATTEN, stages: Optional[int] = None, max_stages: int = 4) -> ResamplerPlan:
+    """
+    Splits an interp/decim conversion of a stream at `samp_rate` into integer
+    stages at the wideband end plus at most one small rational stage at the
+    narrowband end, picking the split and the order with the fewest MACs per
+    output sample. Interpolation is planned as the mirror image of the
+    matching decimation. `fractional_bw` keeps its rational_resampler
+    meaning: the passband edge as a fraction of the narrowband rate, with the
+    stopband at its Nyquist frequency. `stages` pins the number of stages,
+    as GRC flowgraphs need.
+    """
+    if fractional_bw <= 0:
+        fractional_bw = 0.4
+    divisor = gcd(interp, decim)
+    interp, decim = interp // divisor, decim // divisor
+    upsampling = interp > decim
+    # Plan everything as a decimation from the wideband rate
+    up, down = (decim, interp) if upsampling else (interp, decim)
+    wide_rate = samp_rate * interp / decim if upsampling else samp_rate
+    narrow_rate = wide_rate * up / down
+    passband = fractional_bw * narrow_rate
+    stopband = 0.5 * narrow_rate
+
+    stage_counts = [stages] if stages else range(1, max_stages + 1)
+    best = None
+    for integer_part in _divisors(down):
+        remaining = down // integer_part
+        if remaining < up:
+            continue
+        rational = 0 if remaining == up else 1
+        for count in stage_counts:
+            integer_count = count - rational
+            if integer_count < 0 or (integer_count == 0 and integer_part > 1):
+                continue
+            for factors in (_factorizations(integer_part, integer_count) if integer_count else [()]):
+                planned = _decimation_stages(factors, up, remaining, wide_rate, passband, stopband, atten)
+                if planned is None:
+                    continue
+                if upsampling:
+                    planned = _mirror(planned)
+                macs = sum(stage.macs_per_output * stage.out_rate for stage in planned) / planned[-1].out_rate
+                if best is None or macs < best[0]:
+                    best = (macs, planned)
+
+    if best is None:
+        raise ValueError(f'No {stages} stage plan for {interp}/{decim}.')
+    macs, planned = best
+    return ResamplerPlan(interp, decim, tuple(planned), macs, single_stage_macs(interp, decim, fractional_bw))
+
+class multistage_resampler(gr.hier_block2):
+    """
+    Drop-in replacement for one rational_resampler_ccc, running the cascade
+    from plan_resampler on stock FIR blocks: decimating FIR filters then a
+    rational stage going down, a rational stage then interpolating FIR
+    filters going up. With `center_freq` set on a decimating plan, the first
+    stage is a freq_xlating_fir_filter, so the frequency translation is done
+    at the wideband rate by the filter that already runs there. A ready
+    `plan` can be passed instead, and `first_stage` skips the stages some
+    other block runs, such as an xlating_decimator in front.
+    """
+    def __init__(self, interp=1, decim=1, samp_rate=1.0, fractional_bw=0.4, atten=_DEFAULT_ATTEN, stages=None, center_freq=None,
+                 plan=None, first_stage=0):
+        gr.hier_block2.__init__(self,
+            "multistage_resampler",
+            gr.io_signature(1, 1, gr.sizeof_gr_complex),
+            gr.io_signature(1, 1, gr.sizeof_gr_complex))
+
+        self.plan = plan if plan is not None else plan_resampler(interp, decim, samp_rate, fractional_bw, atten, stages)
+        self.xlating_filter = None
+
+        self.filters = []
+        for i, stage in enumerate(self.plan.stages[first_stage:]):
+            taps = stage.taps.tolist()
+            if stage.interp > 1 and stage.decim > 1:
+                block = filter.rational_resampler_ccf(stage.interp, stage.decim, taps)
+            elif stage.interp > 1:
+                block = filter.interp_fir_filter_ccf(stage.interp, taps)
+            elif i == 0 and center_freq is not None:
+                block = self.xlating_filter = filter.freq_xlating_fir_filter_ccf(stage.decim, taps, center_freq, stage.in_rate)
+            else:
+                block = filter.fir_filter_ccf(stage.decim, taps)
+            self.filters.append(block)
+
+        if center_freq is not None and self.xlating_filter is None:
+            print('Multistage Resampler: Frequency translation needs a decimating first stage, ignoring center_freq.')
+
+        self.connect(self, *self.filters, self)
+
+    def set_center_freq(self, center_freq):
+        if self.xlating_filter is not None:
+            self.xlating_filter.set_center_freq(center_freq)
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (4, 5):
+        print(f'Usage: {sys.argv[0]} <interp> <decim> <input samp_rate> [fractional_bw]')
+        sys.exit(1)
+
+    interp, decim, samp_rate = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+    fractional_bw = float(sys.argv[4]) if len(sys.argv) == 5 else 0.4
+    print(plan_resampler(interp, decim, samp_rate, fractional_bw).report())
@@ -0,0 +1,312 @@
+import os
+import json
+import mmap
+import time
+import numpy as np
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from gnuradio import gr
+
+SIGMF_VERSION = '1.0.0'
+SIGMF_DATA_SUFFIX = '.sigmf-data'
+SIGMF_META_SUFFIX = '.sigmf-meta'
+
+# File growth step, 256 MiB is about half a second of fc32 at 61.44 Msps
+DEFAULT_CHUNK_BYTES = 1 << 28
+
+def sigmf_paths(path: str) -> tuple[Path, Path]:
+    # Accepts the base name or either file of the dataset
+    base = Path(path)
+    if base.suffix in (SIGMF_DATA_SUFFIX, SIGMF_META_SUFFIX, '.sigmf'):
+        base = base.with_suffix('')
+    return base.with_name(base.name + SIGMF_DATA_SUFFIX), base.with_name(base.name + SIGMF_META_SUFFIX)
+
+def read_sigmf_meta(path: str) -> dict:
+    # Metadata of the dataset `path` belongs to, empty for a raw recording
+    meta_path = sigmf_paths(path)[1]
+    if not meta_path.is_file():
+        return {}
+    return json.loads(meta_path.read_text())
+
+def iso_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+class MappedWriter:
+    """
+    Appends to a file through a memory map of one `chunk_bytes` chunk at a
+    time. Each chunk is allocated on disk before it is mapped, so a full disk
+    shows up as an OSError from write() rather than a SIGBUS in the middle of
+    a copy, and the page cache writes it back in large aligned runs without a
+    system call per work() call. close() trims the file to what was written.
+    """
+    def __init__(self, path: Path, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self.chunk_bytes = max(-(-chunk_bytes // granularity) * granularity, granularity)
+        self.file = open(path, 'w+b')
+        self.size = 0
+        self.chunk_start = 0
+        self.map: Optional[mmap.mmap] = None
+
+    def map_chunk(self, chunk_start: int):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        end = chunk_start + self.chunk_bytes
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(self.file.fileno(), chunk_start, self.chunk_bytes)
+        else:
+            self.file.truncate(end)
+        self.map = mmap.mmap(self.file.fileno(), self.chunk_bytes, offset=chunk_start)
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self.map.madvise(mmap.MADV_SEQUENTIAL)
+        self.chunk_start = chunk_start
+
+    def write(self, data) -> int:
+        view = memoryview(np.ascontiguousarray(data)).cast('B')
+        written = 0
+        while written < len(view):
+            if self.map is None or self.size == self.chunk_start + self.chunk_bytes:
+                self.map_chunk(self.size)
+            offset = self.size - self.chunk_start
+            count = min(len(view) - written, self.chunk_bytes - offset)
+            self.map[offset:offset + count] = view[written:written + count]
+            written += count
+            self.size += count
+        return written
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.truncate(self.size)
+        self.file.close()
+
+class sigmf_sink(gr.sync_block):
+    """
+    Records complex samples as a SigMF dataset, `path`.sigmf-data written
+    through a MappedWriter and `path`.sigmf-meta written on stop().
+
+    With `trigger` set to a level in dB above the noise floor, only bursts
+    are kept: a burst opens at the first block of about 25 us above that
+    level and closes once the level has stayed below it for `post_roll`
+    seconds, and `pre_roll` seconds before the first loud block are kept
+    too. Each burst becomes a capture segment whose core:global_index is
+    the index of its first sample in the input stream, plus a "burst"
+    annotation over the same samples. With `trigger` at 0 everything is
+    recorded as one capture segment.
+    """
+    def __init__(self, path='', samp_rate=1.0, center_freq=0.0, description='', hw='', trigger=0.0,
+                 pre_roll=0.001, post_roll=0.002, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        gr.sync_block.__init__(self,
+            name='SigMF Sink',
+            in_sig=[np.complex64],
+            out_sig=None)
+
+        self.data_path, self.meta_path = sigmf_paths(path)
+        self.samp_rate = samp_rate
+        self.center_freq = center_freq
+        self.description = description
+        self.hw = hw
+        self.chunk_bytes = chunk_bytes
+        self.writer: Optional[MappedWriter] = None
+
+        self.trigger = 10 ** (trigger / 10) if trigger > 0 else 0.0
+        self.pre_len = int(pre_roll * samp_rate)
+        self.post_len = int(post_roll * samp_rate)
+        self.block_len = max(int(samp_rate * 2.5e-5), 16)
+
+        self.start_time = 0.0
+        self.captures: list[dict] = []
+        self.annotations: list[dict] = []
+        self.noise_floor: Optional[float] = None
+        self.recording = False
+        self.burst_file_start = 0     # first file sample of the open burst
+        self.last_loud = 0            # stream index just past the last loud block
+        self.written_until = 0        # stream index everything before has been handled
+        self.history = np.zeros(0, dtype=np.complex64)  # up to pre_len samples before the current call
+
+    def start(self) -> bool:
+        try:
+            self.writer = MappedWriter(self.data_path, self.chunk_bytes)
+        except OSError as e:
+            print(f'SigMF Sink: Failed to open \'{self.data_path}\'.\n', e)
+            return False
+        self.start_time = time.time()
+        self.captures.clear()
+        self.annotations.clear()
+        if not self.trigger:
+            self.captures.append(self.capture(0, 0))
+        return True
+
+    def stop(self) -> bool:
+        if self.writer is None:
+            return True
+        if self.recording:
+            self.close_burst()
+        self.writer.close()
+        self.write_meta()
+        self.writer = None
+        return True
+
+    def capture(self, file_start, stream_index) -> dict:
+        return {
+            'core:sample_start': file_start,
+            'core:global_index': stream_index,
+            'core:frequency': self.center_freq,
+            'core:datetime': iso_time(self.start_time + stream_index / self.samp_rate),
+        }
+
+    def write_meta(self):
+        meta = {
+            'global': {
+                'core:datatype': 'cf32_le',
+                'core:sample_rate': self.samp_rate,
+                'core:version': SIGMF_VERSION,
+                'core:description': self.description,
+                'core:hw': self.hw,
+                'core:recorder': 'elrs_flowgraphs',
+            },
+            'captures': self.captures,
+            'annotations': self.annotations,
+        }
+        try:
+            self.meta_path.write_text(json.dumps(meta, indent=2))
+        except OSError as e:
+            print(f'SigMF Sink: Failed to write \'{self.meta_path}\'.\n', e)
+
+    def file_samples(self) -> int:
+        return self.writer.size // 8
+
+    def open_burst(self, stream_index):
+        self.recording = True
+        self.burst_file_start = self.file_samples()
+        self.captures.append(self.capture(self.burst_file_start, stream_index))
+
+    def close_burst(self):
+        self.recording = False
+        count = self.file_samples() - self.burst_file_start
+        if count:
+            self.annotations.append({
+                'core:sample_start': self.burst_file_start,
+                'core:sample_count': count,
+                'core:label': 'burst',
+            })
+
+    def block_powers(self, samples) -> np.ndarray:
+        power = samples.real ** 2 + samples.imag ** 2
+        # The last block may be short
+        return np.add.reduceat(power, np.arange(0, len(samples), self.block_len)) / self.block_len
+
+    def write(self, samples):
+        try:
+            self.writer.write(samples)
+        except OSError as e:
+            # Usually a full disk, keep what made it into the file
+            print('SigMF Sink: Write failed, recording stopped.\n', e)
+            self.stop()
+
+    def gate(self, in0, first):
+        n = len(in0)
+        powers = self.block_powers(in0)
+        if self.noise_floor is None:
+            self.noise_floor = float(np.median(powers))
+        loud = powers > self.noise_floor * self.trigger
+        if not loud.all():
+            self.noise_floor = 0.9 * self.noise_floor + 0.1 * float(powers[~loud].mean())
+
+        loud_starts = first + np.flatnonzero(loud) * self.block_len
+        loud_ends = np.minimum(loud_starts + self.block_len, first + n)
+        i = 0
+        pos = first
+        while self.writer is not None:
+            if self.recording:
+                # Loud blocks closer than post_roll keep the burst open
+                while i < len(loud_starts) and loud_starts[i] - self.last_loud <= self.post_len:
+                    self.last_loud = int(loud_ends[i])
+                    i += 1
+                stop = self.last_loud + self.post_len
+                if stop > first + n:
+                    self.write(in0[pos - first:])
+                    self.written_until = first + n
+                    break
+                self.write(in0[pos - first:stop - first])
+                if self.writer is None:
+                    break
+                self.close_burst()
+                pos = self.written_until = stop
+            else:
+                while i < len(loud_starts) and loud_ends[i] <= pos:
+                    i += 1
+                if i == len(loud_starts):
+                    break
+                # Pre-roll, without going back into the previous burst
+                start = max(int(loud_starts[i]) - self.pre_len, self.written_until, first - len(self.history))
+                self.open_burst(start)
+                if start < first:
+                    self.write(self.history[len(self.history) - (first - start):])
+                pos = max(start, first)
+                self.last_loud = int(loud_ends[i])
+                i += 1
+
+        # Keep the last pre_len samples for the next call's pre-roll
+        if self.pre_len:
+            if n >= self.pre_len:
+                self.history = in0[n - self.pre_len:].copy()
+            else:
+                self.history = np.concatenate([self.history, in0])[-self.pre_len:]
+
+    def work(self, input_items, output_items):
+        in0 = input_items[0]
+        if self.writer is not None:
+            if self.trigger:
+                self.gate(in0, self.nitems_read(0))
+            else:
+                self.write(in0)
+        return len(in0)
+
+class mmap_source(gr.sync_block):
+    """
+    Streams a raw complex64 recording, or the data file of a SigMF dataset,
+    straight out of a memory map with no throttle, so a replay runs as fast
+    as the blocks downstream allow. Ends the flowgraph at the end of the
+    file, or starts over with `repeat`.
+    """
+    def __init__(self, path='', repeat=False):
+        gr.sync_block.__init__(self,
+            name='Mmap Source',
+            in_sig=None,
+            out_sig=[np.complex64])
+
+        self.path = Path(path)
+        if self.path.suffix in (SIGMF_DATA_SUFFIX, SIGMF_META_SUFFIX, '.sigmf') or not self.path.exists():
+            self.path = sigmf_paths(path)[0]
+        self.repeat = repeat
+        self.data = np.zeros(0, dtype=np.complex64)
+        self.offset = 0
+
+    def start(self) -> bool:
+        try:
+            if self.path.stat().st_size >= 8:
+                self.data = np.memmap(self.path, dtype=np.complex64, mode='r')
+        except OSError as e:
+            print(f'Mmap Source: Failed to map \'{self.path}\'.\n', e)
+            return False
+        self.offset = 0
+        return True
+
+    def stop(self) -> bool:
+        # Drops the mapping, the array is all that holds it
+        self.data = np.zeros(0, dtype=np.complex64)
+        return True
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        if self.offset >= len(self.data):
+            if not self.repeat or len(self.data) == 0:
+                return -1
+            self.offset = 0
+        n = min(len(out), len(self.data) - self.offset)
+        out[:n] = self.data[self.offset:self.offset + n]
+        self.offset += n
+        return n
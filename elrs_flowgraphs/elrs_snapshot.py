@@ -0,0 +1,126 @@
+import os
+import json
+import struct
+import numpy as np
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Optional
+
+# On-disk warm-start cache for precomputed tables. Each snapshot file holds a
+# single array behind a small header and is memory-mapped when loaded, so a
+# restarted flowgraph skips rebuilding FHSS sequences, CRC tables and parsed
+# payload files.
+#
+# File layout:
+#   magic (8 bytes) | format version (u32) | meta length (u32) | meta JSON
+#   | padding to a 64 byte boundary | raw array data
+SNAPSHOT_MAGIC = b'ELRSSNAP'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = Path(os.environ.get('ELRS_SNAPSHOT_DIR', Path.home() / '.cache' / 'elrs_flowgraphs'))
+
+_HEADER = struct.Struct('<8sII')
+_DATA_ALIGN = 64
+
+def snapshot_path(name: str, key: str) -> Path:
+    digest = sha256(key.encode('utf-8')).hexdigest()[:32]
+    return SNAPSHOT_DIR / f'{name}-{digest}.snap'
+
+def read_meta(path: Path) -> Optional[dict]:
+    try:
+        with open(path, 'rb') as file:
+            magic, version, meta_len = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            return json.loads(file.read(meta_len).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+
+def load_snapshot(name: str, key: str) -> Optional[np.ndarray]:
+    path = snapshot_path(name, key)
+    meta = read_meta(path)
+    # The digest only names the file, the full key guards against collisions
+    if meta is None or meta.get('key') != key:
+        return None
+
+    dtype = np.dtype(meta['dtype'])
+    shape = tuple(meta['shape'])
+    if int(np.prod(shape)) == 0:
+        array = np.empty(shape, dtype=dtype)
+        array.setflags(write=False)
+        return array
+
+    try:
+        return np.memmap(path, dtype=dtype, mode='r', offset=meta['offset'], shape=shape)
+    except (OSError, ValueError) as e:
+        print(f'ELRS Snapshot: Failed to map \'{path}\'.\n', e)
+        return None
+
+def save_snapshot(name: str, key: str, array: np.ndarray, group: str = '') -> bool:
+    path = snapshot_path(name, key)
+    array = np.ascontiguousarray(array)
+
+    meta = {'key': key, 'group': group, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+    # The data offset is part of the meta block, so size it with a placeholder first
+    meta_len = len(json.dumps(meta).encode('utf-8')) + 16
+    meta['offset'] = -(-(_HEADER.size + meta_len) // _DATA_ALIGN) * _DATA_ALIGN
+    meta_bytes = json.dumps(meta).encode('utf-8').ljust(meta_len)
+
+    tmp_path = path.with_suffix(f'.tmp{os.getpid()}')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, meta_len))
+            file.write(meta_bytes)
+            file.write(b'\0' * (meta['offset'] - _HEADER.size - meta_len))
+            file.write(array.tobytes())
+        # Readers either see the old snapshot or the complete new one
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f'ELRS Snapshot: Failed to write \'{path}\'.\n', e)
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
+
+    if group:
+        prune_snapshots(name, group, path)
+    return True
+
+def prune_snapshots(name: str, group: str, keep: Path):
+    # Drops the snapshots an older version of the same source left behind
+    for path in SNAPSHOT_DIR.glob(f'{name}-*.snap'):
+        if path == keep:
+            continue
+        meta = read_meta(path)
+        if meta is not None and meta.get('group') == group:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+def cached_array(name: str, key_parts: tuple, build: Callable[[], np.ndarray], group: str = '') -> np.ndarray:
+    """
+    Returns the snapshot stored for `name` and `key_parts`, or runs `build`
+    and stores its result for the next launch. The result is always read-only.
+    Storing a new snapshot removes the others of `name` in the same `group`,
+    e.g. those of a source file that has since been edited.
+
+    The key only covers the inputs, so callers put a version of their
+    builder in `key_parts` and bump it whenever the builder's output
+    changes. Leaving the version out of `group` lets the new snapshot prune
+    the ones the old builder made.
+    """
+    key = repr(key_parts)
+    array = load_snapshot(name, key)
+    if array is None:
+        array = np.array(build())
+        save_snapshot(name, key, array, group)
+        array.setflags(write=False)
+    return array
+
+def file_key(path: Path) -> tuple:
+    # Identify a source file by location, size and modification time, so an
+    # edited file is reparsed without having to hash its contents
+    stat = Path(path).stat()
+    return (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,154 @@
+import pmt
+import numpy as np
+from collections import deque
+from gnuradio import gr
+
+def prototype_taps(fft_len: int, taps_per_branch: int, beta: float = 8.0) -> np.ndarray:
+    """
+    Kaiser-windowed sinc low pass cut off at one bin spacing (1 / fft_len
+    cycles per output sample), with a DC gain of fft_len / 2 so the
+    interpolation leaves the signal level unchanged.
+    """
+    length = fft_len * taps_per_branch
+    n = np.arange(length) - (length - 1) / 2
+    taps = np.sinc(2 * n / fft_len) * np.kaiser(length, beta)
+    return (taps * (fft_len / 2) / taps.sum()).astype(np.float32)
+
+class pfb_synthesizer(gr.interp_block):
+    """
+    Combines several narrowband streams into one wideband stream with a 2x
+    oversampled polyphase synthesis filterbank, replacing a wideband
+    resampler, mixer and adder per emitter. Input i runs at
+    2 * samp_rate / fft_len and is placed on the nearest of the `fft_len`
+    bins to its frequency. The rest of the offset, at most half a bin, is
+    mixed in at the input rate. Streams sharing a bin are summed before the
+    filterbank, so each output sample costs one shared IFFT and one
+    prototype filter whatever the number of inputs.
+
+    Hops are taken the same way as by hopping_nco: "hop" messages holding a
+    (key, freq) pair or a bare value, where vector values give one frequency
+    per input, applied at the next `trigger_tag` tag on that input or, without
+    a trigger tag, at the start of the next work call. Tags with key
+    `freq_tag` retune their input at the tagged sample. Every frequency gets
+    `freq_offset` added. The bin oscillators run off the absolute sample
+    count, so a hop lands phase coherent on its bin but is not phase
+    continuous with the previous one, which is harmless in the gap between
+    LoRa frames where the trigger tags put it.
+    """
+    def __init__(self, samp_rate=1.0, freqs=[0.0], freq_offset=0.0, fft_len=128, taps_per_branch=12, trigger_tag='', freq_tag='freq'):
+        self.inputs = len(freqs)
+        self.fft_len = fft_len
+        self.interp = fft_len // 2
+        gr.interp_block.__init__(self,
+            name='PFB Synthesizer',
+            in_sig=[np.complex64] * self.inputs,
+            out_sig=[np.complex64],
+            interp=self.interp)
+
+        self.samp_rate = samp_rate
+        self.freq_offset = freq_offset
+        self.trigger_tag = trigger_tag
+        self.freq_tag = freq_tag
+
+        self.taps = prototype_taps(fft_len, taps_per_branch)
+        self.tail = np.zeros(len(self.taps) - self.interp, dtype=np.complex64)
+        # (-1)^(k * m) for every bin k, indexed by the parity of input sample m
+        self.bin_signs = np.stack([np.ones(fft_len), (-1.0) ** np.arange(fft_len)]).astype(np.complex64)
+
+        self.bins = np.zeros(self.inputs, dtype=np.intp)
+        self.residuals = np.zeros(self.inputs)
+        self.phases = np.zeros(self.inputs)
+        for i, freq in enumerate(freqs):
+            self.retune(i, freq + freq_offset)
+
+        # Written from the message thread, read from work()
+        self.immediate = [deque() for _ in range(self.inputs)]
+        self.triggered = [deque() for _ in range(self.inputs)]
+
+        self.message_port_register_in(pmt.intern("hop"))
+        self.set_msg_handler(pmt.intern("hop"), self.handle_msg)
+
+    def retune(self, index, freq):
+        # Nearest bin, and the remainder in cycles per input sample
+        position = (freq / self.samp_rate) * self.fft_len
+        bin_index = int(np.round(position))
+        self.bins[index] = bin_index % self.fft_len
+        self.residuals[index] = (position - bin_index) / 2
+
+    def set_frequencies(self, freqs):
+        for i, freq in enumerate(freqs[:self.inputs]):
+            self.immediate[i].append(freq + self.freq_offset)
+
+    def set_sampling_freq(self, samp_rate):
+        self.samp_rate = samp_rate
+
+    def to_freqs(self, value) -> list:
+        freqs = np.atleast_1d(np.asarray(pmt.to_python(value), dtype=float))
+        if len(freqs) == 1:
+            freqs = np.repeat(freqs, self.inputs)
+        return (freqs[:self.inputs] + self.freq_offset).tolist()
+
+    def handle_msg(self, msg):
+        freqs = self.to_freqs(pmt.cdr(msg) if pmt.is_pair(msg) else msg)
+        queues = self.triggered if self.trigger_tag else self.immediate
+        for queue, freq in zip(queues, freqs):
+            queue.append(freq)
+
+    def hops(self, index, n) -> list:
+        first = self.nitems_read(index)
+        hops = []
+        queue = self.immediate[index]
+        while queue:
+            hops.append((0, queue.popleft()))
+        for tag in self.get_tags_in_window(index, 0, n):
+            key = pmt.symbol_to_string(tag.key)
+            if key == self.freq_tag:
+                hops.append((tag.offset - first, self.to_freqs(tag.value)[index]))
+            elif key == self.trigger_tag and self.triggered[index]:
+                hops.append((tag.offset - first, self.triggered[index].popleft()))
+        # Stable sort, so later hops on the same sample win
+        hops.sort(key=lambda hop: hop[0])
+        return hops
+
+    def load(self, bins, index, samples, start, end):
+        # Fine tune by the residual, keeping the phase across calls and hops
+        if start >= end:
+            return
+        residual = 2 * np.pi * self.residuals[index]
+        phase = self.phases[index] + residual * np.arange(end - start)
+        bins[start:end, self.bins[index]] += samples[start:end] * np.exp(1j * phase).astype(np.complex64)
+        self.phases[index] = (self.phases[index] + residual * (end - start)) % (2 * np.pi)
+
+    def work(self, input_items, output_items):
+        out = output_items[0]
+        n = len(out) // self.interp
+        if n == 0:
+            return 0
+
+        # Bin contents per input sample, every input summed into its bin
+        bins = np.zeros((n, self.fft_len), dtype=np.complex64)
+        for index in range(self.inputs):
+            start = 0
+            for offset, freq in self.hops(index, n):
+                self.load(bins, index, input_items[index], start, offset)
+                start = offset
+                self.retune(index, freq)
+            self.load(bins, index, input_items[index], start, n)
+
+        # Output sample m * interp + p gets taps[p] * ifft(bins[m])[p % fft_len]
+        # from every input sample m still under the filter
+        parity = (self.nitems_read(0) + np.arange(n)) % 2
+        bins *= self.bin_signs[parity]
+        branches = np.fft.ifft(bins, axis=1).astype(np.complex64) * self.fft_len
+        segments = np.tile(branches, (1, len(self.taps) // self.fft_len)) * self.taps
+
+        # Overlap-add, one hop of interp samples per input sample
+        total = n * self.interp
+        acc = np.zeros(total + len(self.tail), dtype=np.complex64)
+        acc[:len(self.tail)] = self.tail
+        for q in range(len(self.taps) // self.interp):
+            acc[q * self.interp:q * self.interp + total] += segments[:, q * self.interp:(q + 1) * self.interp].reshape(-1)
+        out[:total] = acc[:total]
+        self.tail = acc[total:].copy()
+
+        return total
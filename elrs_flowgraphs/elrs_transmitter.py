@@ -24,7 +24,6 @@ from PyQt5 import Qt
 from gnuradio import qtgui
 from gnuradio.filter import firdes
 import sip
-from gnuradio import analog
 from gnuradio import blocks
 import pmt
 from gnuradio import filter
@@ -35,12 +34,11 @@ import signal
 from argparse import ArgumentParser
 from gnuradio.eng_arg import eng_float, intx
 from gnuradio import eng_notation
-import elrs_transmitter_epy_block_0 as epy_block_0  # embedded python block
-import elrs_transmitter_epy_block_0_0 as epy_block_0_0  # embedded python block
-import elrs_transmitter_epy_block_0_1 as epy_block_0_1  # embedded python block
-import elrs_transmitter_epy_block_0_2 as epy_block_0_2  # embedded python block
-import elrs_transmitter_epy_block_0_3 as epy_block_0_3  # embedded python block
 import elrs_transmitter_epy_block_1 as epy_block_1  # embedded python block
+import elrs_transmitter_epy_block_2 as epy_block_2  # embedded python block
+import elrs_transmitter_epy_block_3 as epy_block_3  # embedded python block
+import elrs_transmitter_epy_block_4 as epy_block_4  # embedded python block
+import elrs_resampler
 import gnuradio.lora_sdr as lora_sdr
 
 
@@ -88,11 +86,8 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
         self.bandwidth = bandwidth = 125e3
         self.sf = sf = 10
         self.samp_rate = samp_rate = bandwidth*2
-        self.freq_temp_4 = freq_temp_4 = freq_center
-        self.freq_temp_3 = freq_temp_3 = freq_center
-        self.freq_temp_2 = freq_temp_2 = freq_center
-        self.freq_temp_1 = freq_temp_1 = freq_center
-        self.freq_temp = freq_temp = freq_center
+        self.rx_resampler = rx_resampler = elrs_resampler.plan_resampler(5, 448, samp_rate * 448 / 5, 0.04, stages=3)
+        self.freq_temps = freq_temps = [freq_center] * 5
         self.freq_stop = freq_stop = freq_center + (wide_samp_rate // 2)
         self.freq_start = freq_start = freq_center - (wide_samp_rate // 2)
         self.freq_count = freq_count = 40
@@ -106,35 +101,35 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
         # Blocks
         ##################################################
         self.rational_resampler_xxx_0_1_0_0_0 = filter.rational_resampler_ccc(
-                interpolation=448,
+                interpolation=7,
                 decimation=5,
                 taps=[],
-                fractional_bw=0.04)
+                fractional_bw=0.4)
         self.rational_resampler_xxx_0_1_0_0 = filter.rational_resampler_ccc(
-                interpolation=448,
+                interpolation=7,
                 decimation=5,
                 taps=[],
-                fractional_bw=0.04)
+                fractional_bw=0.4)
         self.rational_resampler_xxx_0_1_0 = filter.rational_resampler_ccc(
-                interpolation=448,
+                interpolation=7,
                 decimation=5,
                 taps=[],
-                fractional_bw=0.04)
+                fractional_bw=0.4)
         self.rational_resampler_xxx_0_1 = filter.rational_resampler_ccc(
-                interpolation=448,
+                interpolation=7,
                 decimation=5,
                 taps=[],
-                fractional_bw=0.04)
-        self.rational_resampler_xxx_0_0 = filter.rational_resampler_ccc(
-                interpolation=5,
-                decimation=448,
-                taps=[],
-                fractional_bw=0.04)
+                fractional_bw=0.4)
+        self.rational_resampler_xxx_0_0 = filter.rational_resampler_ccf(
+                interpolation=rx_resampler.stages[2].interp,
+                decimation=rx_resampler.stages[2].decim,
+                taps=rx_resampler.stages[2].taps.tolist(),
+                fractional_bw=0)
         self.rational_resampler_xxx_0 = filter.rational_resampler_ccc(
-                interpolation=448,
+                interpolation=7,
                 decimation=5,
                 taps=[],
-                fractional_bw=0.04)
+                fractional_bw=0.4)
         self.qtgui_waterfall_sink_x_0 = qtgui.waterfall_sink_c(
             512, #size
             window.WIN_RECTANGULAR, #wintype
@@ -211,79 +206,48 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
             sf=7,
          ldro_mode=2,frame_zero_padd=1280,sync_word=[0x12] )
         self.lora_rx_0 = lora_sdr.lora_sdr_lora_rx( bw=int(bandwidth), cr=1, has_crc=True, impl_head=True, pay_len=6, samp_rate=int(samp_rate), sf=7, sync_word=[0x12], soft_decoding=True, ldro_mode=0, print_rx=[True,True])
+        self.fir_filter_xxx_1 = filter.fir_filter_ccf(rx_resampler.stages[1].decim, rx_resampler.stages[1].taps.tolist())
+        self.fir_filter_xxx_1.declare_sample_delay(0)
+        self.fir_filter_xxx_0 = filter.fir_filter_ccf(rx_resampler.stages[0].decim, rx_resampler.stages[0].taps.tolist())
+        self.fir_filter_xxx_0.declare_sample_delay(0)
+        self.epy_block_4 = epy_block_4.hopping_nco(samp_rate=wide_samp_rate, center_freq=freq_temps[0], freq_offset=-3.7e3, downconvert=True, emitter=0)
+        self.epy_block_3 = epy_block_3.pfb_synthesizer(samp_rate=wide_samp_rate, freqs=freq_temps, freq_offset=-3.7e3, fft_len=128, taps_per_branch=12, trigger_tag='frame_len')
+        self.epy_block_2 = epy_block_2.multi_fhss_controller(binding_phrases=[binding_phrase + str(i) for i in range(5)], freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
         self.epy_block_1 = epy_block_1.counter_formatter(packet_count=2000)
-        self.epy_block_0_3 = epy_block_0_3.fhss_controller(binding_phrase=binding_phrase + "4", freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.epy_block_0_2 = epy_block_0_2.fhss_controller(binding_phrase=binding_phrase + "3", freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.epy_block_0_1 = epy_block_0_1.fhss_controller(binding_phrase=binding_phrase + "2", freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.epy_block_0_0 = epy_block_0_0.fhss_controller(binding_phrase=binding_phrase + "1", freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.epy_block_0 = epy_block_0.fhss_controller(binding_phrase=binding_phrase + "0", freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
-        self.blocks_multiply_xx_0_0_0_0_0 = blocks.multiply_vcc(1)
-        self.blocks_multiply_xx_0_0_0_0 = blocks.multiply_vcc(1)
-        self.blocks_multiply_xx_0_0_0 = blocks.multiply_vcc(1)
-        self.blocks_multiply_xx_0_0 = blocks.multiply_vcc(1)
-        self.blocks_multiply_xx_0 = blocks.multiply_vcc(1)
-        self.blocks_msgpair_to_var_0_0_0_0_0 = blocks.msg_pair_to_var(self.set_freq_temp_4)
-        self.blocks_msgpair_to_var_0_0_0_0 = blocks.msg_pair_to_var(self.set_freq_temp_3)
-        self.blocks_msgpair_to_var_0_0_0 = blocks.msg_pair_to_var(self.set_freq_temp_2)
-        self.blocks_msgpair_to_var_0_0 = blocks.msg_pair_to_var(self.set_freq_temp_1)
-        self.blocks_msgpair_to_var_0 = blocks.msg_pair_to_var(self.set_freq_temp)
         self.blocks_message_strobe_0 = blocks.message_strobe(pmt.intern(""), 1000 // 50)
         self.blocks_file_sink_0 = blocks.file_sink(gr.sizeof_char*1, '/home/gabriel/GNU_Radio_ExpressLRS/results/elrs_0', False)
         self.blocks_file_sink_0.set_unbuffered(False)
-        self.blocks_divide_xx_0 = blocks.divide_cc(1)
-        self.blocks_add_xx_0 = blocks.add_vcc(1)
-        self.analog_sig_source_x_0_0_0_0_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp_1 - 3.7e3, 1, 0, 0)
-        self.analog_sig_source_x_0_0_0_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp_1 - 3.7e3, 1, 0, 0)
-        self.analog_sig_source_x_0_0_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp_1 - 3.7e3, 1, 0, 0)
-        self.analog_sig_source_x_0_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp_1 - 3.7e3, 1, 0, 0)
-        self.analog_sig_source_x_0 = analog.sig_source_c(wide_samp_rate, analog.GR_COS_WAVE, freq_temp - 3.7e3, 1, 0, 0)
 
 
         ##################################################
         # Connections
         ##################################################
         self.msg_connect((self.blocks_message_strobe_0, 'strobe'), (self.epy_block_1, 'msg_in'))
-        self.msg_connect((self.epy_block_0, 'msg_out'), (self.blocks_msgpair_to_var_0, 'inpair'))
-        self.msg_connect((self.epy_block_0_0, 'msg_out'), (self.blocks_msgpair_to_var_0_0, 'inpair'))
-        self.msg_connect((self.epy_block_0_1, 'msg_out'), (self.blocks_msgpair_to_var_0_0_0, 'inpair'))
-        self.msg_connect((self.epy_block_0_2, 'msg_out'), (self.blocks_msgpair_to_var_0_0_0_0, 'inpair'))
-        self.msg_connect((self.epy_block_0_3, 'msg_out'), (self.blocks_msgpair_to_var_0_0_0_0_0, 'inpair'))
-        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_0, 'msg_in'))
-        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_0_0, 'msg_in'))
-        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_0_1, 'msg_in'))
-        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_0_2, 'msg_in'))
-        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_0_3, 'msg_in'))
+        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_2, 'msg_in'))
         self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_tx_0, 'in'))
         self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_tx_0_0, 'in'))
         self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_tx_0_0_0, 'in'))
         self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_tx_0_0_0_0, 'in'))
         self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_tx_0_0_0_0_0, 'in'))
-        self.connect((self.analog_sig_source_x_0, 0), (self.blocks_divide_xx_0, 1))
-        self.connect((self.analog_sig_source_x_0, 0), (self.blocks_multiply_xx_0, 1))
-        self.connect((self.analog_sig_source_x_0_0, 0), (self.blocks_multiply_xx_0_0, 1))
-        self.connect((self.analog_sig_source_x_0_0_0, 0), (self.blocks_multiply_xx_0_0_0, 1))
-        self.connect((self.analog_sig_source_x_0_0_0_0, 0), (self.blocks_multiply_xx_0_0_0_0, 1))
-        self.connect((self.analog_sig_source_x_0_0_0_0_0, 0), (self.blocks_multiply_xx_0_0_0_0_0, 1))
-        self.connect((self.blocks_add_xx_0, 0), (self.blocks_divide_xx_0, 0))
-        self.connect((self.blocks_add_xx_0, 0), (self.qtgui_waterfall_sink_x_0, 0))
-        self.connect((self.blocks_divide_xx_0, 0), (self.rational_resampler_xxx_0_0, 0))
-        self.connect((self.blocks_multiply_xx_0, 0), (self.blocks_add_xx_0, 0))
-        self.connect((self.blocks_multiply_xx_0_0, 0), (self.blocks_add_xx_0, 1))
-        self.connect((self.blocks_multiply_xx_0_0_0, 0), (self.blocks_add_xx_0, 2))
-        self.connect((self.blocks_multiply_xx_0_0_0_0, 0), (self.blocks_add_xx_0, 3))
-        self.connect((self.blocks_multiply_xx_0_0_0_0_0, 0), (self.blocks_add_xx_0, 4))
+        self.msg_connect((self.epy_block_2, 'msg_out'), (self.epy_block_3, 'hop'))
+        self.msg_connect((self.epy_block_2, 'msg_out'), (self.epy_block_4, 'hop'))
+        self.connect((self.epy_block_3, 0), (self.epy_block_4, 0))
+        self.connect((self.epy_block_3, 0), (self.qtgui_waterfall_sink_x_0, 0))
+        self.connect((self.epy_block_4, 0), (self.fir_filter_xxx_0, 0))
+        self.connect((self.fir_filter_xxx_0, 0), (self.fir_filter_xxx_1, 0))
+        self.connect((self.fir_filter_xxx_1, 0), (self.rational_resampler_xxx_0_0, 0))
         self.connect((self.lora_rx_0, 0), (self.blocks_file_sink_0, 0))
         self.connect((self.lora_tx_0, 0), (self.rational_resampler_xxx_0, 0))
         self.connect((self.lora_tx_0_0, 0), (self.rational_resampler_xxx_0_1, 0))
         self.connect((self.lora_tx_0_0_0, 0), (self.rational_resampler_xxx_0_1_0, 0))
         self.connect((self.lora_tx_0_0_0_0, 0), (self.rational_resampler_xxx_0_1_0_0, 0))
         self.connect((self.lora_tx_0_0_0_0_0, 0), (self.rational_resampler_xxx_0_1_0_0_0, 0))
-        self.connect((self.rational_resampler_xxx_0, 0), (self.blocks_multiply_xx_0, 0))
+        self.connect((self.rational_resampler_xxx_0, 0), (self.epy_block_3, 0))
         self.connect((self.rational_resampler_xxx_0_0, 0), (self.lora_rx_0, 0))
-        self.connect((self.rational_resampler_xxx_0_1, 0), (self.blocks_multiply_xx_0_0, 0))
-        self.connect((self.rational_resampler_xxx_0_1_0, 0), (self.blocks_multiply_xx_0_0_0, 0))
-        self.connect((self.rational_resampler_xxx_0_1_0_0, 0), (self.blocks_multiply_xx_0_0_0_0, 0))
-        self.connect((self.rational_resampler_xxx_0_1_0_0_0, 0), (self.blocks_multiply_xx_0_0_0_0_0, 0))
+        self.connect((self.rational_resampler_xxx_0_1, 0), (self.epy_block_3, 1))
+        self.connect((self.rational_resampler_xxx_0_1_0, 0), (self.epy_block_3, 2))
+        self.connect((self.rational_resampler_xxx_0_1_0_0, 0), (self.epy_block_3, 3))
+        self.connect((self.rational_resampler_xxx_0_1_0_0_0, 0), (self.epy_block_3, 4))
 
 
     def closeEvent(self, event):
@@ -301,11 +265,8 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
         self.wide_samp_rate = wide_samp_rate
         self.set_freq_start(self.freq_center - (self.wide_samp_rate // 2))
         self.set_freq_stop(self.freq_center + (self.wide_samp_rate // 2))
-        self.analog_sig_source_x_0.set_sampling_freq(self.wide_samp_rate)
-        self.analog_sig_source_x_0_0.set_sampling_freq(self.wide_samp_rate)
-        self.analog_sig_source_x_0_0_0.set_sampling_freq(self.wide_samp_rate)
-        self.analog_sig_source_x_0_0_0_0.set_sampling_freq(self.wide_samp_rate)
-        self.analog_sig_source_x_0_0_0_0_0.set_sampling_freq(self.wide_samp_rate)
+        self.epy_block_3.samp_rate = self.wide_samp_rate
+        self.epy_block_4.samp_rate = self.wide_samp_rate
 
     def get_freq_center(self):
         return self.freq_center
@@ -314,16 +275,8 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
         self.freq_center = freq_center
         self.set_freq_start(self.freq_center - (self.wide_samp_rate // 2))
         self.set_freq_stop(self.freq_center + (self.wide_samp_rate // 2))
-        self.set_freq_temp(self.freq_center)
-        self.set_freq_temp_1(self.freq_center)
-        self.set_freq_temp_2(self.freq_center)
-        self.set_freq_temp_3(self.freq_center)
-        self.set_freq_temp_4(self.freq_center)
-        self.epy_block_0.freq_center = self.freq_center
-        self.epy_block_0_0.freq_center = self.freq_center
-        self.epy_block_0_1.freq_center = self.freq_center
-        self.epy_block_0_2.freq_center = self.freq_center
-        self.epy_block_0_3.freq_center = self.freq_center
+        self.set_freq_temps([self.freq_center] * 5)
+        self.epy_block_2.freq_center = self.freq_center
 
     def get_bandwidth(self):
         return self.bandwidth
@@ -343,52 +296,31 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
 
     def set_samp_rate(self, samp_rate):
         self.samp_rate = samp_rate
+        self.set_rx_resampler(elrs_resampler.plan_resampler(5, 448, self.samp_rate * 448 / 5, 0.04, stages=3))
 
-    def get_freq_temp_4(self):
-        return self.freq_temp_4
-
-    def set_freq_temp_4(self, freq_temp_4):
-        self.freq_temp_4 = freq_temp_4
-
-    def get_freq_temp_3(self):
-        return self.freq_temp_3
-
-    def set_freq_temp_3(self, freq_temp_3):
-        self.freq_temp_3 = freq_temp_3
-
-    def get_freq_temp_2(self):
-        return self.freq_temp_2
-
-    def set_freq_temp_2(self, freq_temp_2):
-        self.freq_temp_2 = freq_temp_2
-
-    def get_freq_temp_1(self):
-        return self.freq_temp_1
+    def get_rx_resampler(self):
+        return self.rx_resampler
 
-    def set_freq_temp_1(self, freq_temp_1):
-        self.freq_temp_1 = freq_temp_1
-        self.analog_sig_source_x_0_0.set_frequency(self.freq_temp_1 - 3.7e3)
-        self.analog_sig_source_x_0_0_0.set_frequency(self.freq_temp_1 - 3.7e3)
-        self.analog_sig_source_x_0_0_0_0.set_frequency(self.freq_temp_1 - 3.7e3)
-        self.analog_sig_source_x_0_0_0_0_0.set_frequency(self.freq_temp_1 - 3.7e3)
+    def set_rx_resampler(self, rx_resampler):
+        self.rx_resampler = rx_resampler
+        self.fir_filter_xxx_0.set_taps(self.rx_resampler.stages[0].taps.tolist())
+        self.fir_filter_xxx_1.set_taps(self.rx_resampler.stages[1].taps.tolist())
+        self.rational_resampler_xxx_0_0.set_taps(self.rx_resampler.stages[2].taps.tolist())
 
-    def get_freq_temp(self):
-        return self.freq_temp
+    def get_freq_temps(self):
+        return self.freq_temps
 
-    def set_freq_temp(self, freq_temp):
-        self.freq_temp = freq_temp
-        self.analog_sig_source_x_0.set_frequency(self.freq_temp - 3.7e3)
+    def set_freq_temps(self, freq_temps):
+        self.freq_temps = freq_temps
+        self.epy_block_3.freqs = self.freq_temps
+        self.epy_block_4.center_freq = self.freq_temps[0]
 
     def get_freq_stop(self):
         return self.freq_stop
 
     def set_freq_stop(self, freq_stop):
         self.freq_stop = freq_stop
-        self.epy_block_0.freq_stop = self.freq_stop
-        self.epy_block_0_0.freq_stop = self.freq_stop
-        self.epy_block_0_1.freq_stop = self.freq_stop
-        self.epy_block_0_2.freq_stop = self.freq_stop
-        self.epy_block_0_3.freq_stop = self.freq_stop
+        self.epy_block_2.freq_stop = self.freq_stop
         self.qtgui_waterfall_sink_x_0.set_frequency_range((self.freq_stop + self.freq_start) / 2, self.freq_stop - self.freq_start)
 
     def get_freq_start(self):
@@ -396,11 +328,7 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
 
     def set_freq_start(self, freq_start):
         self.freq_start = freq_start
-        self.epy_block_0.freq_start = self.freq_start
-        self.epy_block_0_0.freq_start = self.freq_start
-        self.epy_block_0_1.freq_start = self.freq_start
-        self.epy_block_0_2.freq_start = self.freq_start
-        self.epy_block_0_3.freq_start = self.freq_start
+        self.epy_block_2.freq_start = self.freq_start
         self.qtgui_waterfall_sink_x_0.set_frequency_range((self.freq_stop + self.freq_start) / 2, self.freq_stop - self.freq_start)
 
     def get_freq_count(self):
@@ -408,22 +336,14 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
 
     def set_freq_count(self, freq_count):
         self.freq_count = freq_count
-        self.epy_block_0.freq_count = self.freq_count
-        self.epy_block_0_0.freq_count = self.freq_count
-        self.epy_block_0_1.freq_count = self.freq_count
-        self.epy_block_0_2.freq_count = self.freq_count
-        self.epy_block_0_3.freq_count = self.freq_count
+        self.epy_block_2.freq_count = self.freq_count
 
     def get_disable(self):
         return self.disable
 
     def set_disable(self, disable):
         self.disable = disable
-        self.epy_block_0.disable = self.disable
-        self.epy_block_0_0.disable = self.disable
-        self.epy_block_0_1.disable = self.disable
-        self.epy_block_0_2.disable = self.disable
-        self.epy_block_0_3.disable = self.disable
+        self.epy_block_2.disable = self.disable
 
     def get_crc(self):
         return self.crc
@@ -448,11 +368,7 @@ class elrs_transmitter(gr.top_block, Qt.QWidget):
 
     def set_binding_phrase(self, binding_phrase):
         self.binding_phrase = binding_phrase
-        self.epy_block_0.binding_phrase = self.binding_phrase + "0"
-        self.epy_block_0_0.binding_phrase = self.binding_phrase + "1"
-        self.epy_block_0_1.binding_phrase = self.binding_phrase + "2"
-        self.epy_block_0_2.binding_phrase = self.binding_phrase + "3"
-        self.epy_block_0_3.binding_phrase = self.binding_phrase + "4"
+        self.epy_block_2.binding_phrases = [self.binding_phrase + str(i) for i in range(5)]
 
 
 
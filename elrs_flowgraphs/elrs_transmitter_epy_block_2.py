@@ -0,0 +1,74 @@
+import pmt
+import numpy as np
+from gnuradio import gr
+from elrs_fhss import FHSS_SEQUENCE_LEN, OTA_VERSION_ID, get_fhss_sequence, num_primary_bands
+
+class multi_fhss_controller(gr.sync_block):
+    """
+    Drives the hop sequences of several emitters from one message handler.
+    Every hop publishes a single ("freq_temps", f64vector) pair holding the
+    next mixer offset of each emitter, in binding phrase order.
+    """
+    def __init__(self, binding_phrases=[""], freq_start=0.0, freq_stop=0.0, freq_count=1, freq_center=0.0, disable=False):
+        gr.sync_block.__init__(self,
+            name='Multi FHSS Controller',
+            in_sig=None,
+            out_sig=None)
+
+        # Store parameters passed from GRC
+        self.binding_phrases = list(binding_phrases)
+        if not self.binding_phrases:
+            raise ValueError("Multi FHSS Controller needs at least one binding phrase.")
+        self.freq_start = freq_start
+        self.freq_stop = freq_stop
+        self.freq_count = freq_count
+        self.freq_center = freq_center
+        self.disable = disable
+        self.switch = False
+
+        # Register message ports
+        self.message_port_register_in(pmt.intern("msg_in"))
+        self.message_port_register_out(pmt.intern("msg_out"))
+        self.set_msg_handler(pmt.intern("msg_in"), self.handle_msg)
+
+        self.FHSS_SEQUENCE_LEN = FHSS_SEQUENCE_LEN
+        self.OTA_VERSION_ID = OTA_VERSION_ID
+        self.fhss_index = 0
+        self.msg_out = pmt.intern("msg_out")
+
+        self.build_hop_messages()
+
+    def build_hop_messages(self):
+        self.num_primary_bands = num_primary_bands(self.freq_count, self.FHSS_SEQUENCE_LEN)
+
+        # One row per hop, one column per emitter
+        frequencies = [get_fhss_sequence(phrase, self.freq_start, self.freq_stop, self.freq_count, self.OTA_VERSION_ID).frequencies
+                       for phrase in self.binding_phrases]
+        self.hop_offsets = np.stack(frequencies, axis=1) - self.freq_center + 3.7e6 # Temp fix
+
+        key = pmt.intern("freq_temps")
+        emitter_count = len(self.binding_phrases)
+        self.hop_msgs = [pmt.cons(key, pmt.init_f64vector(emitter_count, offsets)) for offsets in self.hop_offsets.tolist()]
+        disabled_offsets = [self.freq_center + 3.7e6] * emitter_count # Temp fix
+        self.disabled_msg = pmt.cons(key, pmt.init_f64vector(emitter_count, disabled_offsets))
+
+    def start(self):
+        # Pick up any parameter changes made through the top block setters
+        self.build_hop_messages()
+        self.fhss_index %= max(self.num_primary_bands, 1)
+        return True
+
+    def handle_msg(self, msg):
+        if not self.disable:
+            if self.switch:
+                self.message_port_pub(self.msg_out, self.hop_msgs[self.fhss_index])
+
+                self.fhss_index += 1
+                self.fhss_index %= self.num_primary_bands
+
+            self.switch = not self.switch
+        else:
+            self.message_port_pub(self.msg_out, self.disabled_msg)
+
+    def work(self, input_items, output_items):
+        return 0
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Embedded Python Block: PFB Synthesizer
+
+elrs_synthesizer.pfb_synthesizer with its settings as attributes, so the
+flowgraph variables can retune it.
+"""
+import elrs_synthesizer
+
+class pfb_synthesizer(elrs_synthesizer.pfb_synthesizer):
+    """
+    Combines one narrowband stream per emitter into the wideband stream,
+    each on its own frequency, taking hops on "hop". GRC sizes the ports
+    from the defaults, so the default `freqs` gives the five inputs of the
+    flowgraph.
+    """
+    def __init__(self, samp_rate=1.0, freqs=[0.0, 0.0, 0.0, 0.0, 0.0], freq_offset=0.0, fft_len=128, taps_per_branch=12, trigger_tag=''):
+        elrs_synthesizer.pfb_synthesizer.__init__(self, samp_rate=samp_rate, freqs=freqs, freq_offset=freq_offset,
+                                                  fft_len=fft_len, taps_per_branch=taps_per_branch, trigger_tag=trigger_tag)
+        self._freqs = list(freqs)
+
+    @property
+    def freqs(self):
+        return self._freqs
+
+    @freqs.setter
+    def freqs(self, freqs):
+        self._freqs = list(freqs)
+        self.set_frequencies(self._freqs)
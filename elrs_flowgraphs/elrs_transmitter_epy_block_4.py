@@ -0,0 +1,33 @@
+"""
+Embedded Python Block: Hopping NCO
+
+elrs_nco.hopping_nco with its settings as attributes, so the flowgraph
+variables can retune it.
+"""
+import elrs_nco
+
+class hopping_nco(elrs_nco.hopping_nco):
+    """
+    Mixes the input with a phase-continuous NCO taking hops on "hop".
+    """
+    def __init__(self, samp_rate=1.0, center_freq=0.0, freq_offset=0.0, downconvert=False, emitter=0):
+        elrs_nco.hopping_nco.__init__(self, samp_rate=samp_rate, freq=center_freq, freq_offset=freq_offset,
+                                      downconvert=downconvert, emitter=emitter)
+
+    @property
+    def center_freq(self):
+        return self.freq - self.freq_offset
+
+    @center_freq.setter
+    def center_freq(self, center_freq):
+        self.set_frequency(center_freq)
+
+    @property
+    def samp_rate(self):
+        return self._samp_rate
+
+    @samp_rate.setter
+    def samp_rate(self, samp_rate):
+        # Phasor tables were built for the old rate
+        self._samp_rate = samp_rate
+        self.phasor_tables = {}
@@ -1,7 +1,7 @@
 import pmt
 import numpy as np
 from gnuradio import gr
-from hashlib import md5
+from elrs_fhss import FHSS_SEQUENCE_LEN, OTA_VERSION_ID, fhss_seed, get_fhss_sequence
 
 class fhss_controller(gr.sync_block):
     # This is the corrected line with default values
@@ -25,8 +25,8 @@ class fhss_controller(gr.sync_block):
         self.set_msg_handler(pmt.intern("msg_in"), self.handle_msg)
 
         # --- Setup logic from your script ---
-        self.FHSS_SEQUENCE_LEN = 256
-        self.OTA_VERSION_ID = 6
+        self.FHSS_SEQUENCE_LEN = FHSS_SEQUENCE_LEN
+        self.OTA_VERSION_ID = OTA_VERSION_ID
         
         if self.freq_count > 1:
             self.freq_spread = abs(self.freq_stop - self.freq_start) // (self.freq_count - 1)
@@ -39,49 +39,41 @@ class fhss_controller(gr.sync_block):
         else:
             self.num_primary_bands = 0 # Provide a safe default
 
-        uid_bytes = md5(self.binding_phrase.encode()).digest()[0:6]
-        self.seed = (uid_bytes[2] << 24) | (uid_bytes[3] << 16) | (uid_bytes[4] << 8) | (uid_bytes[5] ^ self.OTA_VERSION_ID)
+        self.seed = fhss_seed(self.binding_phrase, self.OTA_VERSION_ID)
         self.freq_sequence = [0] * self.FHSS_SEQUENCE_LEN
         self.fhss_index = 0
+        self.msg_out = pmt.intern("msg_out")
         
         self.build_random_fhss_sequence()
+        self.build_hop_messages()
 
-    def elrs_rng(self):
-        self.seed = (0x343FD * self.seed + 0x269EC3) % 0x80000000
-        return self.seed >> 16
-    
     def build_random_fhss_sequence(self):
-        # Only build if freq_count is valid
-        if self.freq_count < 2: return
+        # The sequence is generated once per parameter set and shared by every
+        # controller through elrs_fhss, so it must be treated as read-only.
+        self.freq_sequence = get_fhss_sequence(self.binding_phrase, self.freq_start, self.freq_stop,
+                                               self.freq_count, self.OTA_VERSION_ID).channels
 
-        for i in range(self.num_primary_bands):
-            self.freq_sequence[i] = i % self.freq_count
-        
-        for i in range(1, self.num_primary_bands):
-             if (i % self.freq_count) != 0:
-                offset = (i // self.freq_count) * self.freq_count
-                rand = (self.elrs_rng() % (self.freq_count - 1)) + 1
-                self.freq_sequence[i], self.freq_sequence[offset + rand] = self.freq_sequence[offset + rand], self.freq_sequence[i]
+    def build_hop_messages(self):
+        # Final mixer offset and a ready-made PMT pair for every hop, so
+        # handle_msg only has to index and publish.
+        self.hop_offsets = self.freq_start + (np.asarray(self.freq_sequence) * self.freq_spread) - self.freq_center + 3.7e6 # Temp fix
+        key = pmt.intern("freq_temp")
+        self.hop_msgs = [pmt.cons(key, pmt.from_double(offset)) for offset in self.hop_offsets.tolist()]
+        self.disabled_msg = pmt.cons(key, pmt.from_double(self.freq_center + 3.7e6)) # Temp fix
+
+    def start(self):
+        # Pick up any parameter changes made through the top block setters
+        self.build_random_fhss_sequence()
+        self.build_hop_messages()
+        return True
 
     def handle_msg(self, msg):
         if not self.disable:
-            current_freq_index = self.freq_sequence[self.fhss_index]
-            absolute_freq = self.freq_start + (current_freq_index * self.freq_spread)
-            freq_offset = absolute_freq - self.freq_center
-
-            key = pmt.intern("freq_temp")
-            value = pmt.from_double(freq_offset + 3.7e6) # Temp fix
-            output_msg = pmt.cons(key, value)
-
-            self.message_port_pub(pmt.intern("msg_out"), output_msg)
+            self.message_port_pub(self.msg_out, self.hop_msgs[self.fhss_index])
             
             self.fhss_index = (self.fhss_index + 1) % self.freq_count
         else:
-            key = pmt.intern("freq_temp")
-            value = pmt.from_double(self.freq_center + 3.7e6) # Temp fix
-            output_msg = pmt.cons(key, value)
-
-            self.message_port_pub(pmt.intern("msg_out"), output_msg)
+            self.message_port_pub(self.msg_out, self.disabled_msg)
 
 
     def work(self, input_items, output_items):
@@ -6,43 +6,12 @@ from hashlib import md5
 from gnuradio import gr
 from pathlib import Path
 from typing import Optional, TextIO
+from elrs_crc import Crc2Byte
+from elrs_payload import PAYLOAD_LEN, PayloadStream, load_payloads
 
-class Crc2Byte:
-    _CRCTAB_LEN = 256
-
-    def __init__(self, bits: int, poly: int):
-        if not (8 <= bits <= 16):
-            raise ValueError("CRC bit-width must be between 8 and 16.")
-
-        self.bits = bits
-        self.poly = poly
-        self.bitmask = (1 << self.bits) - 1
-        
-        # Pre-compute the CRC lookup table
-        self.crctab = self._generate_table()
-
-    def _generate_table(self) -> list[int]:
-        crctab = [0] * self._CRCTAB_LEN
-        highbit = 1 << (self.bits - 1)
-
-        for i in range(self._CRCTAB_LEN):
-            crc = i << (self.bits - 8)
-            for _ in range(8):
-                if crc & highbit:
-                    crc = (crc << 1) ^ self.poly
-                else:
-                    crc = crc << 1
-            crctab[i] = crc & self.bitmask
-        return crctab
-
-    def calc(self, data: bytes, initial_crc: int = 0) -> int:
-        crc = initial_crc
-
-        for byte in data:
-            lookup_index = ((crc >> (self.bits - 8)) ^ byte) & 0xFF
-            crc = (crc << 8) ^ self.crctab[lookup_index]
-
-        return crc & self.bitmask
+# Frames rendered at a time when looping a file, which bounds the PMTs held
+# in memory however many records the file has
+FRAME_RING_LEN = 16384
 
 # The final, top-level packet structure
 class OTA_Packet4_s(ctypes.Structure):
@@ -79,29 +48,73 @@ class elrs_transmitter_data_gen(gr.sync_block):
         self.loop_file: bool = loopFile
         self.done: bool = False
 
-        self.packet_datas: list[bytes] = []
+        self.packet_datas = np.empty((0, PAYLOAD_LEN), dtype=np.uint8)
         self.packet_datas_pos = 0
+        self.frame_ring: list = []
+        self.frame_ring_pos = 0
+        self.stream: Optional[PayloadStream] = None
 
         uid = md5(str(f'-DMY_BINDING_PHRASE="{bindingPhrase}"').encode('utf-8')).digest()[:6]
         self.ota_crc = ((uid[4] << 8) | uid[5]) ^ 4
+        # The seed is fixed per binding phrase, so let the host pick the fastest CRC strategy for it
+        self.crc_fn = self.crc_calc.seeded(self.ota_crc, length=PAYLOAD_LEN)
         
         self.message_port_register_in(pmt.intern("msg_in"))
         self.message_port_register_out(pmt.intern("msg_out"))
         self.set_msg_handler(pmt.intern("msg_in"), self.handle_msg)
+        self.msg_out = pmt.intern("msg_out")
+
+    def render_frames(self, payloads: np.ndarray) -> list:
+        """
+        Builds the finished OTA_Packet4_s PMT of every payload at once, byte
+        for byte what handle_msg would build through ctypes.
+        """
+        crcs = self.crc_calc.calc_batch(payloads, self.ota_crc)
+
+        frames = np.zeros((len(payloads), ctypes.sizeof(OTA_Packet4_s)), dtype=np.uint8)
+        # type sits in the low 2 bits of the first byte and is always 0, crcHigh keeps 6 bits
+        frames[:, 0] = ((crcs >> 8) & 0x3F) << 2
+        frames[:, 1:1 + PAYLOAD_LEN] = payloads
+        frames[:, -1] = crcs & 0xFF
+
+        frame_len = frames.shape[1]
+        return [pmt.init_u8vector(frame_len, frame) for frame in frames.tolist()]
+
+    def fill_ring(self) -> bool:
+        """
+        Renders the next FRAME_RING_LEN records of a looped file into the
+        ring, wrapping around at the end of the file. A file that fits in
+        one ring is rendered once. Returns False for an empty file.
+        """
+        count = len(self.packet_datas)
+        self.frame_ring_pos = 0
+        if count == 0:
+            return False
+        if len(self.frame_ring) == count:
+            return True
+
+        start = self.packet_datas_pos
+        stop = min(start + FRAME_RING_LEN, count)
+        self.frame_ring = self.render_frames(self.packet_datas[start:stop])
+        self.packet_datas_pos = stop % count
+        return True
 
     def handle_msg(self, msg):
-        if not self.done:
-            # 1. Read current payload
-            curr_bytes = self.packet_datas[self.packet_datas_pos][:6]
-            self.packet_datas_pos += 1
-            if self.packet_datas_pos == len(self.packet_datas):
-                if self.loop_file:
-                    self.packet_datas_pos = 0
-                else:
-                    self.done = True
+        if self.loop_file:
+            # Looping over a pre-rendered ring, so the frame only has to be published
+            if self.frame_ring_pos == len(self.frame_ring) and not self.fill_ring():
+                return
+            self.message_port_pub(self.msg_out, self.frame_ring[self.frame_ring_pos])
+            self.frame_ring_pos += 1
+        elif not self.done:
+            # 1. Read the next payload from the prefetch buffers
+            curr_bytes = self.stream.next() if self.stream is not None else None
+            if curr_bytes is None:
+                self.done = True
+                return
 
             # 2. Calculate CRC
-            crc = self.crc_calc.calc(curr_bytes, self.ota_crc)
+            crc = self.crc_fn(curr_bytes)
             
             # 3. Convert hex byte stream to bytearray
             backing_buffer = bytearray(ctypes.sizeof(OTA_Packet4_s))
@@ -114,19 +127,27 @@ class elrs_transmitter_data_gen(gr.sync_block):
             output_msg = pmt.init_u8vector(len(backing_buffer), backing_buffer)
 
             # 5. Publish the new message
-            self.message_port_pub(pmt.intern("msg_out"), output_msg)
+            self.message_port_pub(self.msg_out, output_msg)
 
     def start(self) -> bool:
         if not self.filepath.is_file():
             print(f'ELRS Transmitter Data Gen: \'{self.filepath_str}\' is not a valid filepath!')
             return False
         
+        self.packet_datas_pos = 0
+        self.done = False
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as file:
-                curr_line = file.readline()
-                while len(curr_line) != 0:
-                    self.packet_datas.append(bytes.fromhex(curr_line))
-                    curr_line = file.readline()
+            if self.loop_file:
+                # Packed payload files and parsed hex files are both memory-mapped views
+                self.packet_datas = load_payloads(self.filepath)
+                # A looped file sends every frame over and over, so render
+                # them a ring at a time, the first one before any trigger
+                self.frame_ring = []
+                self.fill_ring()
+            else:
+                # Every payload is sent once, so stream the file in constant memory instead
+                self.stream = PayloadStream(self.filepath)
+                self.stream.start()
         except Exception as e:
             print('ELRS Transmitter Data Gen: Exception occured while trying to open file.\n', e)
             return False
@@ -134,6 +155,9 @@ class elrs_transmitter_data_gen(gr.sync_block):
         return True
 
     def stop(self) -> bool:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
         return True
 
     def work(self, input_items, output_items):
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# GNU Radio Python Flow Graph
+# Title: ELRS Transmitter (headless)
+# GNU Radio version: 3.10.1.1
+
+# Same signal chain as elrs_transmitter.py, without PyQt, qtgui or the
+# waterfall sink, and with the emitter count, paths and rates taken from
+# the command line for unattended runs.
+
+import time
+import pmt
+from gnuradio import blocks
+from gnuradio import filter
+from gnuradio import gr
+import sys
+import signal
+from argparse import ArgumentParser
+from gnuradio.eng_arg import eng_float, intx
+from gnuradio import eng_notation
+import elrs_transmitter_epy_block_1 as epy_block_1  # embedded python block
+import elrs_transmitter_epy_block_2 as epy_block_2  # embedded python block
+from elrs_nco import hopping_nco
+from elrs_resampler import multistage_resampler
+from elrs_synthesizer import pfb_synthesizer
+import gnuradio.lora_sdr as lora_sdr
+
+
+
+
+class elrs_transmitter_headless(gr.top_block):
+
+    def __init__(self, binding_phrase="TestBindingPhrase", emitters=5, freq_center=914700000, wide_samp_rate=926900000 - 903500000,
+                 freq_count=40, bandwidth=125e3, packet_count=2000, strobe_period=20, results_path='results/elrs_0', disable=False):
+        gr.top_block.__init__(self, "ELRS Transmitter (headless)", catch_exceptions=True)
+
+        ##################################################
+        # Parameters
+        ##################################################
+        self.binding_phrase = binding_phrase
+        self.emitters = emitters
+        self.freq_center = freq_center
+        self.wide_samp_rate = wide_samp_rate
+        self.freq_count = freq_count
+        self.bandwidth = bandwidth
+        self.packet_count = packet_count
+        self.strobe_period = strobe_period
+        self.results_path = results_path
+        self.disable = disable
+
+        ##################################################
+        # Variables
+        ##################################################
+        self.samp_rate = samp_rate = bandwidth*2
+        self.freq_temps = freq_temps = [freq_center] * emitters
+        self.freq_stop = freq_stop = freq_center + (wide_samp_rate // 2)
+        self.freq_start = freq_start = freq_center - (wide_samp_rate // 2)
+
+        ##################################################
+        # Blocks
+        ##################################################
+        self.lora_txs = []
+        self.rational_resamplers = []
+        for i in range(emitters):
+            self.lora_txs.append(lora_sdr.lora_sdr_lora_tx(
+                bw=int(bandwidth),
+                cr=1,
+                has_crc=True,
+                impl_head=True,
+                samp_rate=int(samp_rate),
+                sf=7,
+             ldro_mode=2,frame_zero_padd=1280,sync_word=[0x12] ))
+            self.rational_resamplers.append(filter.rational_resampler_ccc(
+                    interpolation=7,
+                    decimation=5,
+                    taps=[],
+                    fractional_bw=0.4))
+        self.pfb_synthesizer_0 = pfb_synthesizer(samp_rate=wide_samp_rate, freqs=freq_temps, freq_offset=-3.7e3, fft_len=128, taps_per_branch=12, trigger_tag='frame_len')
+        self.multistage_resampler_0 = multistage_resampler(
+                interp=5,
+                decim=448,
+                samp_rate=samp_rate * 448 / 5,
+                fractional_bw=0.04)
+        self.lora_rx_0 = lora_sdr.lora_sdr_lora_rx( bw=int(bandwidth), cr=1, has_crc=True, impl_head=True, pay_len=6, samp_rate=int(samp_rate), sf=7, sync_word=[0x12], soft_decoding=True, ldro_mode=0, print_rx=[False,False])
+        self.epy_block_1 = epy_block_1.counter_formatter(packet_count=packet_count)
+        self.epy_block_2 = epy_block_2.multi_fhss_controller(binding_phrases=[binding_phrase + str(i) for i in range(emitters)], freq_start=freq_start, freq_stop=freq_stop, freq_count=freq_count, freq_center=freq_center, disable=disable)
+        self.hopping_nco_rx_0 = hopping_nco(samp_rate=wide_samp_rate, freq=freq_temps[0], freq_offset=-3.7e3, downconvert=True, emitter=0)
+        self.blocks_message_strobe_0 = blocks.message_strobe(pmt.intern(""), strobe_period)
+        self.blocks_file_sink_0 = blocks.file_sink(gr.sizeof_char*1, results_path, False)
+        self.blocks_file_sink_0.set_unbuffered(False)
+
+
+        ##################################################
+        # Connections
+        ##################################################
+        self.msg_connect((self.blocks_message_strobe_0, 'strobe'), (self.epy_block_1, 'msg_in'))
+        self.msg_connect((self.epy_block_1, 'msg_out'), (self.epy_block_2, 'msg_in'))
+        self.msg_connect((self.epy_block_2, 'msg_out'), (self.hopping_nco_rx_0, 'hop'))
+        self.msg_connect((self.epy_block_2, 'msg_out'), (self.pfb_synthesizer_0, 'hop'))
+        for i in range(emitters):
+            self.msg_connect((self.epy_block_1, 'msg_out'), (self.lora_txs[i], 'in'))
+            self.connect((self.lora_txs[i], 0), (self.rational_resamplers[i], 0))
+            self.connect((self.rational_resamplers[i], 0), (self.pfb_synthesizer_0, i))
+        self.connect((self.pfb_synthesizer_0, 0), (self.hopping_nco_rx_0, 0))
+        self.connect((self.hopping_nco_rx_0, 0), (self.multistage_resampler_0, 0))
+        self.connect((self.multistage_resampler_0, 0), (self.lora_rx_0, 0))
+        self.connect((self.lora_rx_0, 0), (self.blocks_file_sink_0, 0))
+
+
+    def get_binding_phrase(self):
+        return self.binding_phrase
+
+    def set_binding_phrase(self, binding_phrase):
+        self.binding_phrase = binding_phrase
+        self.epy_block_2.binding_phrases = [self.binding_phrase + str(i) for i in range(self.emitters)]
+
+    def get_freq_temps(self):
+        return self.freq_temps
+
+    def set_freq_temps(self, freq_temps):
+        self.freq_temps = freq_temps
+        self.pfb_synthesizer_0.set_frequencies(self.freq_temps)
+        self.hopping_nco_rx_0.set_frequency(self.freq_temps[0])
+
+    def get_disable(self):
+        return self.disable
+
+    def set_disable(self, disable):
+        self.disable = disable
+        self.epy_block_2.disable = self.disable
+
+
+
+def argument_parser():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--binding-phrase", dest="binding_phrase", type=str, default="TestBindingPhrase",
+        help="Set binding phrase, emitter i uses the phrase with i appended [default=%(default)r]")
+    parser.add_argument(
+        "--emitters", dest="emitters", type=intx, default=5,
+        help="Set emitter count [default=%(default)r]")
+    parser.add_argument(
+        "--freq-center", dest="freq_center", type=eng_float, default=eng_notation.num_to_str(float(914700000)),
+        help="Set center frequency [default=%(default)r]")
+    parser.add_argument(
+        "--wide-samp-rate", dest="wide_samp_rate", type=eng_float, default=eng_notation.num_to_str(float(926900000 - 903500000)),
+        help="Set wideband sample rate [default=%(default)r]")
+    parser.add_argument(
+        "--freq-count", dest="freq_count", type=intx, default=40,
+        help="Set FHSS channel count [default=%(default)r]")
+    parser.add_argument(
+        "--bandwidth", dest="bandwidth", type=eng_float, default=eng_notation.num_to_str(float(125e3)),
+        help="Set LoRa bandwidth [default=%(default)r]")
+    parser.add_argument(
+        "--packet-count", dest="packet_count", type=intx, default=2000,
+        help="Set packets to send [default=%(default)r]")
+    parser.add_argument(
+        "--strobe-period", dest="strobe_period", type=intx, default=20,
+        help="Set milliseconds between packets [default=%(default)r]")
+    parser.add_argument(
+        "--results-path", dest="results_path", type=str, default='results/elrs_0',
+        help="Set file the decoded counters are written to [default=%(default)r]")
+    parser.add_argument(
+        "--disable", dest="disable", action='store_true',
+        help="Disable frequency hopping")
+    parser.add_argument(
+        "--duration", dest="duration", type=eng_float, default=0.0,
+        help="Set seconds to run, 0 runs until interrupted [default=%(default)r]")
+    return parser
+
+
+def main(top_block_cls=elrs_transmitter_headless, options=None):
+    if options is None:
+        options = argument_parser().parse_args()
+    tb = top_block_cls(binding_phrase=options.binding_phrase, emitters=options.emitters, freq_center=options.freq_center,
+                       wide_samp_rate=options.wide_samp_rate, freq_count=options.freq_count, bandwidth=options.bandwidth,
+                       packet_count=options.packet_count, strobe_period=options.strobe_period,
+                       results_path=options.results_path, disable=options.disable)
+
+    def sig_handler(sig=None, frame=None):
+        tb.stop()
+        tb.wait()
+
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, sig_handler)
+    signal.signal(signal.SIGTERM, sig_handler)
+
+    tb.start()
+
+    if options.duration > 0:
+        time.sleep(options.duration)
+        tb.stop()
+    tb.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import sys
+import types
+import numpy as np
+
+# Small pmt/gr stand-in for running the flowgraph blocks without GNU Radio,
+# shared by benchmark.py and the tests. It only provides what the blocks
+# touch. PMT semantics follow libpmt where the blocks depend on them, e.g.
+# dicts are association lists, so NIL and every pair count as a dict.
+
+def install_shim():
+    """
+    Registers stand-in `pmt` and `gnuradio.gr` modules. Message ports are
+    no-ops and PMTs are plain tuples, so the numbers measure the block code
+    rather than the PMT library. Stream blocks keep their item counters in
+    plain attributes, which whoever calls work() moves along.
+    """
+    pmt = types.ModuleType('pmt')
+    pmt.PMT_NIL = ('nil',)
+    pmt.PMT_T = ('bool', True)
+    pmt.PMT_F = ('bool', False)
+    pmt.intern = lambda name: ('sym', name)
+    pmt.symbol_to_string = lambda p: p[1]
+    pmt.cons = lambda car, cdr: ('pair', car, cdr)
+    pmt.car = lambda p: p[1]
+    pmt.cdr = lambda p: p[2]
+    pmt.is_pair = lambda p: isinstance(p, tuple) and p[0] == 'pair'
+    pmt.is_null = lambda p: p == pmt.PMT_NIL
+    pmt.is_symbol = lambda p: isinstance(p, tuple) and p[0] == 'sym'
+    pmt.is_true = lambda p: p != pmt.PMT_F
+    pmt.is_number = lambda p: isinstance(p, tuple) and p[0] in ('long', 'uint64', 'double')
+    pmt.from_double = lambda value: ('double', float(value))
+    pmt.from_long = lambda value: ('long', int(value))
+    pmt.from_uint64 = lambda value: ('uint64', int(value))
+    pmt.to_long = lambda p: int(p[1])
+    pmt.to_uint64 = lambda p: int(p[1])
+    pmt.to_double = lambda p: float(p[1])
+    pmt.init_f64vector = lambda n, values: ('f64vector', tuple(float(v) for v in values))
+    pmt.init_u8vector = lambda n, values: ('u8vector', bytes(values))
+    pmt.is_u8vector = lambda p: isinstance(p, tuple) and p[0] == 'u8vector'
+    pmt.u8vector_elements = lambda p: list(p[1])
+
+    def to_python(p):
+        if pmt.is_pair(p):
+            return (to_python(p[1]), to_python(p[2]))
+        if p[0] == 'f64vector':
+            return np.array(p[1])
+        return p[1] if len(p) > 1 else None
+
+    def assv(key, alist):
+        # The (key . value) entry of an association list, skipping anything that is not a pair
+        while pmt.is_pair(alist):
+            entry = alist[1]
+            if pmt.is_pair(entry) and entry[1] == key:
+                return entry
+            alist = alist[2]
+        return pmt.PMT_NIL
+
+    def dict_delete(d, key):
+        if not pmt.is_pair(d):
+            return d
+        if pmt.is_pair(d[1]) and d[1][1] == key:
+            return d[2]
+        return pmt.cons(d[1], dict_delete(d[2], key))
+
+    pmt.to_python = to_python
+    pmt.make_dict = lambda: pmt.PMT_NIL
+    pmt.is_dict = lambda p: pmt.is_null(p) or pmt.is_pair(p)
+    pmt.dict_add = lambda d, key, value: pmt.cons(pmt.cons(key, value), dict_delete(d, key))
+    pmt.dict_has_key = lambda d, key: pmt.is_pair(assv(key, d))
+    pmt.dict_ref = lambda d, key, not_found: pmt.cdr(assv(key, d)) if pmt.dict_has_key(d, key) else not_found
+
+    class basic_block:
+        def __init__(self, name='', in_sig=None, out_sig=None):
+            self.name = name
+            self.items_read = 0
+            self.items_written = 0
+            self.consumed = 0
+            self.added_tags = []
+
+        def message_port_register_in(self, port):
+            pass
+
+        def message_port_register_out(self, port):
+            pass
+
+        def set_msg_handler(self, port, handler):
+            pass
+
+        def message_port_pub(self, port, msg):
+            pass
+
+        def set_history(self, history):
+            pass
+
+        def set_output_multiple(self, multiple):
+            pass
+
+        def set_tag_propagation_policy(self, policy):
+            pass
+
+        def nitems_read(self, port):
+            return self.items_read
+
+        def nitems_written(self, port):
+            return self.items_written
+
+        def get_tags_in_window(self, port, start, end):
+            return []
+
+        def add_item_tag(self, port, offset, key, value):
+            self.added_tags.append((offset, key, value))
+
+        def consume(self, port, count):
+            self.consumed += count
+
+    class decim_block(basic_block):
+        def __init__(self, name='', in_sig=None, out_sig=None, decim=1):
+            super().__init__(name, in_sig, out_sig)
+
+    class interp_block(basic_block):
+        def __init__(self, name='', in_sig=None, out_sig=None, interp=1):
+            super().__init__(name, in_sig, out_sig)
+
+    gr = types.ModuleType('gnuradio.gr')
+    gr.basic_block = basic_block
+    gr.sync_block = basic_block
+    gr.decim_block = decim_block
+    gr.interp_block = interp_block
+    gr.TPP_DONT = 0
+    gnuradio = types.ModuleType('gnuradio')
+    gnuradio.gr = gr
+
+    sys.modules['pmt'] = pmt
+    sys.modules['gnuradio'] = gnuradio
+    sys.modules['gnuradio.gr'] = gr
+
+def load_backend(force_shim: bool) -> str:
+    if not force_shim:
+        try:
+            import pmt
+            from gnuradio import gr
+            return 'gnuradio'
+        except ImportError:
+            pass
+    install_shim()
+    return 'shim'
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / 'elrs_flowgraphs')]
+
+# elrs_snapshot reads this once on import, so it has to be set before any
+# flowgraph module is loaded, or the tests would write to the real cache.
+_snapshot_dir = tempfile.TemporaryDirectory(prefix='elrs-test-snapshots-')
+os.environ['ELRS_SNAPSHOT_DIR'] = _snapshot_dir.name
+
+# The tests call work() and the message handlers directly, which needs the
+# stand-in blocks even where GNU Radio is installed.
+from gr_shim import install_shim
+install_shim()
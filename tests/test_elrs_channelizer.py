@@ -0,0 +1,82 @@
+import numpy as np
+import pmt
+from elrs_channelizer import channel_activity, pfb_channelizer
+from elrs_fhss import channel_frequencies
+from elrs_receiver_epy_block_0 import fhss_controller
+
+SAMP_RATE = 2.4e6
+FFT_LEN = 32
+FREQ_COUNT = 8
+FREQ_START, FREQ_STOP = 914.0e6, 915.75e6
+FREQ_CENTER = (FREQ_START + FREQ_STOP) / 2
+HOP_TIME, BURST_TIME = 0.003, 0.002
+
+def band(channels, rng):
+    # One burst per hop on its channel, as the transmitter hops through the sequence
+    offsets = channel_frequencies(FREQ_START, FREQ_STOP, FREQ_COUNT) - FREQ_CENTER
+    hop_len, burst_len = int(HOP_TIME * SAMP_RATE), int(BURST_TIME * SAMP_RATE)
+    samples = ((rng.standard_normal(hop_len * len(channels)) + 1j * rng.standard_normal(hop_len * len(channels))) * 0.01)
+    t = np.arange(burst_len) / SAMP_RATE
+    for hop, channel in enumerate(channels):
+        start = hop * hop_len + hop_len // 4
+        samples[start:start + burst_len] += 0.1 * np.exp(2j * np.pi * (offsets[channel] + 20e3) * t)
+    return samples.astype(np.complex64), offsets
+
+def watch(samples, offsets, rng, handle):
+    # Runs the channelizer and channel_activity as the scheduler would, in random call sizes
+    channelizer = pfb_channelizer(samp_rate=SAMP_RATE, freqs=offsets.tolist(), fft_len=FFT_LEN)
+    activity = channel_activity(samp_rate=2 * SAMP_RATE / FFT_LEN, channels=FREQ_COUNT)
+    activity.message_port_pub = lambda port, msg: handle(msg)
+    activity.start()
+
+    history = len(channelizer.taps)
+    padded = np.concatenate([np.zeros(history - 1, dtype=np.complex64), samples])
+    total = len(samples) // channelizer.decim
+    produced = 0
+    while produced + activity.block_len <= total:
+        n = min(int(rng.integers(1, 40)) * activity.block_len, total - produced)
+        n -= n % activity.block_len
+        outputs = [np.zeros(n, dtype=np.complex64) for _ in range(FREQ_COUNT)]
+        channelizer.items_read = produced * channelizer.decim
+        channelizer.work([padded[produced * channelizer.decim:(produced + n) * channelizer.decim + history - 1]], outputs)
+        assert activity.work(outputs, []) == n
+        produced += n
+    return activity
+
+def test_channel_activity_reports_each_hop():
+    rng = np.random.default_rng(6)
+    channels = [3, 0, 7, 7, 2, 5, 1, 4, 6]
+    samples, offsets = band(channels, rng)
+    seen = []
+    activity = watch(samples, offsets, rng, lambda msg: seen.append(pmt.to_python(msg)))
+    assert seen == channels
+    assert activity.onset_count == len(channels)
+
+def test_fhss_controller_recovers_from_observed_channels():
+    rng = np.random.default_rng(7)
+    controller = fhss_controller(binding_phrase='DefaultBindingPhrase', freq_start=FREQ_START, freq_stop=FREQ_STOP,
+                                 freq_count=FREQ_COUNT, freq_center=FREQ_CENTER)
+    published = []
+    controller.message_port_pub = lambda port, msg: published.append(msg)
+
+    # The transmitter is at hop 100 onwards, while the receiver thinks it is at hop 10
+    first = 100
+    channels = [int(controller.freq_sequence[first + i]) for i in range(8)]
+    controller.fhss_index = 10
+    samples, offsets = band(channels, rng)
+
+    def observe(msg):
+        tuned = bool(published)
+        controller.handle_sync(msg)
+        if tuned:
+            # Once retuned, the receiver decodes the packet too, which advances the hop
+            controller.handle_msg(None)
+    watch(samples, offsets, rng, observe)
+
+    # Found once the run seen so far fits one place in the sequence, then
+    # retuned to the hop after it and following the sequence from there
+    order = controller.hop_index.order
+    found = next(i for i in range(len(channels)) if controller.hop_index.lookup(channels[max(i - order + 1, 0):i + 1]) is not None)
+    assert found < len(channels) - 1
+    assert published == controller.hop_msgs[first + found + 1:first + len(channels) + 1]
+    assert controller.fhss_index == first + len(channels) + 1
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from elrs_crc import Crc2Byte
+
+def bitwise_crc(data: bytes, bits: int, poly: int, initial_crc: int = 0) -> int:
+    # Straight from the definition, one bit at a time
+    crc = initial_crc & ((1 << bits) - 1)
+    for byte in data:
+        for i in range(7, -1, -1):
+            feedback = ((crc >> (bits - 1)) ^ (byte >> i)) & 1
+            crc = (crc << 1) & ((1 << bits) - 1)
+            if feedback:
+                crc ^= poly & ((1 << bits) - 1)
+    return crc
+
+PAYLOADS = [bytes(row) for row in np.random.default_rng(3).integers(0, 256, (32, 6), dtype=np.uint8)]
+
+@pytest.mark.parametrize('bits, poly', [(16, 0x3D65), (14, 0x372B), (8, 0x07)])
+@pytest.mark.parametrize('strategy', Crc2Byte.STRATEGIES)
+def test_strategies_match_bitwise(bits, poly, strategy):
+    crc = Crc2Byte(bits, poly)
+    for seed in (0, 0x1234 & crc.bitmask):
+        calc = crc.seeded(seed, strategy)
+        assert [calc(payload) for payload in PAYLOADS] == [bitwise_crc(payload, bits, poly, seed) for payload in PAYLOADS]
+
+def test_auto_picks_a_known_strategy():
+    crc = Crc2Byte(16, 0x3D65)
+    calc = crc.seeded(0x5555, 'auto')
+    assert crc.strategy in Crc2Byte.STRATEGIES
+    assert calc(PAYLOADS[0]) == crc.calc(PAYLOADS[0], 0x5555)
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        Crc2Byte(16, 0x3D65).seeded(0, 'bogus')
+
+def test_calc_batch_matches_calc():
+    crc = Crc2Byte(16, 0x3D65)
+    data = np.frombuffer(b''.join(PAYLOADS), dtype=np.uint8).reshape(-1, 6)
+    seeds = np.arange(len(PAYLOADS)) * 977
+    assert crc.calc_batch(data, 0x1234).tolist() == [crc.calc(payload, 0x1234) for payload in PAYLOADS]
+    assert crc.calc_batch(data, seeds).tolist() == [crc.calc(payload, int(seed)) for payload, seed in zip(PAYLOADS, seeds)]
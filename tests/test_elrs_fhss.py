@@ -0,0 +1,34 @@
+import numpy as np
+from elrs_fhss import HopIndex, get_fhss_sequence, get_hop_index
+
+FREQ_ARGS = ('DefaultBindingPhrase', 903.5e6, 926.9e6, 40)
+
+def test_lookup_finds_every_position():
+    channels = get_fhss_sequence(*FREQ_ARGS).channels
+    index = get_hop_index(*FREQ_ARGS)
+    assert index.resync_hops is not None
+    period = len(channels)
+    for position in range(period):
+        observed = [channels[(position - k) % period] for k in range(index.resync_hops - 1, -1, -1)]
+        assert index.lookup(observed) == position
+
+def test_lookup_needs_more_hops_when_ambiguous():
+    # Channel 0 occurs twice, so it alone does not tell where we are
+    index = HopIndex(np.array([0, 1, 0, 2]), freq_count=3)
+    assert index.lookup([0]) is None
+    assert index.lookup([1, 0]) == 2
+    assert index.lookup([2, 0]) == 0
+    assert index.lookup([1]) == 1
+
+def test_lookup_rejects_unknown_runs():
+    index = HopIndex(np.array([0, 1, 0, 2]), freq_count=3)
+    # The shortest run decides, so only an ambiguous channel looks further back
+    assert index.lookup([1, 2]) == 3
+    assert index.lookup([0, 0]) is None
+    assert index.lookup([5]) is None
+
+def test_matched_hops_stops_at_a_missed_hop():
+    index = HopIndex(np.array([0, 1, 2, 3, 4, 5]), freq_count=6)
+    assert index.matched_hops([0, 1, 2]) == 3
+    assert index.matched_hops([4, 1, 2]) == 2
+    assert index.matched_hops([4, 1, 9]) == 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from elrs_gate import burst_gate
+
+SAMP_RATE = 250e3
+# Not a whole number of blocks, and the last burst runs into the end
+LENGTH = 500007
+BURSTS = [(20000, 5000), (30000, 3000), (33500, 2000), (200000, 10000), (497000, 3007)]
+
+def stream():
+    rng = np.random.default_rng(1)
+    samples = ((rng.standard_normal(LENGTH) + 1j * rng.standard_normal(LENGTH)) * 0.01).astype(np.complex64)
+    for start, length in BURSTS:
+        samples[start:start + length] += (np.exp(1j * np.arange(length) * 0.3) * 0.1).astype(np.complex64)
+    return samples
+
+def run(gate, samples, rng, max_input):
+    # Hands the block random input and output sizes, as the scheduler would
+    outputs = []
+    while gate.consumed < len(samples):
+        space = int(rng.integers(1, 60)) * gate.block_len * (gate.pre_blocks + 1)
+        out = np.zeros(space, dtype=np.complex64)
+        in0 = samples[gate.consumed:gate.consumed + int(rng.integers(1, max_input))]
+        gate.items_read = gate.consumed
+        produced = gate.general_work([in0], [out])
+        gate.items_written += produced
+        outputs.append(out[:produced])
+    return np.concatenate(outputs)
+
+def expected_output(gate, samples, length):
+    # Every block within the margins of a loud one, straight from the definition
+    blocks = length // gate.block_len
+    loud = np.zeros(blocks, dtype=bool)
+    for start, burst_len in BURSTS:
+        loud[start // gate.block_len:min(start + burst_len - 1, length - 1) // gate.block_len + 1] = True
+    keep = np.array([loud[max(0, i - gate.post_blocks):i + gate.pre_blocks + 1].any() for i in range(blocks)])
+    return samples[:blocks * gate.block_len].reshape(blocks, gate.block_len)[keep].ravel(), keep
+
+# Mostly whole blocks per call, and mostly less than a block per call
+@pytest.mark.parametrize('seed, max_input', [(0, 20000), (1, 20000), (2, 20000), (3, 40)])
+def test_gate_passes_the_bursts(seed, max_input):
+    samples = stream()
+    gate = burst_gate(samp_rate=SAMP_RATE)
+    gate.start()
+    out = run(gate, samples, np.random.default_rng(seed), max_input)
+    gate.stop()
+
+    expected, keep = expected_output(gate, samples, len(samples))
+    assert np.array_equal(out, expected)
+    # The tail short of a block is dropped, but counted as input
+    assert len(gate.partial) == len(samples) % gate.block_len
+    assert gate.samples_in == len(samples)
+    assert gate.samples_out == len(out)
+
+    # One tag per burst, at its first output sample, holding its first input sample
+    starts = np.flatnonzero(keep & ~np.concatenate([[False], keep[:-1]]))
+    assert gate.burst_count == len(starts)
+    positions = np.cumsum(keep) - 1
+    assert [(offset, value[1]) for offset, _, value in gate.added_tags] == \
+           [(int(positions[i]) * gate.block_len, int(i) * gate.block_len) for i in starts]
+
+def test_gate_disabled_passes_everything():
+    samples = stream()[:10000]
+    gate = burst_gate(samp_rate=SAMP_RATE, threshold=0)
+    out = np.zeros(len(samples), dtype=np.complex64)
+    assert gate.general_work([samples], [out]) == len(samples)
+    assert np.array_equal(out, samples)
@@ -0,0 +1,15 @@
+from elrs_link import LinkTracker
+
+def test_link_tracker_counts():
+    tracker = LinkTracker(sequence_len=0)
+    for index in (10, 11, 5, 12, 4, 5, 14):
+        tracker.update(index)
+    tracker.update(None)
+    tracker.update(3, crc_ok=False)
+    summary = tracker.summary()
+    assert summary['received'] == 6
+    assert summary['lost'] == 5
+    assert summary['duplicate'] == 1
+    assert summary['reordered'] == 2
+    assert summary['unknown'] == 1
+    assert summary['crc_failed'] == 1
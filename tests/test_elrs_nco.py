@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from elrs_capture import predictive_capture
+from elrs_nco import hopping_nco, xlating_decimator
+from elrs_receiver_epy_block_0 import fhss_controller as receiver_fhss_controller
+from elrs_transmitter_epy_block_0 import fhss_controller
+from elrs_transmitter_epy_block_2 import multi_fhss_controller
+
+# Feeds the hop messages the controllers really publish to the blocks they drive
+
+FREQ_ARGS = dict(freq_start=903.5e6, freq_stop=926.9e6, freq_count=40, freq_center=915e6)
+
+def retune(block, msgs):
+    for msg in msgs:
+        block.handle_msg(msg)
+    return block.pop_all(block.immediate)
+
+def test_fhss_controller_drives_hopping_nco():
+    controller = fhss_controller(binding_phrase='DefaultBindingPhrase', **FREQ_ARGS)
+    assert np.allclose(retune(hopping_nco(), controller.hop_msgs[:8]), controller.hop_offsets[:8])
+
+@pytest.mark.parametrize('emitter', [0, 1])
+def test_multi_fhss_controller_drives_each_emitter(emitter):
+    controller = multi_fhss_controller(binding_phrases=['DefaultBindingPhrase', 'OtherBindingPhrase'], **FREQ_ARGS)
+    assert np.allclose(retune(hopping_nco(emitter=emitter), controller.hop_msgs[:8]), controller.hop_offsets[:8, emitter])
+
+def test_multi_fhss_controller_needs_a_phrase():
+    with pytest.raises(ValueError):
+        multi_fhss_controller(binding_phrases=[], **FREQ_ARGS)
+
+def test_receiver_fhss_controller_drives_xlating_decimator():
+    controller = receiver_fhss_controller(binding_phrase='DefaultBindingPhrase', **FREQ_ARGS)
+    assert np.allclose(retune(xlating_decimator(), controller.hop_msgs[:8]), controller.hop_offsets[:8])
+
+def test_predictive_capture_schedules_xlating_decimator():
+    # The capture parks with a cancelling dict, then schedules timed dicts
+    capture = predictive_capture(binding_phrase='DefaultBindingPhrase', samp_rate=250e3, decim=8, lookahead=4, **FREQ_ARGS)
+    published = []
+    capture.message_port_pub = lambda port, msg: published.append(msg)
+    capture.unlock()
+    capture.lock(1000)
+
+    decimator = xlating_decimator()
+    assert np.allclose(retune(decimator, published[:1]), [capture.channel_offset(0)])
+    for msg in published[1:]:
+        decimator.handle_msg(msg)
+    times = sorted(time for time, _, _ in decimator.scheduled)
+    assert times == [int(start * capture.decim) for start, _ in capture.windows]
@@ -0,0 +1,24 @@
+import numpy as np
+from elrs_payload import PAYLOAD_LEN, PayloadIndex
+
+def test_payload_index_matches_dict():
+    rng = np.random.default_rng(4)
+    payloads = rng.integers(0, 256, (5000, PAYLOAD_LEN), dtype=np.uint8)
+    # Repeated records, the last one wins as with dict assignment
+    payloads[4000:4100] = payloads[:100]
+    expected = {bytes(row): i for i, row in enumerate(payloads)}
+
+    index = PayloadIndex.from_payloads(payloads)
+    assert len(index) == len(expected)
+    for data, i in expected.items():
+        assert index.get(data) == i
+
+    missing = rng.integers(0, 256, (200, PAYLOAD_LEN), dtype=np.uint8)
+    for row in missing:
+        assert index.get(bytes(row), -1) == expected.get(bytes(row), -1)
+    assert index.get(b'\0' * (PAYLOAD_LEN + 1), 'short') == 'short'
+
+def test_empty_payload_index():
+    index = PayloadIndex.from_payloads(np.empty((0, PAYLOAD_LEN), dtype=np.uint8))
+    assert len(index) == 0
+    assert index.get(b'\0' * PAYLOAD_LEN) is None
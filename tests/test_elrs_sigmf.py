@@ -0,0 +1,33 @@
+import json
+import numpy as np
+import pytest
+from elrs_sigmf import sigmf_sink
+
+def bursts():
+    samples = (np.random.default_rng(2).standard_normal((200000, 2)) * 0.01).view(np.complex128)[:, 0].astype(np.complex64)
+    for start in (30000, 90000, 150000):
+        samples[start:start + 5000] += 0.5
+    return samples
+
+def record(path, samples, sizes):
+    sink = sigmf_sink(path=str(path), samp_rate=1e6, trigger=10, pre_roll=0.001, post_roll=0.002)
+    sink.start()
+    first = 0
+    for size in sizes:
+        sink.gate(samples[first:first + size], first)
+        first += size
+    sink.stop()
+    with open(f'{path}.sigmf-meta', encoding='utf-8') as file:
+        captures = [capture['core:global_index'] for capture in json.load(file)['captures']]
+    return np.fromfile(f'{path}.sigmf-data', dtype=np.complex64), captures
+
+# Calls much shorter than the pre-roll must give the same dataset as one
+# call. Sizes are whole power blocks, so block boundaries line up too.
+@pytest.mark.parametrize('sizes', [[25] * 8000, [100, 25, 475] * 333 + [200], [975] * 205 + [125]])
+def test_gate_independent_of_call_size(tmp_path, sizes):
+    samples = bursts()
+    data, captures = record(tmp_path / 'whole', samples, [len(samples)])
+    assert len(captures) == 3
+    small_data, small_captures = record(tmp_path / 'small', samples, sizes)
+    assert small_captures == captures
+    assert np.array_equal(small_data, data)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import elrs_snapshot
+from elrs_snapshot import cached_array, read_meta
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(elrs_snapshot, 'SNAPSHOT_DIR', tmp_path)
+    return tmp_path
+
+def test_cached_array_reuses_snapshot(snapshot_dir):
+    built = []
+    def build():
+        built.append(1)
+        return np.arange(10)
+
+    first = cached_array('table', (1, 'input'), build)
+    second = cached_array('table', (1, 'input'), build)
+    assert len(built) == 1
+    assert np.array_equal(first, second)
+    assert not first.flags.writeable and not second.flags.writeable
+
+def test_new_version_prunes_old_snapshot(snapshot_dir):
+    cached_array('table', (1, 'input'), lambda: np.arange(10), group='input')
+    cached_array('other', (1, 'input'), lambda: np.arange(10), group='input')
+    rebuilt = cached_array('table', (2, 'input'), lambda: np.arange(20), group='input')
+    assert len(rebuilt) == 20
+    # Only the new snapshot of 'table' is left, other names keep theirs
+    keys = sorted(read_meta(path)['key'] for path in snapshot_dir.glob('*.snap'))
+    assert keys == [repr((1, 'input')), repr((2, 'input'))]
+    assert [path.name.split('-')[0] for path in snapshot_dir.glob('table-*.snap')] == ['table']
+
+def test_empty_snapshot_is_read_only(snapshot_dir):
+    cached_array('empty', (1,), lambda: np.empty((0, 6), dtype=np.uint8))
+    array = cached_array('empty', (1,), lambda: pytest.fail('rebuilt'))
+    assert array.shape == (0, 6)
+    assert not array.flags.writeable
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import elrs_transmitter_flowgraph_epy_block_2 as data_gen_module
+from elrs_payload import PAYLOAD_LEN, write_payload_file
+from elrs_transmitter_flowgraph_epy_block_2 import elrs_transmitter_data_gen
+
+def published_frames(path, loop, count):
+    block = elrs_transmitter_data_gen(bindingPhrase='DefaultBindingPhrase', filepath=str(path), loopFile=loop)
+    frames = []
+    block.message_port_pub = lambda port, msg: frames.append(bytes(msg[1]))
+    assert block.start()
+    for _ in range(count):
+        block.handle_msg(None)
+    block.stop()
+    return block, frames
+
+@pytest.mark.parametrize('records', [7, 10, 25])
+def test_loop_matches_stream(tmp_path, monkeypatch, records):
+    # A ring smaller than the file, so it is refilled and wraps around
+    monkeypatch.setattr(data_gen_module, 'FRAME_RING_LEN', 10)
+    path = tmp_path / 'payloads.elrsp'
+    write_payload_file(path, np.random.default_rng(5).integers(0, 256, (records, PAYLOAD_LEN), dtype=np.uint8))
+
+    _, once = published_frames(path, False, records + 3)
+    assert len(once) == records
+    block, looped = published_frames(path, True, 3 * records + 4)
+    assert looped == (once * 4)[:3 * records + 4]
+    assert len(block.frame_ring) <= 10
+
+def test_empty_loop_file(tmp_path):
+    path = tmp_path / 'empty.elrsp'
+    write_payload_file(path, np.empty((0, PAYLOAD_LEN), dtype=np.uint8))
+    _, frames = published_frames(path, True, 3)
+    assert frames == []
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from pathlib import Path
+from elrs_nco import hopping_nco, xlating_decimator
+from elrs_receiver_epy_block_3 import xlating_decimator as xlating_decimator_block
+from elrs_transmitter_epy_block_3 import pfb_synthesizer as pfb_synthesizer_block
+from elrs_transmitter_epy_block_4 import hopping_nco as hopping_nco_block
+
+# The GRC wrappers of the shared blocks, and the sources the .grc files embed
+
+FLOWGRAPH_DIR = Path(__file__).resolve().parent.parent / 'elrs_flowgraphs'
+
+# Flowgraphs the generated .py files come from, the epy sources of the
+# other reference flowgraphs are variants of these
+GENERATED = ['elrs_receiver_flowgraph.grc', 'elrs_transmitter_flowgraph.grc', 'reference_flowgraph_5.grc']
+
+@pytest.mark.parametrize('grc', GENERATED)
+def test_grc_embeds_the_epy_sources(grc):
+    yaml = pytest.importorskip('yaml')
+    flowgraph = yaml.safe_load((FLOWGRAPH_DIR / grc).read_text())
+    flowgraph_id = flowgraph['options']['parameters']['id']
+    for block in flowgraph['blocks']:
+        if block['id'] == 'epy_block':
+            source = (FLOWGRAPH_DIR / f"{flowgraph_id}_{block['name']}.py").read_text()
+            assert block['parameters']['_source_code'] == source, block['name']
+
+def test_xlating_decimator_block_matches_the_shared_block():
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(4096) + 1j * rng.standard_normal(4096)).astype(np.complex64)
+    taps = np.hanning(31)
+    expected = np.zeros(4096 // 8 - 3, dtype=np.complex64)
+    actual = np.zeros_like(expected)
+    xlating_decimator(decim=8, taps=taps, samp_rate=1e6, freq=1e5).work([samples], [expected])
+    xlating_decimator_block(decim=8, taps=taps, samp_rate=1e6, center_freq=1e5).work([samples], [actual])
+    assert np.array_equal(actual, expected)
+
+def test_xlating_decimator_block_setters():
+    block = xlating_decimator_block(decim=4, taps=[1.0, 2.0], samp_rate=1e6, center_freq=1e5)
+    assert block.center_freq == 1e5
+    block.tap_bank(1e5)
+    block.samp_rate = 2e6
+    assert block.tap_banks == {} and block.samp_rate == 2e6
+    block.tap_bank(1e5)
+    block.taps = [3.0, 4.0]
+    assert block.tap_banks == {} and block.taps.dtype == np.float32
+    block.center_freq = 2e5
+    assert list(block.immediate) == [2e5]
+
+def test_hopping_nco_block_setters():
+    block = hopping_nco_block(samp_rate=1e6, center_freq=1e5, freq_offset=-10.0, downconvert=True)
+    assert block.center_freq == 1e5
+    block.phasor_table(block.freq)
+    block.samp_rate = 2e6
+    assert block.phasor_tables == {} and block.samp_rate == 2e6
+    block.center_freq = 2e5
+    assert list(block.immediate) == [2e5 - 10.0]
+
+def test_hopping_nco_block_matches_the_shared_block():
+    samples = np.exp(1j * np.arange(1000) / 7).astype(np.complex64)
+    expected = np.zeros_like(samples)
+    actual = np.zeros_like(samples)
+    hopping_nco(samp_rate=1e6, freq=1e5, freq_offset=-10.0, downconvert=True).work([samples], [expected])
+    hopping_nco_block(samp_rate=1e6, center_freq=1e5, freq_offset=-10.0, downconvert=True).work([samples], [actual])
+    assert np.array_equal(actual, expected)
+
+def test_pfb_synthesizer_block_freqs():
+    # The defaults give the five inputs GRC draws
+    assert pfb_synthesizer_block().inputs == 5
+    block = pfb_synthesizer_block(samp_rate=22.4e6, freqs=[1e6, 2e6], freq_offset=-3.7e3)
+    assert block.freqs == [1e6, 2e6]
+    block.freqs = [3e6, 4e6]
+    assert [list(queue) for queue in block.immediate] == [[3e6 - 3.7e3], [4e6 - 3.7e3]]